@@ -0,0 +1,30 @@
+"""
+Benchmark of the adaptive grid against uniform grids: state size, wall time and maximum error of the outlet CO₂ curve
+(relative to the inlet concentration), the reference being a uniform grid of 2560 segments, for a dry and a humid bed.
+
+Run with: python benchmarks/bench_adaptive.py
+"""
+import time
+
+import numpy as np
+
+from adsorpsim import Adsorbent_Langmuir, Bed
+
+
+def run(adsorbent, humidity, num_segments, mode):
+    bed = Bed(1.0, 0.1, 0.01, num_segments, 3000, adsorbent, humidity_percentage=humidity)
+    start = time.perf_counter()
+    result = bed.simulate(use_cache=False, mode=mode)
+    return result, len(bed._initial_conditions()), time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0, 5.0, 0.01, 0.5)
+    print(f"{'humidity':>8} {'mode':>8} {'segments':>9} {'state':>6} {'time [s]':>9} {'error':>9}")
+    for humidity in (0, 50):
+        reference, _, _ = run(adsorbent, humidity, 2560, "full")
+        for mode, counts in (("full", (80, 320, 1280)), ("adaptive", (40, 80, 160))):
+            for num_segments in counts:
+                result, size, elapsed = run(adsorbent, humidity, num_segments, mode)
+                error = np.abs(result.outlet_CO2 - reference.outlet_CO2).max() / reference.outlet_CO2.max()
+                print(f"{humidity:>8} {mode:>8} {num_segments:>9} {size:>6} {elapsed:>9.2f} {error:>9.3f}")
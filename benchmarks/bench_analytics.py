@@ -0,0 +1,44 @@
+"""
+Benchmark of the breakthrough-point and adsorbed-quantity computations on 10 000-point curves:
+the original np.append loop of get_adsorbed_quantity_CO2 (reproduced below), the vectorized function,
+and adsorpsim.analytics on a batch of curves and percentages.
+
+Run with: python benchmarks/bench_analytics.py
+"""
+import time
+
+import numpy as np
+
+from adsorpsim import get_adsorbed_quantity_CO2, get_percentage_point
+from adsorpsim.analytics import adsorbed_quantity, breakthrough_times
+
+
+def original_adsorbed_quantity_CO2(outlet_conc, pc_point_x, pc_point_y, flow_rate):
+    adsorbed_array = np.array([])
+    index = np.where(outlet_conc == pc_point_y)[0][0]
+    for elem in outlet_conc[:round(index)+1]:
+        if elem < 0.01624:
+            adsorbed_array = np.append(adsorbed_array, 0.01624 - elem)
+    return sum(adsorbed_array) * flow_rate * pc_point_x
+
+
+def timed(fun, *args):
+    start = time.perf_counter()
+    value = fun(*args)
+    return value, (time.perf_counter() - start) * 1e3
+
+
+if __name__ == "__main__":
+    t = np.linspace(0, 10000, 10000)
+    outlet = 0.01624 / (1 + np.exp(-(t - 6000) / 300))
+    x, y = get_percentage_point(90, t, outlet)
+    before, t_before = timed(original_adsorbed_quantity_CO2, outlet, x, y, 0.01)
+    after, t_after = timed(get_adsorbed_quantity_CO2, outlet, x, y, 0.01)
+    print(f"get_adsorbed_quantity_CO2: {t_before:.1f} ms -> {t_after:.2f} ms (same value: {np.isclose(before, after)})")
+
+    curves = outlet[None, :] * np.linspace(0.8, 1.0, 200)[:, None]
+    percentages = np.arange(5, 100, 5)
+    times, t_times = timed(breakthrough_times, t, curves, percentages, 0.01624)
+    _, t_quantities = timed(adsorbed_quantity, t, curves, 0.01, times)
+    print(f"analytics on {curves.shape[0]} curves x {len(percentages)} percentages: "
+          f"breakthrough_times {t_times:.1f} ms, adsorbed_quantity {t_quantities:.1f} ms")
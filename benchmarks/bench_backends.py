@@ -0,0 +1,24 @@
+"""
+Benchmark of Bed.simulate with the NumPy and numba backends.
+
+Run with: python benchmarks/bench_backends.py
+"""
+import time
+
+from adsorpsim import Adsorbent_Langmuir, Bed
+
+
+if __name__ == "__main__":
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0, 5.0, 0.01, 0.1)
+    # compile the numba kernels before timing
+    Bed(1.0, 0.1, 0.01, 10, 100, adsorbent, humidity_percentage=50, backend="numba").simulate()
+    print(f"{'segments':>8} {'humidity':>8} {'numpy [s]':>10} {'numba [s]':>10} {'speedup':>8}")
+    for humidity in (0, 50):
+        for num_segments in (100, 500):
+            timings = []
+            for backend in ("numpy", "numba"):
+                bed = Bed(1.0, 0.1, 0.01, num_segments, 3000, adsorbent, humidity_percentage=humidity, backend=backend)
+                start = time.perf_counter()
+                bed.simulate()
+                timings.append(time.perf_counter() - start)
+            print(f"{num_segments:>8} {humidity:>8} {timings[0]:>10.3f} {timings[1]:>10.3f} {timings[0] / timings[1]:>8.2f}")
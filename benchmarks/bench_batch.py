@@ -0,0 +1,35 @@
+"""
+Benchmark of the screening of every adsorbent of data/Adsorbent_data.csv against several bed geometries,
+with a serial loop over Bed.simulate and with one BatchBed solve.
+
+Run with: python benchmarks/bench_batch.py
+"""
+import itertools
+import time
+from pathlib import Path
+
+from adsorpsim import BatchBed, Bed, download_data, load_adsorbent_from_csv
+
+CSV_PATH = Path(__file__).parents[1] / "data" / "Adsorbent_data.csv"
+
+
+if __name__ == "__main__":
+    adsorbents = [load_adsorbent_from_csv(CSV_PATH, name) for name in download_data(CSV_PATH)["name"]]
+    geometries = list(itertools.product([0.5, 1.0, 2.0], [0.1, 0.2], [0.01, 0.02]))
+    beds = [
+        Bed(length, diameter, flow_rate, 50, 3000, adsorbent)
+        for adsorbent in adsorbents
+        for length, diameter, flow_rate in geometries
+    ]
+
+    start = time.perf_counter()
+    for bed in beds:
+        bed.simulate()
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    t, outlet_CO2, _ = BatchBed.from_beds(beds).simulate()
+    batch = time.perf_counter() - start
+
+    print(f"{len(beds)} beds x 50 segments, outlet array {outlet_CO2.shape}")
+    print(f"serial loop: {serial:.2f} s, BatchBed: {batch:.2f} s, speedup {serial / batch:.1f}x")
@@ -0,0 +1,25 @@
+"""
+Benchmark of the search for the cyclic steady state of adsorption / counter-current purge cycles:
+cycles to convergence and wall time of the plain cycling ("picard") and of its Anderson and Newton-Krylov
+accelerations, and the speedup of the latter over the former, for short cycles on beds of increasing capacity.
+
+Run with: python benchmarks/bench_cycles.py
+"""
+from adsorpsim import Adsorbent_Langmuir, Bed, CycleStep, CyclicBed
+
+
+if __name__ == "__main__":
+    print(f"{'k_ads':>6} {'cycle [s]':>9} {'method':>13} {'cycles':>6} {'time [s]':>9} {'captured':>9} {'speedup':>7}")
+    for k_ads, duration, affinity_factor in ((0.05, 100, 0.7), (0.05, 50, 0.8), (0.01, 100, 0.8)):
+        adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, k_ads, 650.0)
+        bed = Bed(1.0, 0.1, 0.01, 50, 100, adsorbent)
+        cyclic_bed = CyclicBed(bed, [
+            CycleStep("adsorption", duration),
+            CycleStep("desorption", duration, feed=False, counter_current=True, affinity_factor=affinity_factor),
+        ])
+        reference = None
+        for method in ("picard", "anderson", "newton_krylov"):
+            result = cyclic_bed.cyclic_steady_state(method, tol=1e-6, max_cycles=5000)
+            reference = reference or result.wall_time
+            print(f"{k_ads:>6g} {2 * duration:>9} {method:>13} {result.cycles:>6} {result.wall_time:>9.2f} "
+                  f"{result.captured['CO2']:>9.2e} {reference / result.wall_time:>7.1f}")
@@ -0,0 +1,22 @@
+"""
+Benchmark of Bed.simulate over the default 10 000 s of the app, with and without stopping at the breakthrough.
+
+Run with: python benchmarks/bench_early_stop.py
+"""
+import time
+
+from adsorpsim import Adsorbent_Langmuir, Bed
+
+
+if __name__ == "__main__":
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0)
+    print(f"{'segments':>8} {'full [s]':>9} {'stopped [s]':>12} {'breakthrough [s]':>17} {'speedup':>8}")
+    for num_segments in (100, 300, 500):
+        bed = Bed(1.0, 0.1, 0.01, num_segments, 10000, adsorbent)
+        start = time.perf_counter()
+        bed.simulate(use_cache=False)
+        full = time.perf_counter() - start
+        start = time.perf_counter()
+        t, _, _ = bed.simulate(use_cache=False, stop_at_breakthrough=90)
+        stopped = time.perf_counter() - start
+        print(f"{num_segments:>8} {full:>9.3f} {stopped:>12.3f} {t[-1]:>17.1f} {full / stopped:>8.1f}")
@@ -0,0 +1,49 @@
+"""
+Import-time regression benchmark of `import adsorpsim; adsorpsim.Bed`, measured with python -X importtime
+in fresh interpreters: median over the runs of the total import time, against BUDGET, and the heavy modules
+(see HEAVY_MODULES) that should only be imported by the plotting, database, ingestion and fitting functions.
+Exits with a non-zero status if the budget is exceeded or a heavy module is imported.
+
+Run with: python benchmarks/bench_import.py
+"""
+import subprocess
+import sys
+
+import numpy as np
+
+BUDGET = 0.5  # s
+RUNS = 7
+STATEMENT = "import adsorpsim; adsorpsim.Bed"
+HEAVY_MODULES = ("matplotlib", "pandas", "scipy.optimize", "scipy.integrate", "scipy.interpolate", "numba")
+
+
+def import_time(statement):
+    "Total import time (s) of statement in a fresh interpreter, and the names of the modules it imported"
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True)
+    total = 0
+    modules = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        # the top-level imports, whose cumulative times cover all the others
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total * 1e-6, modules
+
+
+if __name__ == "__main__":
+    times = []
+    for _ in range(RUNS):
+        elapsed, modules = import_time(STATEMENT)
+        times.append(elapsed)
+    heavy = sorted(name for name in modules if name in HEAVY_MODULES)
+    median = float(np.median(times))
+    print(f"{STATEMENT}: {median * 1e3:.0f} ms (median of {RUNS}, budget {BUDGET * 1e3:.0f} ms)")
+    for statement in ("import adsorpsim; adsorpsim.plot_the_graph", "import adsorpsim; adsorpsim.fit_adsorption_parameters_from_df"):
+        print(f"{statement}: {import_time(statement)[0] * 1e3:.0f} ms")
+    if heavy:
+        print(f"heavy modules imported: {heavy}")
+    if median > BUDGET or heavy:
+        sys.exit(1)
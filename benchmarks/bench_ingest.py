@@ -0,0 +1,55 @@
+"""
+Benchmark of load_breakthrough_data against pd.read_csv on a logger file of 3 million rows at 1 Hz:
+time and peak of the traced memory of the first load (streaming and caching), of a load from the cache in the same
+process (memory-mapped columns) and in a new one (the file being hashed again), and of a decimated load.
+
+Run with: python benchmarks/bench_ingest.py
+"""
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from adsorpsim import ingest, load_breakthrough_data
+
+NUM_ROWS = 3_000_000
+
+
+def measured(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return value, elapsed, peak
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "logger.csv"
+        t = np.arange(NUM_ROWS, dtype=float)
+        outlet = 0.016 / (1 + np.exp(-(t - NUM_ROWS / 2) / 1e4)) + np.random.default_rng(0).normal(0, 1e-4, NUM_ROWS)
+        with open(path, "w", encoding="utf-8-sig") as file:
+            pd.DataFrame({"time": t, "outlet_CO2": outlet}).to_csv(file, sep=";", index=False)
+        cache_dir = Path(directory) / "cache"
+        print(f"{NUM_ROWS} rows ({path.stat().st_size / 1e6:.0f} MB)")
+
+        def new_process():
+            ingest._digests.clear()
+            return load_breakthrough_data(path, cache_dir=cache_dir)
+
+        print(f"{'load':>28} {'time [s]':>9} {'peak [MB]':>10}")
+        for name, function in [
+            ("pd.read_csv", lambda: pd.read_csv(path, sep=";", encoding="utf-8-sig")),
+            ("first load", lambda: load_breakthrough_data(path, cache_dir=cache_dir)),
+            ("cached, same process", lambda: load_breakthrough_data(path, cache_dir=cache_dir)),
+            ("cached, new process", new_process),
+            ("decimated by 10, in memory", lambda: load_breakthrough_data(path, decimate=10, use_cache=False)),
+        ]:
+            data, elapsed, peak = measured(function)
+            print(f"{name:>28} {elapsed:9.3f} {peak / 1e6:10.1f}")
+        assert np.array_equal(data["time"], t[::10])
@@ -0,0 +1,39 @@
+"""
+Benchmark of the BDF solve in Bed.simulate with the analytic sparse Jacobian
+against SciPy's dense finite-difference Jacobian, for an increasing number of segments.
+
+Run with: python benchmarks/bench_jacobian.py
+"""
+import time
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from adsorpsim import Adsorbent_Langmuir, Bed
+
+
+def solve(bed, analytic_jacobian):
+    t_span = (0, bed.total_time)
+    start = time.perf_counter()
+    solve_ivp(
+        bed._ode_system,
+        t_span,
+        bed._initial_conditions(),
+        t_eval=np.linspace(*t_span, bed.total_time),
+        method='BDF',
+        jac=bed._jacobian if analytic_jacobian else None,
+        rtol=1e-6,
+        atol=1e-9
+    )
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0, 5.0, 0.01, 0.1)
+    print(f"{'segments':>8} {'humidity':>8} {'dense FD [s]':>13} {'sparse [s]':>11} {'speedup':>8}")
+    for humidity in (0, 50):
+        for num_segments in (50, 100, 200, 400):
+            bed = Bed(1.0, 0.1, 0.01, num_segments, 3000, adsorbent, humidity_percentage=humidity)
+            t_dense = solve(bed, analytic_jacobian=False)
+            t_sparse = solve(bed, analytic_jacobian=True)
+            print(f"{num_segments:>8} {humidity:>8} {t_dense:>13.3f} {t_sparse:>11.3f} {t_dense / t_sparse:>8.1f}")
@@ -0,0 +1,41 @@
+"""
+Peak memory of a simulation storing the full state at every time point (solve_ivp with t_eval, as Bed.simulate
+used to do) against the outlet-only recording of Bed.simulate.
+
+Run with: python benchmarks/bench_memory.py
+"""
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from adsorpsim import Adsorbent_Langmuir, Bed
+
+
+def measure(fun):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fun()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 ** 2, elapsed
+
+
+def full_state(bed):
+    kernel = bed._kernel()
+    t_span = (0, bed.total_time)
+    sol = solve_ivp(kernel.rhs, t_span, bed._initial_conditions(), t_eval=np.linspace(*t_span, bed.total_time),
+                    method='BDF', jac=kernel.jacobian, rtol=1e-6, atol=1e-9)
+    return sol.y[bed.num_segments - 1]
+
+
+if __name__ == "__main__":
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0, 5.0, 0.01, 0.1)
+    print(f"{'segments':>8} {'time':>6} {'full state [MB]':>16} {'outlet only [MB]':>17} {'full [s]':>9} {'outlet [s]':>11}")
+    for num_segments, total_time in ((100, 3000), (500, 3000), (500, 10000)):
+        bed = Bed(1.0, 0.1, 0.01, num_segments, total_time, adsorbent, humidity_percentage=50)
+        full_mb, full_s = measure(lambda: full_state(bed))
+        outlet_mb, outlet_s = measure(lambda: bed.simulate(use_cache=False))
+        print(f"{num_segments:>8} {total_time:>6} {full_mb:>16.1f} {outlet_mb:>17.1f} {full_s:>9.2f} {outlet_s:>11.2f}")
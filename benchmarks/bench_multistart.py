@@ -0,0 +1,39 @@
+"""
+Benchmark of the single-start Nelder-Mead fitter against the multi-start, multi-fidelity least-squares fitter
+on data/real_data.csv (1900 points), with the bed geometry of the app.
+
+Run with: python benchmarks/bench_multistart.py [num_segments]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from adsorpsim import Bed, fit_adsorption_parameters_from_df
+from adsorpsim.fitting import fit_adsorption_parameters_multistart
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "real_data.csv"
+
+
+def rmse(adsorbent, df, num_segments):
+    bed = Bed(1.0, 0.1, 0.01, num_segments, df["time"].iloc[-1], adsorbent)
+    t, outlet, _ = bed.simulate()
+    return np.sqrt(np.mean((np.interp(df["time"], t, outlet) - df["outlet_CO2"]) ** 2))
+
+
+if __name__ == "__main__":
+    num_segments = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    df = pd.read_csv(DATA, sep=";", encoding="utf-8-sig")
+    print(f"{'fitter':>12} {'time [s]':>9} {'q_max_CO2':>10} {'K_CO2':>8} {'k_ads_CO2':>10} {'rmse':>10}")
+    for name in ("nelder-mead", "multistart"):
+        bed = Bed(1.0, 0.1, 0.01, num_segments, df["time"].iloc[-1], None)
+        start = time.perf_counter()
+        if name == "nelder-mead":
+            adsorbent, _ = fit_adsorption_parameters_from_df(df, bed, 800)
+        else:
+            adsorbent, _, candidates = fit_adsorption_parameters_multistart(df, bed, assumed_density=800, seed=0, plot=False)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12} {elapsed:>9.2f} {adsorbent.q_max_CO2:>10.4f} {adsorbent.K_CO2:>8.4f} "
+              f"{adsorbent.k_ads_CO2:>10.4f} {rmse(adsorbent, df, num_segments):>10.2e}")
@@ -0,0 +1,34 @@
+"""
+Benchmark of Bed.simulate(mode="preview") against the full simulation for the adsorbents of data/Adsorbent_data.csv,
+with the bed of the app: time of both and actual and estimated maximum errors (relative to the inlet CO₂ concentration).
+
+Run with: python benchmarks/bench_preview.py
+"""
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from adsorpsim import Bed, load_adsorbent_from_csv
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "Adsorbent_data.csv"
+
+
+if __name__ == "__main__":
+    names = pd.read_csv(DATA, sep=";")["name"]
+    print(f"{'adsorbent':>30} {'full [ms]':>10} {'preview [us]':>13} {'error':>8} {'estimate':>9}")
+    for name in names:
+        bed = Bed(1.0, 0.1, 0.01, 100, 3000, load_adsorbent_from_csv(DATA, name))
+        start = time.perf_counter()
+        full = bed.simulate(use_cache=False)
+        full_time = time.perf_counter() - start
+        bed.simulate(mode="preview")
+        repeats = 100
+        start = time.perf_counter()
+        for _ in range(repeats):
+            preview = bed.simulate(mode="preview")
+        preview_time = (time.perf_counter() - start) / repeats
+        error = np.abs(preview.outlet_CO2 - full.outlet_CO2).max() / bed.initial_conc_CO2
+        estimate = preview.error_estimate[0] / bed.initial_conc_CO2
+        print(f"{name.strip()[:30]:>30} {full_time * 1e3:>10.1f} {preview_time * 1e6:>13.0f} {error:>8.4f} {estimate:>9.4f}")
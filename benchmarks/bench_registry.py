@@ -0,0 +1,83 @@
+"""
+Benchmark of AdsorbentRegistry against the former whole-file reads and rewrites, on a database of 10⁵ adsorbents:
+time of a lookup (first one parsing the file, then from the index), of looking up 1000 adsorbents at once,
+of building the dict of adsorbents of the app, and of adding adsorbents one at a time and in bulk.
+The former times of 1000 operations are extrapolated from 10 of them.
+
+Run with: python benchmarks/bench_registry.py
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from adsorpsim import Adsorbent_Langmuir, AdsorbentRegistry
+
+NUM_ADSORBENTS = 100_000
+
+
+def make_database(path, count):
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        "name": [f"material-{i}" for i in range(count)],
+        "q_max_CO2": rng.uniform(1, 8, count), "K_CO2": rng.uniform(1e-3, 1, count),
+        "k_ads_CO2": rng.uniform(1e-3, 2, count), "density": rng.uniform(300, 1500, count),
+        "q_max_H2O": rng.uniform(0, 10, count), "K_H2O": rng.uniform(0, 1e-2, count), "k_ads_H2O": rng.uniform(0, 1e-2, count),
+    }).to_csv(path, sep=";", index=False)
+
+
+def former_lookup(path, name):
+    df = pd.read_csv(path, sep=";")
+    row = df[df["name"] == name].iloc[0]
+    return Adsorbent_Langmuir(row["name"], *(row[column] for column in df.columns[1:]))
+
+
+def former_add(path, row):
+    df = pd.read_csv(path, sep=";")
+    if row["name"] in df["name"].values:
+        raise ValueError
+    pd.concat([df, pd.DataFrame([row])], ignore_index=True).to_csv(path, sep=";", index=False)
+
+
+def timed(function, repeats=1):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def new_row(i):
+    return {"name": f"new-{i}", "q_max_CO2": 2.0, "K_CO2": 0.1, "k_ads_CO2": 0.05, "density": 800.0,
+            "q_max_H2O": 0.0, "K_H2O": 0.0, "k_ads_H2O": 0.0}
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        # the former functions and the registry work on copies of the database, so that they do not see each other's rows
+        path = Path(directory) / "former.csv"
+        make_database(path, NUM_ADSORBENTS)
+        registry_path = Path(directory) / "registry.csv"
+        registry_path.write_bytes(path.read_bytes())
+        names = [f"material-{i}" for i in range(0, NUM_ADSORBENTS, NUM_ADSORBENTS // 1000)]
+        print(f"database of {NUM_ADSORBENTS} adsorbents ({path.stat().st_size / 1e6:.1f} MB)")
+
+        registry = AdsorbentRegistry(registry_path)
+        print(f"{'operation':>36} {'former [ms]':>12} {'registry [ms]':>14}")
+        rows = [
+            ("first lookup", timed(lambda: former_lookup(path, names[-1]), 3), timed(lambda: registry.get(names[-1]))),
+            ("further lookup", timed(lambda: former_lookup(path, names[1]), 3), timed(lambda: registry.get(names[1]), 1000)),
+            ("1000 lookups", timed(lambda: [former_lookup(path, name) for name in names[:10]]) * 100,
+             timed(lambda: registry.get_many(names))),
+            ("dict of the app", timed(lambda: {row["name"]: row for _, row in pd.read_csv(path, sep=";").iterrows()}),
+             timed(lambda: registry.names())),
+            ("add one adsorbent", timed(lambda: former_add(path, new_row(0))),
+             timed(lambda: registry.add(**new_row(1)))),
+            ("add 1000 adsorbents one at a time", timed(lambda: [former_add(path, new_row(i)) for i in range(10, 20)]) * 100,
+             timed(lambda: [registry.add(**new_row(i)) for i in range(1000, 2000)])),
+            ("add 1000 adsorbents at once", np.nan, timed(lambda: registry.add_many([new_row(i) for i in range(2000, 3000)]))),
+        ]
+        for operation, former, new in rows:
+            print(f"{operation:>36} {former * 1e3:12.2f} {new * 1e3:14.3f}")
+        assert len(registry) == len(pd.read_csv(registry_path, sep=";")) == NUM_ADSORBENTS + 2001
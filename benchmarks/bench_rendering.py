@@ -0,0 +1,75 @@
+"""
+Benchmark of the rendering of the breakthrough and fitted-curve figures, drawn to PNG like st.pyplot does:
+every point drawn on a new figure (as before the downsampling), the downsampled plot_the_graph and
+plot_fitted_curve, and a reused figure redrawn with new curves; and the size of the data of the lightweight chart.
+The curves have the 10 000 points of a simulation and the experimental points a million rows.
+
+Run with: python benchmarks/bench_rendering.py
+"""
+import io
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from adsorpsim.plotting import BreakthroughFigure, FittedCurveFigure, chart_data, plot_fitted_curve, plot_the_graph
+
+REPEATS = 9
+NUM_POINTS = 10_000
+NUM_EXPERIMENTAL_POINTS = 1_000_000
+
+
+def rendered(function):
+    "Median time (s) to build a figure with function and draw it to PNG"
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fig = function()
+        fig.savefig(io.BytesIO(), format="png")
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def every_point(t, outlet_CO2, outlet_H2O=None, t_exp=None, outlet_exp=None):
+    "New figure with every point, as drawn by plot_the_graph and plot_fitted_curve before the downsampling"
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.plot(t, outlet_CO2, label="Outlet CO₂ Concentration")
+    if outlet_H2O is not None:
+        ax.plot(1500, 0.008, "rx", markersize=10, label="Percentage point")
+        ax.plot(t, outlet_H2O, label="Outlet H₂O Concentration", linestyle="--")
+    if t_exp is not None:
+        ax.scatter(t_exp, outlet_exp, label="Experimental points", color="red", marker="o")
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel("Outlet CO₂ Concentration (mol/m³)")
+    ax.set_title("Breakthrough Curve")
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+if __name__ == "__main__":
+    t = np.linspace(0, 3000, NUM_POINTS)
+    outlet_CO2 = 0.016 / (1 + np.exp(-(t - 1500) / 50))
+    outlet_H2O = 0.5 / (1 + np.exp(-(t - 800) / 30))
+    t_exp = np.linspace(0, 3000, NUM_EXPERIMENTAL_POINTS)
+    outlet_exp = np.interp(t_exp, t, outlet_CO2) + np.random.default_rng(0).normal(0, 1e-4, NUM_EXPERIMENTAL_POINTS)
+
+    breakthrough = BreakthroughFigure()
+    fitted = FittedCurveFigure()
+    for name, function in [
+        ("breakthrough, every point", lambda: every_point(t, outlet_CO2, outlet_H2O)),
+        ("plot_the_graph", lambda: plot_the_graph(t, outlet_CO2, outlet_H2O, 1500, 0.008)),
+        ("reused breakthrough figure", lambda: breakthrough.update(t, outlet_CO2 * 1.01, outlet_H2O, 1500, 0.008)),
+        ("fitted curve, every point", lambda: every_point(t, outlet_CO2, None, t_exp, outlet_exp)),
+        ("plot_fitted_curve", lambda: plot_fitted_curve(t, outlet_CO2, t_exp, outlet_exp)),
+        ("reused fitted-curve figure", lambda: fitted.update(t, outlet_CO2 * 1.01, t_exp, outlet_exp)),
+    ]:
+        print(f"{name:>28}: {rendered(function) * 1e3:7.1f} ms")
+        plt.close("all")
+
+    chart_data(t, outlet_CO2, outlet_H2O)  # imports pandas
+    start = time.perf_counter()
+    data = chart_data(t, outlet_CO2, outlet_H2O)
+    print(f"{'chart_data':>28}: {(time.perf_counter() - start) * 1e3:7.1f} ms, {len(data)} rows instead of {NUM_POINTS}")
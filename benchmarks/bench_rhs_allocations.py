@@ -0,0 +1,78 @@
+"""
+Micro-benchmark of the allocations and time per call of the right-hand side of the breakthrough model,
+before (the original Bed._ode_system, reproduced below) and after (the preallocated BreakthroughKernel).
+
+Run with: python benchmarks/bench_rhs_allocations.py
+"""
+import time
+import tracemalloc
+
+import numpy as np
+
+from adsorpsim import Adsorbent_Langmuir, Bed
+
+
+def reference_ode_system(bed, t, y):
+    "Right-hand side as originally written in Bed._ode_system"
+    n = bed.num_segments
+    if bed.initial_conc_H2O != 0:
+        C_CO2, C_H2O, q_CO2, q_H2O = y[0:n], y[n:2*n], y[2*n:3*n], y[3*n:]
+    else:
+        C_CO2, q_CO2 = y[0:n], y[n:]
+
+    dC_CO2_dt = np.zeros_like(C_CO2)
+    C_up_CO2 = np.concatenate([[bed.initial_conc_CO2], C_CO2[:-1]])
+    dC_CO2_dz = (C_CO2 - C_up_CO2) / bed.dz
+    K_CO2 = bed.adsorbent.K_CO2
+    q_eq_CO2 = (bed.adsorbent.q_max_CO2 * K_CO2 * C_CO2) / (1 + K_CO2 * C_CO2)
+    dq_CO2_dt = bed.adsorbent.k_ads_CO2 * (q_eq_CO2 - q_CO2)
+    dC_CO2_dt = -bed.velocity * dC_CO2_dz - bed.adsorbent.density * dq_CO2_dt
+
+    if bed.initial_conc_H2O != 0:
+        dC_H2O_dt = np.zeros_like(C_H2O)
+        C_up_H2O = np.concatenate([[bed.initial_conc_H2O], C_H2O[:-1]])
+        dC_H2O_dz = (C_H2O - C_up_H2O) / bed.dz
+        K_H2O = bed.adsorbent.K_H2O
+        q_eq_H2O = (bed.adsorbent.q_max_H2O * K_H2O * C_H2O) / (1 + K_H2O * C_H2O)
+        dq_H2O_dt = bed.adsorbent.k_ads_H2O * (q_eq_H2O - q_H2O)
+        dC_H2O_dt = -bed.velocity * dC_H2O_dz - bed.adsorbent.density * dq_H2O_dt
+        return np.concatenate([dC_CO2_dt, dC_H2O_dt, dq_CO2_dt, dq_H2O_dt])
+    return np.concatenate([dC_CO2_dt, dq_CO2_dt])
+
+
+def allocated_bytes(fun, y, calls=200):
+    """
+    Memory allocated by one call, as traced by tracemalloc (NumPy reports its array buffers to it):
+    the peak of the temporaries alive during the call, and what is still allocated once the result is dropped
+    """
+    fun(0, y)
+    tracemalloc.start()
+    peak = 0
+    for _ in range(calls):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        result = fun(0, y)
+        del result
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return peak
+
+
+def time_per_call(fun, y, calls=20000):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fun(0, y)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+if __name__ == "__main__":
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0, 5.0, 0.01, 0.1)
+    print(f"{'segments':>8} {'humidity':>8} {'implementation':>15} {'state bytes':>12} {'peak bytes/call':>16} {'us/call':>8}")
+    for humidity in (0, 50):
+        for num_segments in (100, 500):
+            bed = Bed(1.0, 0.1, 0.01, num_segments, 3000, adsorbent, humidity_percentage=humidity)
+            y = np.random.default_rng(0).uniform(0, 0.01, size=len(bed._initial_conditions()))
+            kernel = bed._kernel()
+            for label, fun in (("before", lambda t, y: reference_ode_system(bed, t, y)), ("after", kernel.rhs)):
+                peak = allocated_bytes(fun, y)
+                print(f"{num_segments:>8} {humidity:>8} {label:>15} {y.nbytes:>12} {peak:>16} {time_per_call(fun, y):>8.1f}")
@@ -0,0 +1,44 @@
+"""
+Benchmark of the reduced-order model of adsorpsim.rom: training time, number of modes and, over beds whose
+parameters are drawn within ±30 % of the training ones, the mean wall time of the reduced and of the full model
+(with the default BDF and with the solver picked by method="auto") and the largest outlet CO₂ error
+(relative to the inlet concentration) and error indicator.
+
+Run with: python benchmarks/bench_rom.py
+"""
+import time
+
+import numpy as np
+
+from adsorpsim import Adsorbent_Langmuir, Bed
+from adsorpsim.rom import ReducedOrderModel
+
+
+def zeolite_bed(num_segments, factors):
+    q_max, K, k_ads = np.array([6.42, 0.164882124, 1.8]) * factors
+    return Bed(1.0, 0.1, 0.01, num_segments, 3000, Adsorbent_Langmuir("zeolite 13X", q_max, K, k_ads, 650.0))
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    print(f"{'segments':>8} {'train [s]':>9} {'modes':>5} {'full BDF':>9} {'full auto':>9} {'ROM':>7} {'speedup':>7} {'error':>8} {'indicator':>9}")
+    for num_segments in (100, 400, 1000):
+        start = time.perf_counter()
+        model = ReducedOrderModel.train([zeolite_bed(num_segments, factors) for factors in rng.uniform(0.7, 1.3, (6, 3))])
+        train_time = time.perf_counter() - start
+        times = {"BDF": [], "auto": [], "rom": []}
+        errors, indicators = [], []
+        for factors in rng.uniform(0.7, 1.3, (10, 3)):
+            bed = zeolite_bed(num_segments, factors)
+            for method in ("BDF", "auto"):
+                full = bed.simulate(use_cache=False, method=method)
+                times[method].append(full.wall_time)
+            start = time.perf_counter()
+            reduced = model.simulate(bed)
+            times["rom"].append(time.perf_counter() - start)
+            errors.append(np.abs(reduced.outlet_CO2 - full.outlet_CO2).max() / bed.initial_conc_CO2)
+            indicators.append(np.inf if reduced.rom_error is None else reduced.rom_error)
+        mean = {name: np.mean(values) for name, values in times.items()}
+        print(f"{num_segments:>8} {train_time:>9.2f} {model.basis_C.shape[1] + model.basis_q.shape[1]:>5} "
+              f"{mean['BDF']:>9.3f} {mean['auto']:>9.3f} {mean['rom']:>7.3f} "
+              f"{min(mean['BDF'], mean['auto']) / mean['rom']:>7.1f} {max(errors):>8.1e} {max(indicators):>9.3f}")
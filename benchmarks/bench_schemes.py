@@ -0,0 +1,36 @@
+"""
+Grid convergence of the spatial schemes: for every scheme, the number of segments (and the wall time of the simulation)
+needed to reach a target error on the time at which the outlet reaches 50 % of the inlet CO₂ concentration,
+the reference being a WENO3 simulation on a fine grid.
+The search stops at 2560 segments, whose error is then printed even if it misses the target.
+
+Run with: python benchmarks/bench_schemes.py
+"""
+import time
+
+from adsorpsim import Adsorbent_Langmuir, Bed
+from adsorpsim.analytics import breakthrough_times
+from adsorpsim.kernel import SCHEMES
+
+
+def half_breakthrough(adsorbent, num_segments, scheme):
+    bed = Bed(1.0, 0.1, 0.01, num_segments, 3000, adsorbent, scheme=scheme)
+    start = time.perf_counter()
+    t, outlet_CO2, _ = bed.simulate(use_cache=False)
+    elapsed = time.perf_counter() - start
+    return breakthrough_times(t, outlet_CO2, 50, reference=bed.initial_conc_CO2), elapsed
+
+
+if __name__ == "__main__":
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0)
+    reference, _ = half_breakthrough(adsorbent, 5120, "weno3")
+    print(f"reference t50 = {reference:.3f} s")
+    print(f"{'target':>7} {'scheme':>9} {'segments':>9} {'error':>9} {'time [s]':>9}")
+    for target in (1e-3, 1e-4):  # relative errors on the 50 % breakthrough time
+        for scheme in SCHEMES:
+            for num_segments in (10, 20, 40, 80, 160, 320, 640, 1280, 2560):
+                t50, elapsed = half_breakthrough(adsorbent, num_segments, scheme)
+                error = abs(t50 - reference) / reference
+                if error <= target:
+                    break
+            print(f"{target:>7g} {scheme:>9} {num_segments:>9} {error:>9.1e} {elapsed:>9.2f}")
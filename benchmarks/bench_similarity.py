@@ -0,0 +1,24 @@
+"""
+Benchmark of a geometric design sweep (length x diameter x flow rate) with and without the dimensionless similarity cache.
+
+Run with: python benchmarks/bench_similarity.py
+"""
+import time
+
+from adsorpsim import cache, similarity
+from adsorpsim.sweep import parameter_grid, run_sweep
+
+
+if __name__ == "__main__":
+    base = {"num_segments": 100, "total_time": 3000, "q_max_CO2": 6.42, "K_CO2": 0.164882124, "k_ads_CO2": 1.8, "density": 650.0}
+    configurations = parameter_grid(base, length=[0.5, 1.0, 2.0], diameter=[0.05, 0.1, 0.2], flow_rate=[0.0025, 0.01, 0.04])
+    print(f"{'similarity':>10} {'configurations':>15} {'solves':>7} {'time [s]':>9}")
+    for enabled in (False, True):
+        cache.default_cache.clear()
+        similarity.default_similarity_cache.clear()
+        similarity.default_similarity_cache.enabled = enabled
+        start = time.perf_counter()
+        df = run_sweep(configurations, max_workers=1)
+        elapsed = time.perf_counter() - start
+        solves = similarity.default_similarity_cache.stats()["misses"] if enabled else len(configurations)
+        print(f"{str(enabled):>10} {len(configurations):>15} {solves:>7} {elapsed:>9.2f}")
@@ -0,0 +1,25 @@
+"""
+Benchmark of the solvers of Bed.simulate, "auto" included, at the default and at loose tolerances:
+solver statistics, wall time and maximum error of the outlet CO₂ curve (relative to the inlet concentration)
+against a tight BDF solve, for fast (k_ads = 1.8 1/s, as in data/Adsorbent_data.csv) and slow kinetics.
+
+Run with: python benchmarks/bench_solvers.py
+"""
+import numpy as np
+
+from adsorpsim import Adsorbent_Langmuir, Bed
+
+
+if __name__ == "__main__":
+    print(f"{'k_ads':>6} {'segments':>8} {'method':>6} {'used':>6} {'rtol':>6} {'nfev':>6} {'njev':>5} {'nlu':>5} {'time [s]':>9} {'error':>8}")
+    for k_ads in (1.8, 1e-3):
+        adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, k_ads, 650.0)
+        for num_segments in (50, 100, 400):
+            bed = Bed(1.0, 0.1, 0.01, num_segments, 3000, adsorbent)
+            reference = bed.simulate(use_cache=False, rtol=1e-9, atol=1e-13)
+            for method in ("BDF", "LSODA", "Radau", "auto"):
+                for rtol, atol in ((1e-6, 1e-9), (1e-3, 1e-6)):
+                    result = bed.simulate(use_cache=False, method=method, rtol=rtol, atol=atol)
+                    error = np.abs(result.outlet_CO2 - reference.outlet_CO2).max() / bed.initial_conc_CO2
+                    print(f"{k_ads:>6g} {num_segments:>8} {method:>6} {result.method:>6} {rtol:>6g} {result.nfev:>6} "
+                          f"{result.njev:>5} {result.nlu:>5} {result.wall_time:>9.3f} {error:>8.1e}")
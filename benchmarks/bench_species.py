@@ -0,0 +1,21 @@
+"""
+Benchmark of the cost of the number of species: wall time and solver statistics of Bed.simulate with CO₂ plus
+0 to 6 trace species, with independent and with competitive (extended Langmuir) isotherms.
+
+Run with: python benchmarks/bench_species.py
+"""
+from adsorpsim import Adsorbent_Langmuir, Bed
+
+
+if __name__ == "__main__":
+    others = {f"X{i}": (1.0, 0.02 * (i + 1), 1.0) for i in range(6)}
+    print(f"{'species':>7} {'competitive':>11} {'state':>6} {'nfev':>6} {'njev':>5} {'nlu':>5} {'time [s]':>9}")
+    for num_others in (0, 1, 2, 4, 6):
+        names = list(others)[:num_others]
+        for competitive in (False, True):
+            adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0,
+                                           other_species={name: others[name] for name in names}, competitive=competitive)
+            bed = Bed(1.0, 0.1, 0.01, 100, 3000, adsorbent, inlet_concentrations=dict.fromkeys(names, 5.0))
+            result = bed.simulate(use_cache=False)
+            print(f"{1 + num_others:>7} {str(competitive):>11} {len(bed._initial_conditions()):>6} {result.nfev:>6} "
+                  f"{result.njev:>5} {result.nlu:>5} {result.wall_time:>9.3f}")
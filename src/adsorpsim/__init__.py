@@ -2,22 +2,52 @@
 
 from __future__ import annotations
 
-from adsorpsim.core import (
-    Adsorbent_Langmuir,
-    Bed,
-    download_data,
-    get_percentage_point,
-    plot_the_graph,
-    add_adsorbent_to_list,
-    get_adsorbed_quantity_CO2,
-    get_adsorbed_quantity_H2O,
-    fit_adsorption_parameters_from_df,
-    load_adsorbent_from_csv
-)
+import importlib
+from typing import TYPE_CHECKING
+
+# module of every public name, imported on first access (PEP 562) so that `import adsorpsim` stays cheap:
+# matplotlib, pandas and scipy.optimize are only loaded by the plotting, database and fitting functions
+_LAZY_NAMES = {
+    "Adsorbent_Langmuir": "core",
+    "Bed": "core",
+    "SimulationResult": "core",
+    "download_data": "database",
+    "get_percentage_point": "core",
+    "plot_the_graph": "plotting",
+    "add_adsorbent_to_list": "database",
+    "get_adsorbed_quantity_CO2": "core",
+    "get_adsorbed_quantity_H2O": "core",
+    "fit_adsorption_parameters_from_df": "fitting",
+    "load_adsorbent_from_csv": "database",
+    "BatchBed": "batch",
+    "CycleStep": "cycle",
+    "CyclicBed": "cycle",
+    "AdsorbentRegistry": "registry",
+    "get_registry": "registry",
+    "load_breakthrough_data": "ingest",
+}
+
+if TYPE_CHECKING:
+    from adsorpsim.batch import BatchBed
+    from adsorpsim.core import (
+        Adsorbent_Langmuir,
+        Bed,
+        SimulationResult,
+        get_percentage_point,
+        get_adsorbed_quantity_CO2,
+        get_adsorbed_quantity_H2O,
+    )
+    from adsorpsim.cycle import CycleStep, CyclicBed
+    from adsorpsim.database import add_adsorbent_to_list, download_data, load_adsorbent_from_csv
+    from adsorpsim.fitting import fit_adsorption_parameters_from_df
+    from adsorpsim.ingest import load_breakthrough_data
+    from adsorpsim.plotting import plot_the_graph
+    from adsorpsim.registry import AdsorbentRegistry, get_registry
 
 __all__ = [
     "Adsorbent_Langmuir",
     "Bed",
+    "SimulationResult",
     "download_data",
     "get_percentage_point",
     "plot_the_graph",
@@ -25,7 +55,25 @@ __all__ = [
     "get_adsorbed_quantity_CO2",
     "get_adsorbed_quantity_H2O",
     "fit_adsorption_parameters_from_df",
-    "load_adsorbent_from_csv"
+    "load_adsorbent_from_csv",
+    "BatchBed",
+    "CycleStep",
+    "CyclicBed",
+    "AdsorbentRegistry",
+    "get_registry",
+    "load_breakthrough_data"
 ]
 
 __version__ = "0.1.1"
+
+
+def __getattr__(name):
+    if name in _LAZY_NAMES:
+        value = getattr(importlib.import_module(f"adsorpsim.{_LAZY_NAMES[name]}"), name)
+        globals()[name] = value  # later accesses skip this function
+        return value
+    raise AttributeError(f"module 'adsorpsim' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
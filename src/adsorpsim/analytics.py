@@ -0,0 +1,97 @@
+import numpy as np
+
+from adsorpsim.core import INLET_CONC_CO2
+
+
+def breakthrough_times(t, outlet_conc, percentages, reference="max"):
+    """
+    Interpolated times at which outlet concentration curves first reach percentages of a reference concentration.
+
+    Parameters:
+        t : time points, shape (T,).
+        outlet_conc : one curve (T,) or a batch of curves (B, T) sampled at t.
+        percentages : one percentage or an array of P percentages.
+        reference : "max" to use the maximum of each curve (as get_percentage_point does),
+            or a concentration (e.g. the inlet one), scalar or one per curve.
+
+    Returns:
+        Array of shape (B, P) (the dimensions of a single curve or a single percentage are dropped)
+        holding the crossing times, linearly interpolated between the time points, NaN where the curve never reaches them.
+    """
+    t = np.asarray(t, dtype=float)
+    curves = np.atleast_2d(np.asarray(outlet_conc, dtype=float))
+    fractions = np.atleast_1d(np.asarray(percentages, dtype=float)) / 100
+    if isinstance(reference, str) and reference == "max":
+        reference = curves.max(axis=1)
+    reference = np.broadcast_to(np.asarray(reference, dtype=float), (len(curves),))
+    targets = reference[:, None] * fractions[None, :]
+
+    # the running maximum is sorted, and its first index above a target is the first crossing of the curve
+    envelope = np.maximum.accumulate(curves, axis=1)
+    indices = np.empty(targets.shape, dtype=int)
+    for row in range(len(curves)):
+        indices[row] = np.searchsorted(envelope[row], targets[row], side='left')
+
+    rows = np.arange(len(curves))[:, None]
+    after = np.minimum(indices, len(t) - 1)
+    before = np.maximum(after - 1, 0)
+    C_before = curves[rows, before]
+    C_after = curves[rows, after]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(C_after > C_before, (targets - C_before) / (C_after - C_before), 1.0)
+    times = t[before] + np.clip(weight, 0, 1) * (t[after] - t[before])
+    times = np.where(indices == 0, t[0], times)
+    times = np.where(indices >= len(t), np.nan, times)
+    return _squeeze(times, np.ndim(outlet_conc) == 1, np.ndim(percentages) == 0)
+
+
+def cumulative_uptake(t, outlet_conc, flow_rate, inlet_conc=INLET_CONC_CO2):
+    """
+    Cumulative quantity adsorbed (in mol) from t[0] to every time point, integrated with the trapezoidal rule.
+
+    The adsorption rate is flow_rate * (inlet_conc - outlet_conc), counted only while the outlet concentration
+    is below the inlet one (as get_adsorbed_quantity_CO2 does).
+    outlet_conc is one curve (T,) or a batch (B, T); flow_rate and inlet_conc are scalars or one value per curve.
+    Returns an array with the shape of outlet_conc.
+    """
+    t = np.asarray(t, dtype=float)
+    curves = np.atleast_2d(np.asarray(outlet_conc, dtype=float))
+    flow_rate = np.broadcast_to(np.asarray(flow_rate, dtype=float), (len(curves),))[:, None]
+    inlet_conc = np.broadcast_to(np.asarray(inlet_conc, dtype=float), (len(curves),))[:, None]
+
+    rate = flow_rate * np.maximum(inlet_conc - curves, 0)
+    uptake = np.zeros_like(curves)
+    np.cumsum(0.5 * (rate[:, 1:] + rate[:, :-1]) * np.diff(t), axis=1, out=uptake[:, 1:])
+    return uptake[0] if np.ndim(outlet_conc) == 1 else uptake
+
+
+def adsorbed_quantity(t, outlet_conc, flow_rate, until, inlet_conc=INLET_CONC_CO2):
+    """
+    Quantity adsorbed (in mol) from t[0] up to the times until, e.g. the breakthrough times returned by breakthrough_times.
+
+    outlet_conc is one curve (T,) or a batch (B, T), and until a time, an array of P times, or a (B, P) array.
+    The cumulative uptake is linearly interpolated at these times; NaN times give NaN quantities.
+    Returns an array of shape (B, P) (the dimensions of a single curve or a single time are dropped).
+    """
+    t = np.asarray(t, dtype=float)
+    uptake = np.atleast_2d(cumulative_uptake(t, outlet_conc, flow_rate, inlet_conc))
+    times = np.atleast_1d(np.asarray(until, dtype=float))
+    if times.ndim == 1:
+        times = np.broadcast_to(times, (len(uptake), len(times)))
+
+    # all the curves share the time axis, so one searchsorted call locates every time
+    after = np.clip(np.searchsorted(t, times, side='left'), 1, len(t) - 1)
+    before = after - 1
+    rows = np.arange(len(uptake))[:, None]
+    weight = np.clip((times - t[before]) / (t[after] - t[before]), 0, 1)
+    quantities = uptake[rows, before] + weight * (uptake[rows, after] - uptake[rows, before])
+    quantities = np.where(np.isnan(times), np.nan, quantities)
+    return _squeeze(quantities, np.ndim(outlet_conc) == 1, np.ndim(until) == 0)
+
+
+def _squeeze(values, single_curve, single_column):
+    if single_column:
+        values = values[:, 0]
+    if single_curve:
+        values = values[0]
+    return values
@@ -0,0 +1,72 @@
+import copy
+import threading
+
+import numpy as np
+
+
+class FitCancelled(Exception):
+    "Raised in the thread of a cancelled BackgroundFit to stop its fit"
+
+
+class BackgroundFit:
+    """
+    fit_adsorption_parameters_from_df run in a daemon thread, so that e.g. the app keeps simulating and responding
+    while an experimental breakthrough is fitted.
+
+    The progress of the fit is reported by evaluations, the number of evaluations of its loss (one simulation each),
+    and best_loss, the lowest loss so far; progress is the fraction of the MAX_EVALUATIONS evaluations Nelder-Mead
+    allows, which it often stops short of. cancel stops the fit at the next evaluation.
+    Once done, adsorbent holds the fitted adsorbent, or error the exception raised by the fit.
+    No figure is built in the thread, matplotlib not being thread-safe: the fitted curve is that of
+    bed.with_adsorbent(adsorbent).
+    """
+    # the Nelder-Mead search of the fit evaluates its loss at most 200 times per parameter by default
+    MAX_EVALUATIONS = 600
+
+    def __init__(self, df, bed_template, assumed_density=None, initial_guess=None):
+        # the fit sets the adsorbent of its template, so that it works on a copy
+        self.bed = copy.copy(bed_template)
+        self.evaluations = 0
+        self.best_loss = np.inf
+        self.adsorbent = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(df, assumed_density, initial_guess), daemon=True)
+        self._thread.start()
+
+    def _run(self, df, assumed_density, initial_guess):
+        from adsorpsim.fitting import fit_adsorption_parameters_from_df
+
+        try:
+            self.adsorbent, _ = fit_adsorption_parameters_from_df(df, self.bed, assumed_density, initial_guess,
+                                                                  plot=False, callback=self._report)
+        except Exception as error:
+            self.error = error
+
+    def _report(self, evaluations, best_loss):
+        if self._cancel.is_set():
+            raise FitCancelled("The fit was cancelled.")
+        self.evaluations, self.best_loss = evaluations, best_loss
+
+    @property
+    def done(self):
+        "Whether the fit finished, failed or was cancelled"
+        return not self._thread.is_alive()
+
+    @property
+    def cancelled(self):
+        return isinstance(self.error, FitCancelled)
+
+    @property
+    def progress(self):
+        "Fraction of the maximum number of evaluations done, 1 once the fit is done"
+        return 1.0 if self.done else min(self.evaluations / self.MAX_EVALUATIONS, 1.0)
+
+    def cancel(self):
+        "Asks the fit to stop at its next evaluation"
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        "Waits for the fit to be done (at most timeout seconds) and returns whether it is"
+        self._thread.join(timeout)
+        return self.done
@@ -0,0 +1,139 @@
+import numpy as np
+
+from adsorpsim.core import INLET_CONC_CO2, MAX_CONC_H2O
+from adsorpsim.integrate import integrate
+from adsorpsim.kernel import BACKENDS, SCHEMES, kernel_class
+
+
+class BatchBed:
+    """
+    Represents M packed beds simulated together as one block-diagonal ODE system.
+
+    Every bed and adsorbent parameter is stored as an array of shape (M,) (scalars are broadcast),
+    the beds sharing the number of segments and the simulated time.
+    The right-hand side of all the beds is evaluated at once and the Jacobian is block-sparse.
+    The beds share the spatial scheme (see Bed) and only hold CO₂ and H₂O, with independent isotherms.
+    """
+    def __init__(self, length, diameter, flow_rate, num_segments: int, total_time: int, q_max_CO2, K_CO2, k_ads_CO2, density, q_max_H2O=0, K_H2O=0, k_ads_H2O=0, humidity_percentage=0, backend: str ="numpy", scheme: str ="upwind"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}.")
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown scheme '{scheme}', expected one of {SCHEMES}.")
+        (self.length, self.diameter, self.flow_rate, self.q_max_CO2, self.K_CO2, self.k_ads_CO2, self.density,
+         self.q_max_H2O, self.K_H2O, self.k_ads_H2O, self.humidity_percentage) = [
+            np.array(value, dtype=float) for value in np.broadcast_arrays(
+                np.atleast_1d(length), diameter, flow_rate, q_max_CO2, K_CO2, k_ads_CO2, density,
+                q_max_H2O, K_H2O, k_ads_H2O, humidity_percentage)
+        ]
+        self.num_beds = len(self.length)
+        self.num_segments = num_segments
+        self.total_time = total_time
+        self.backend = backend
+        self.scheme = scheme
+
+        self.area = np.pi * (self.diameter / 2) ** 2
+        self.velocity = self.flow_rate / self.area
+        self.dz = self.length / self.num_segments
+
+        self.initial_conc_CO2 = np.full(self.num_beds, INLET_CONC_CO2)
+        self.initial_conc_H2O = (self.humidity_percentage / 100) * MAX_CONC_H2O
+        # the water blocks are only added when at least one of the beds is humid
+        self.humid = bool(np.any(self.initial_conc_H2O != 0))
+
+    @classmethod
+    def from_beds(cls, beds, backend: str ="numpy"):
+        "Stack a list of Bed objects sharing the same number of segments, total time and scheme"
+        if len(beds) == 0:
+            raise ValueError("At least one bed is needed.")
+        if len({(bed.num_segments, bed.total_time, bed.scheme) for bed in beds}) != 1:
+            raise ValueError("All the beds must have the same number of segments, total time and scheme.")
+        if any(bed.adsorbent.competitive or len(bed.species()) > 1 + (bed.initial_conc_H2O != 0) for bed in beds):
+            raise ValueError("Only beds of independent CO2 and H2O can be stacked.")
+        return cls(
+            length=[bed.length for bed in beds],
+            diameter=[bed.diameter for bed in beds],
+            flow_rate=[bed.flow_rate for bed in beds],
+            num_segments=beds[0].num_segments,
+            total_time=beds[0].total_time,
+            q_max_CO2=[bed.adsorbent.q_max_CO2 for bed in beds],
+            K_CO2=[bed.adsorbent.K_CO2 for bed in beds],
+            k_ads_CO2=[bed.adsorbent.k_ads_CO2 for bed in beds],
+            density=[bed.adsorbent.density for bed in beds],
+            q_max_H2O=[bed.adsorbent.q_max_H2O for bed in beds],
+            K_H2O=[bed.adsorbent.K_H2O for bed in beds],
+            k_ads_H2O=[bed.adsorbent.k_ads_H2O for bed in beds],
+            humidity_percentage=[bed.humidity_percentage for bed in beds],
+            backend=backend,
+            scheme=beds[0].scheme
+        )
+
+    def _kernel(self):
+        """
+        Kernel of the stacked system, one block of segments per (species, bed),
+        the CO₂ blocks of all the beds coming before their H₂O blocks
+        """
+        C_in = [self.initial_conc_CO2]
+        q_max = [self.q_max_CO2]
+        K = [self.K_CO2]
+        k_ads = [self.k_ads_CO2]
+        if self.humid:
+            C_in.append(self.initial_conc_H2O)
+            q_max.append(self.q_max_H2O)
+            K.append(self.K_H2O)
+            k_ads.append(self.k_ads_H2O)
+        num_species = len(C_in)
+        return kernel_class(self.backend, self.scheme)(
+            self.num_segments,
+            np.tile(self.velocity, num_species),
+            np.tile(self.dz, num_species),
+            np.concatenate(C_in),
+            np.concatenate(q_max),
+            np.concatenate(K),
+            np.concatenate(k_ads),
+            np.tile(self.density, num_species),
+            **({} if self.scheme == "upwind" else {"scheme": self.scheme})
+        )
+
+    def _initial_conditions(self):
+        num_species = 2 if self.humid else 1
+        C = np.zeros((num_species * self.num_beds, self.num_segments))
+        C[:self.num_beds, 0] = self.initial_conc_CO2
+        if self.humid:
+            C[self.num_beds:, 0] = self.initial_conc_H2O
+        return np.concatenate([C.ravel(), np.zeros(C.size)])
+
+    def simulate(self):
+        """
+        Simulates all the beds in one solve.
+
+        Returns the time axis (T,) and the outlet CO₂ and H₂O concentrations as (M, T) arrays,
+        the H₂O one being None when none of the beds is humid.
+        """
+        t_span = (0, self.total_time)
+        t_eval = np.linspace(*t_span, self.total_time)
+
+        # only the outlet concentrations of every bed are recorded
+        n, M = self.num_segments, self.num_beds
+        outlet_rows = np.arange(1, M + 1) * n - 1
+        record = np.concatenate([outlet_rows, M * n + outlet_rows]) if self.humid else outlet_rows
+
+        kernel = self._kernel()
+        trajectory = integrate(
+            kernel.rhs,
+            t_span[0],
+            self._initial_conditions(),
+            t_span[1],
+            t_eval,
+            record,
+            method='BDF',
+            jac=kernel.jacobian,
+            rtol=1e-6,
+            atol=1e-9
+        )
+
+        outlet_CO2 = trajectory.recorded[:M]
+        if self.humid:
+            outlet_H2O = trajectory.recorded[M:]
+            return trajectory.t, outlet_CO2, outlet_H2O
+        else:
+            return trajectory.t, outlet_CO2, None
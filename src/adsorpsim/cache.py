@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+# bump when the model or the stored format changes, so that older entries are not reused
+CACHE_VERSION = 1
+
+BED_FIELDS = ("length", "diameter", "flow_rate", "num_segments", "total_time", "humidity_percentage", "backend", "scheme",
+              "inlet_concentrations")
+ADSORBENT_FIELDS = ("q_max_CO2", "K_CO2", "k_ads_CO2", "density", "q_max_H2O", "K_H2O", "k_ads_H2O", "other_species",
+                    "competitive")
+
+
+def _canonical(value):
+    "JSON-serialisable representation of a parameter that does not depend on its numeric type"
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value).hex()
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    return repr(value)
+
+
+def save_arrays(file, arrays: dict):
+    "Saves a dict of arrays, None entries included, to a compressed .npz file"
+    stored = {name: array for name, array in arrays.items() if array is not None}
+    stored["__none__"] = np.array([name for name, array in arrays.items() if array is None], dtype=str)
+    np.savez_compressed(file, **stored)
+
+
+def load_arrays(file):
+    "Loads a dict of arrays saved by save_arrays"
+    with np.load(file, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files if name != "__none__"}
+        arrays.update(dict.fromkeys(data["__none__"].tolist()))
+    return arrays
+
+
+def simulation_key(bed, **solver_settings):
+    """
+    Stable hash of everything that determines the result of Bed.simulate:
+    the fields of the bed and of its adsorbent (but not its name) and the solver settings.
+    """
+    fields = {
+        "version": CACHE_VERSION,
+        "bed": {name: _canonical(getattr(bed, name)) for name in BED_FIELDS},
+        "adsorbent": {name: _canonical(getattr(bed.adsorbent, name)) for name in ADSORBENT_FIELDS},
+        "solver": {name: _canonical(value) for name, value in solver_settings.items()},
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+class SimulationCache:
+    """
+    Content-addressed cache of simulation results.
+
+    Results are kept in a bounded in-memory LRU, and optionally in a directory of .npz files
+    whose total size is bounded by max_disk_bytes, the least recently used files being evicted first.
+    The hit and miss counters are available through stats().
+    """
+    def __init__(self, max_entries: int =64, directory=None, max_disk_bytes: int =500 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self.enabled = True
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self):
+        return len(self._memory)
+
+    def _path(self, key):
+        return self.directory / f"{key}.npz"
+
+    def get(self, key):
+        "Returns the dict of arrays (or None entries) stored under key, or None on a miss"
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                value = load_arrays(path)
+                os.utime(path)  # the modification time is used as the last access time for the eviction
+            except (OSError, KeyError, ValueError):
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._store_in_memory(key, value)
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        "Stores a dict of arrays (or None entries) under key"
+        value = {name: None if array is None else np.array(array) for name, array in value.items()}
+        for array in value.values():
+            if array is not None:
+                array.setflags(write=False)
+        self._store_in_memory(key, value)
+        if self.directory is not None:
+            self._store_on_disk(key, value)
+
+    def _store_in_memory(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _store_on_disk(self, key, value):
+        # written to a temporary file first so that a concurrent reader never sees a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                save_arrays(f, value)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda item: item[0]):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self, disk: bool =False):
+        "Empties the in-memory tier (and the on-disk tier if disk is True) and resets the counters"
+        with self._lock:
+            self._memory.clear()
+            self.memory_hits = self.disk_hits = self.misses = 0
+        if disk and self.directory is not None:
+            for path in self.directory.glob("*.npz"):
+                path.unlink(missing_ok=True)
+
+    def stats(self):
+        "Hit and miss counters of the cache"
+        hits = self.memory_hits + self.disk_hits
+        requests = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / requests if requests else 0.0,
+            "entries": len(self._memory),
+        }
+
+
+# cache used by Bed.simulate, it can be replaced (e.g. by one with an on-disk tier) or disabled with enabled = False
+default_cache = SimulationCache()
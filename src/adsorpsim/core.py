@@ -1,17 +1,35 @@
+import copy
+import importlib
+
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import solve_ivp
-from scipy.optimize import minimize
 from pathlib import Path
-import pandas as pd
 import os
+import time
 import warnings
 
+from adsorpsim import cache, library, mesh, similarity
+from adsorpsim.cache import load_arrays, save_arrays, simulation_key
+from adsorpsim.integrate import SOLVERS, integrate
+from adsorpsim.kernel import BACKENDS, SCHEMES, kernel_class
+
+INLET_CONC_CO2 = 0.01624  # mol/m³
+MAX_CONC_H2O = 0.0173  # mol/m³ at 25°C
+
+# thresholds of Bed.auto_method: the largest number of explicit steps worth taking instead of an implicit solve,
+# and the largest state for which LSODA, which factorises dense Jacobians, beats the sparse BDF solver
+EXPLICIT_STEPS = 1000
+DENSE_STATE_SIZE = 256
+
 class Adsorbent_Langmuir:
     """
     Represents an adsorbent following Langmuir kinetics.
+
+    Besides CO₂ and H₂O, other_species gives the (q_max, K, k_ads) parameters of any further species by name,
+    e.g. {"N2": (0.1, 1e-4, 2.0)}, which are simulated when a Bed feeds them (see Bed.inlet_concentrations).
+    With competitive=True the species share the adsorption sites (extended Langmuir isotherm),
+    q_eq_i = q_max_i K_i C_i / (1 + Σ_j K_j C_j), instead of adsorbing independently.
     """
-    def __init__(self, name: str , q_max_CO2 : float, K_CO2: float, k_ads_CO2: float, density: float, q_max_H2O: float=0, K_H2O: float =0, k_ads_H2O: float =0):
+    def __init__(self, name: str , q_max_CO2 : float, K_CO2: float, k_ads_CO2: float, density: float, q_max_H2O: float=0, K_H2O: float =0, k_ads_H2O: float =0, other_species: dict =None, competitive: bool =False):
         self.name = name
         self.q_max_CO2 = q_max_CO2
         self.K_CO2 = K_CO2
@@ -20,16 +38,37 @@ class Adsorbent_Langmuir:
         self.q_max_H2O = q_max_H2O
         self.K_H2O = K_H2O
         self.k_ads_H2O = k_ads_H2O
+        self.other_species = {name: tuple(parameters) for name, parameters in (other_species or {}).items()}
+        self.competitive = competitive
 
     def __repr__(self):
+        extra = "".join(f", {name}={parameters}" for name, parameters in self.other_species.items())
+        if self.competitive:
+            extra += ", competitive"
         return (f"{self.name} (q_max_CO2={self.q_max_CO2}, K_CO2={self.K_CO2}, k_ads_CO2={self.k_ads_CO2}, "
-                f"density={self.density}, q_max_H2O={self.q_max_H2O}, K_H2O={self.K_H2O}, k_ads_H2O={self.k_ads_H2O})")
+                f"density={self.density}, q_max_H2O={self.q_max_H2O}, K_H2O={self.K_H2O}, k_ads_H2O={self.k_ads_H2O}{extra})")
+
+    def isotherm_parameters(self):
+        "Dict of the (q_max, K, k_ads) parameters of every species, CO₂ and H₂O first"
+        return {"CO2": (self.q_max_CO2, self.K_CO2, self.k_ads_CO2), "H2O": (self.q_max_H2O, self.K_H2O, self.k_ads_H2O),
+                **self.other_species}
 
 class Bed:
     """
     Represents a packed bed reactor with discretized segments.
+
+    The right-hand side and Jacobian of the model are evaluated either with NumPy (backend="numpy")
+    or with numba-compiled loops (backend="numba"), which falls back to NumPy when numba is not installed.
+
+    The advection term is discretised with the first-order upwind scheme (scheme="upwind"), or with the less diffusive
+    second-order TVD schemes "minmod" and "van_leer" or the third-order "weno3" (see kernel.HighOrderBreakthroughKernel),
+    which reach the same accuracy with far fewer segments.
+
+    The feed holds CO₂, H₂O when humidity_percentage is not 0, and the other species of the adsorbent given
+    in inlet_concentrations (mol/m³), e.g. {"N2": 30.0}. The species fed to the bed (see species) are simulated at once,
+    the state being laid out as the (2, species, segments) array [C, q] flattened.
     """
-    def __init__(self, length: float, diameter: float, flow_rate: float, num_segments: int, total_time: int, adsorbent : Adsorbent_Langmuir, humidity_percentage: float =0):
+    def __init__(self, length: float, diameter: float, flow_rate: float, num_segments: int, total_time: int, adsorbent : Adsorbent_Langmuir, humidity_percentage: float =0, backend: str ="numpy", scheme: str ="upwind", inlet_concentrations: dict =None):
         self.length = length
         self.diameter = diameter
         self.flow_rate = flow_rate
@@ -37,118 +76,425 @@ class Bed:
         self.total_time = total_time
         self.adsorbent = adsorbent
         self.humidity_percentage = humidity_percentage  # % humidity (0–100)
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}.")
+        self.backend = backend
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown scheme '{scheme}', expected one of {SCHEMES}.")
+        self.scheme = scheme
+        self.inlet_concentrations = dict(inlet_concentrations or {})
+        # the adsorbent may be set later, e.g. by the fitting functions
+        if adsorbent is not None:
+            if adsorbent.competitive and scheme != "upwind":
+                raise ValueError("The competitive isotherm is only available with the upwind scheme.")
+            unknown = set(self.inlet_concentrations) - set(adsorbent.other_species)
+            if unknown:
+                raise ValueError(f"The adsorbent has no parameters for the species {sorted(unknown)}.")
 
         self.area = np.pi * (self.diameter / 2) ** 2
         self.velocity = self.flow_rate / self.area
         self.dz = self.length / self.num_segments
 
-        self.initial_conc_CO2 = 0.01624  # mol/m³
+        self.initial_conc_CO2 = INLET_CONC_CO2
 
         # Convert relative humidity (%) to water vapor concentration (mol/m³)
-        max_H2O_conc = 0.0173  # mol/m³ at 25°C
-        self.initial_conc_H2O = (humidity_percentage / 100) * max_H2O_conc
+        self.initial_conc_H2O = (humidity_percentage / 100) * MAX_CONC_H2O
+
+    def species(self):
+        """
+        (name, inlet concentration, q_max, K, k_ads) of every species fed to the bed, in the order of the state:
+        CO₂, H₂O if the feed is humid, then the species of inlet_concentrations with a non-zero concentration.
+        """
+        inlet = {"CO2": self.initial_conc_CO2, "H2O": self.initial_conc_H2O, **self.inlet_concentrations}
+        parameters = self.adsorbent.isotherm_parameters()
+        return [(name, C_in, *parameters[name]) for name, C_in in inlet.items() if name == "CO2" or C_in != 0]
+
+    def with_adsorbent(self, adsorbent):
+        "Copy of the bed with another adsorbent, of the same class (e.g. a ReducedBed keeps its reduced model)"
+        bed = copy.copy(self)
+        bed.adsorbent = adsorbent
+        # the copy builds its own kernel, whose buffers are not shared
+        bed.__dict__.pop("_kernel_cache", None)
+        bed.__dict__.pop("_kernel_key", None)
+        return bed
 
     def _initial_conditions(self):
-        C_CO2 = np.zeros(self.num_segments)
-        C_CO2[0] = self.initial_conc_CO2
-        q_CO2 = np.zeros(self.num_segments)
-
-        if self.initial_conc_H2O != 0:
-            C_H2O = np.zeros(self.num_segments)
-            C_H2O[0] = self.initial_conc_H2O
-            q_H2O = np.zeros(self.num_segments)
-            return np.concatenate([C_CO2, C_H2O, q_CO2, q_H2O])
-        else:
-            return np.concatenate([C_CO2, q_CO2])
+        # [C, q] of every species and segment, the inlet segments starting at the inlet concentrations
+        y = np.zeros((2, len(self.species()), self.num_segments))
+        y[0, :, 0] = [C_in for _, C_in, _, _, _ in self.species()]
+        return y.ravel()
+
+    def _kernel(self):
+        """
+        Returns the preallocated RHS/Jacobian kernel of the bed.
+
+        The kernel is built once and reused as long as the parameters of the bed and of its adsorbent are unchanged.
+        """
+        ads = self.adsorbent
+        key = (self.backend, self.scheme, self.num_segments, self.velocity, self.dz, tuple(self.species()), ads.density,
+               ads.competitive)
+        if getattr(self, "_kernel_key", None) != key:
+            self._kernel_cache = kernel_class(self.backend, self.scheme, ads.competitive).from_bed(self)
+            self._kernel_key = key
+        return self._kernel_cache
 
     def _ode_system(self, t, y):
-        if self.initial_conc_H2O != 0:
-            C_CO2 = y[0:self.num_segments]
-            C_H2O = y[self.num_segments:2*self.num_segments]
-            q_CO2 = y[2*self.num_segments:3*self.num_segments]
-            q_H2O = y[3*self.num_segments:]
-        else:
-            C_CO2 = y[0:self.num_segments]
-            q_CO2 = y[self.num_segments:]
-
-        dC_CO2_dt = np.zeros_like(C_CO2)
-        C_in_CO2 = self.initial_conc_CO2
-        C_up_CO2 = np.concatenate([[C_in_CO2], C_CO2[:-1]])
-        dC_CO2_dz = (C_CO2 - C_up_CO2) / self.dz
-
-        K_CO2 = self.adsorbent.K_CO2
-        q_eq_CO2 = (self.adsorbent.q_max_CO2 * K_CO2 * C_CO2) / (1 + K_CO2 * C_CO2)
-        dq_CO2_dt = self.adsorbent.k_ads_CO2 * (q_eq_CO2 - q_CO2)
-        dC_CO2_dt = -self.velocity * dC_CO2_dz - self.adsorbent.density * dq_CO2_dt
-
-        if self.initial_conc_H2O != 0:
-            dC_H2O_dt = np.zeros_like(C_H2O)
-            C_in_H2O = self.initial_conc_H2O
-            C_up_H2O = np.concatenate([[C_in_H2O], C_H2O[:-1]])
-            dC_H2O_dz = (C_H2O - C_up_H2O) / self.dz
-
-            K_H2O = self.adsorbent.K_H2O
-            q_eq_H2O = (self.adsorbent.q_max_H2O * K_H2O * C_H2O) / (1 + K_H2O * C_H2O)
-            dq_H2O_dt = self.adsorbent.k_ads_H2O * (q_eq_H2O - q_H2O)
-            dC_H2O_dt = -self.velocity * dC_H2O_dz - self.adsorbent.density * dq_H2O_dt
-
-            return np.concatenate([dC_CO2_dt, dC_H2O_dt, dq_CO2_dt, dq_H2O_dt])
-        else:
-            return np.concatenate([dC_CO2_dt, dq_CO2_dt])
-
-    def simulate(self):
-        t_span = (0, self.total_time)
-        t_eval = np.linspace(*t_span, self.total_time)
-
-        sol = solve_ivp(
-            self._ode_system,
-            t_span,
-            self._initial_conditions(),
-            t_eval=t_eval,
-            method='BDF',
-            rtol=1e-6,
-            atol=1e-9
+        """
+        Right-hand side of the ODE system, the state being laid out as [C_CO2, (C_H2O, ...), q_CO2, (q_H2O, ...)]
+        (see species).
+        """
+        return self._kernel().rhs(t, y).copy()
+
+    def _jacobian(self, t, y):
+        """
+        Analytic Jacobian of the ODE system, returned as a sparse block-banded matrix.
+
+        For every species the concentration block holds the upwind advection stencil (diagonal and first sub-diagonal)
+        plus the Langmuir uptake term, and the C–q coupling blocks are diagonal. With a competitive adsorbent,
+        the C–C and q–C blocks of two species are also diagonal (they compete within every segment).
+        The block layout follows the state vector: [C_CO2, (C_H2O, ...), q_CO2, (q_H2O, ...)].
+        """
+        return self._kernel().jacobian(t, y).copy()
+
+    def stiffness(self):
+        """
+        Estimates of the stiffness of the model: the largest decay rate of the Jacobian (1/s, a Gershgorin bound at
+        a clean bed, summing the advection rate 2 v/dz and the uptake rate k_ads (1 + ρ q_max K) of the gas) and the ratio
+        of the residence time L/v to the kinetic time scale 1 / (k_ads (1 + ρ q_max K)) of the slowest species.
+        """
+        density = self.adsorbent.density
+        uptake_rates = [k_ads * (1 + density * q_max * K) for _, _, q_max, K, k_ads in self.species()]
+        return 2 * self.velocity / self.dz + max(uptake_rates), min(uptake_rates) * self.length / self.velocity
+
+    def auto_method(self):
+        """
+        Solver picked by method="auto" from the stiffness estimate (see stiffness):
+        the explicit RK45 when fewer than EXPLICIT_STEPS of its steps, bounded by its stability limit of about 3 / rate,
+        cover total_time, i.e. when the run is shorter than the advection and kinetic time scales;
+        otherwise LSODA for states of at most DENSE_STATE_SIZE values, and BDF with its sparse Jacobian for larger ones.
+        As the advection alone makes the rate v/dz, long breakthrough runs are stiff even with slow kinetics.
+        """
+        rate, _ = self.stiffness()
+        if rate * self.total_time / 3 <= EXPLICIT_STEPS:
+            return 'RK45'
+        return 'LSODA' if len(self._initial_conditions()) <= DENSE_STATE_SIZE else 'BDF'
+
+    def simulate(self, use_cache: bool =True, stop_at_breakthrough: float =None, probes=None, profile_every: int =None, mode: str ="full", method: str ='BDF', rtol: float =1e-6, atol: float =1e-9):
+        """
+        Simulates the breakthrough of the bed and returns a SimulationResult,
+        which unpacks as the time, the outlet CO₂ and the outlet H₂O (None if dry) arrays.
+
+        Only the outlet concentrations are recorded during the integration, so the memory used grows with the
+        number of time points but not with the number of segments. Optionally, probes (a list of axial positions in m)
+        records the gas concentrations in the segments at these positions, and profile_every records the full state of
+        the bed every profile_every time points.
+
+        If stop_at_breakthrough is given (a percentage of the inlet CO₂ concentration), the integration stops
+        as soon as the outlet CO₂ concentration reaches it: the returned arrays then end with the exact
+        (interpolated) breakthrough point, t[-1] being the breakthrough time.
+        The whole total_time is simulated if the breakthrough is not reached.
+
+        Results are looked up in and stored to adsorpsim.cache.default_cache,
+        keyed by all the bed and adsorbent parameters and the solver settings, unless use_cache is False.
+        On a miss, the outlet curves alone (without probes, profiles or stop_at_breakthrough) are computed through
+        the dimensionless model of adsorpsim.similarity, whose solutions are shared by all the beds with the same
+        dimensionless groups (see similarity.simulate_similar), e.g. geometrically scaled beds.
+
+        With mode="preview", no ODE is solved: the outlet curves are interpolated from the precomputed library of
+        adsorpsim.library in microseconds, and the error_estimate of the result holds the estimated maximum absolute
+        error of every curve (mol/m³, infinite outside the range of the library).
+        The other options are not available in this mode.
+
+        With mode="adaptive", the num_segments cells follow the concentration fronts instead of being uniform
+        (see adsorpsim.mesh.simulate_adaptive), which matches a much finer uniform grid with the upwind scheme.
+        Only the outlet curves are computed in this mode, and the result is not a checkpoint for extend.
+
+        method is one of the solvers of adsorpsim.integrate (BDF, Radau, LSODA, RK45, RK23, DOP853) or "auto"
+        to pick one from the stiffness of the bed (see auto_method); rtol and atol are its tolerances, which may be
+        loosened for quick looks. The result holds the method used and the statistics of the solver (nfev, njev, nlu)
+        and the wall_time (s) spent computing it, by the call that computed it for a cached result.
+        """
+        if mode not in ("full", "preview", "adaptive"):
+            raise ValueError(f"Unknown mode '{mode}', expected 'full', 'preview' or 'adaptive'.")
+        if mode != "full" and (stop_at_breakthrough is not None or probes is not None or profile_every is not None):
+            raise ValueError(f"The {mode} mode only computes the outlet curves.")
+        if method != "auto" and method not in SOLVERS:
+            raise ValueError(f"Unknown method '{method}', expected 'auto' or one of {SOLVERS}.")
+        if mode == "preview":
+            start = time.perf_counter()
+            result = library.preview(self)
+            result.wall_time = time.perf_counter() - start
+            return result
+        if method == "auto":
+            method = self.auto_method()
+        if stop_at_breakthrough is not None and not 0 < stop_at_breakthrough <= 100:
+            raise ValueError("The variable 'stop_at_breakthrough' must be a percentage in ]0, 100].")
+        if profile_every is not None and profile_every < 1:
+            raise ValueError("The variable 'profile_every' must be at least 1.")
+        probes = None if probes is None else [float(z) for z in probes]
+        if probes is not None and any(not 0 <= z <= self.length for z in probes):
+            raise ValueError("The probe positions must lie within the bed length.")
+        solver_settings = dict(method=method, rtol=rtol, atol=atol, stop_at_breakthrough=stop_at_breakthrough,
+                               probes=probes, profile_every=profile_every)
+        if mode == "adaptive":
+            solver_settings["mode"] = mode
+        results_cache = cache.default_cache
+        start = time.perf_counter()
+        if not (use_cache and results_cache.enabled):
+            if mode == "adaptive":
+                result = mesh.simulate_adaptive(self, method=method, rtol=rtol, atol=atol)
+            else:
+                result = self._solve(**solver_settings)
+            result.wall_time = time.perf_counter() - start
+            return result
+
+        key = simulation_key(self, **solver_settings)
+        cached = results_cache.get(key)
+        if cached is None:
+            if mode == "adaptive":
+                result = mesh.simulate_adaptive(self, method=method, rtol=rtol, atol=atol)
+            elif stop_at_breakthrough is None and probes is None and profile_every is None:
+                result = similarity.simulate_similar(self, method, rtol, atol, similarity.default_similarity_cache)
+            else:
+                result = self._solve(**solver_settings)
+            result.wall_time = time.perf_counter() - start
+            # the cache stores copies of the arrays
+            results_cache.put(key, result.to_arrays())
+            return result
+        # copies are returned so that the caller cannot modify the cached arrays
+        return SimulationResult.from_arrays({name: None if array is None else array.copy() for name, array in cached.items()})
+
+    def _breakthrough_event(self, percentage):
+        "Terminal event triggered when the outlet CO₂ concentration rises above the percentage of the inlet one"
+        outlet_index = self.num_segments - 1
+        target = percentage / 100 * self.initial_conc_CO2
+
+        def event(t, y):
+            return y[outlet_index] - target
+        event.terminal = True
+        event.direction = 1
+        return event
+
+    def extend(self, result, new_total_time):
+        """
+        Continues a simulation of this bed from the final state of result (a checkpoint) up to new_total_time.
+
+        Only the time points of np.linspace(0, new_total_time, new_total_time) after the end of result are computed,
+        with the solver settings, probes and profile recording of result, and a new SimulationResult holding
+        the concatenated histories is returned. The total_time of the bed is left unchanged.
+        A result interpolated from a similar bed (see adsorpsim.similarity) holds no final state: it is then first
+        computed by solving this bed up to the end of result.
+        """
+        if result.mesh_edges is not None:
+            raise ValueError("The result was computed on an adaptive grid, simulate with mode='full'.")
+        if result.t_final is None:
+            raise ValueError("The result is not a checkpoint (e.g. a preview), simulate with mode='full'.")
+        if new_total_time <= result.t_final:
+            raise ValueError(f"The variable 'new_total_time' must be greater than the end of the checkpoint ({result.t_final}).")
+        y_final = result.y_final
+        if y_final is None:
+            y_final = self._solve(method=result.method, rtol=result.rtol, atol=result.atol, t_bound=result.t_final,
+                                  t_eval=np.array([result.t_final])).y_final
+        if len(y_final) != len(self._initial_conditions()):
+            raise ValueError("The checkpoint does not match the number of segments and species of the bed.")
+        t_eval = np.linspace(0, new_total_time, int(new_total_time))
+        start = time.perf_counter()
+        continuation = self._solve(
+            method=result.method,
+            rtol=result.rtol,
+            atol=result.atol,
+            probes=None if result.probe_positions is None else list(result.probe_positions),
+            profile_every=result.profile_every,
+            t0=result.t_final,
+            y0=y_final,
+            t_bound=new_total_time,
+            t_eval=t_eval[t_eval > result.t_final]
         )
 
-        C_CO2_sol = sol.y[0:self.num_segments, :]
-        outlet_CO2 = C_CO2_sol[-1, :]
+        def join(before, after, axis=-1):
+            return None if before is None else np.concatenate([before, after], axis=axis)
+
+        extended = SimulationResult(
+            t=join(result.t, continuation.t),
+            outlet_CO2=join(result.outlet_CO2, continuation.outlet_CO2),
+            outlet_H2O=join(result.outlet_H2O, continuation.outlet_H2O),
+            probe_positions=result.probe_positions,
+            probes_CO2=join(result.probes_CO2, continuation.probes_CO2),
+            probes_H2O=join(result.probes_H2O, continuation.probes_H2O),
+            profile_every=result.profile_every,
+            profile_t=join(result.profile_t, continuation.profile_t),
+            profiles=join(result.profiles, continuation.profiles, axis=0),
+            other_species=result.other_species,
+            outlets_other=join(result.outlets_other, continuation.outlets_other),
+            probes_other=join(result.probes_other, continuation.probes_other)
+        )
+        extended._set_solver_info(continuation.t_final, continuation.y_final, continuation.method, continuation.rtol,
+                                  continuation.atol, continuation.status, continuation.message,
+                                  result.nfev + continuation.nfev, result.njev + continuation.njev,
+                                  result.nlu + continuation.nlu)
+        extended.wall_time = (result.wall_time or 0) + time.perf_counter() - start
+        return extended
+
+    def _solve(self, method, rtol, atol, stop_at_breakthrough=None, probes=None, profile_every=None, t0=0, y0=None, t_bound=None, t_eval=None):
+        n = self.num_segments
+        names = [name for name, _, _, _, _ in self.species()]
+        t_span = (t0, self.total_time if t_bound is None else t_bound)
+        if t_eval is None:
+            t_eval = np.linspace(0, self.total_time, self.total_time)
+        event = None if stop_at_breakthrough is None else self._breakthrough_event(stop_at_breakthrough)
+
+        # components recorded at every time point: the outlet concentrations, then the probed segments of every species
+        outlets = [n * (i + 1) - 1 for i in range(len(names))]
+        probe_segments = [] if probes is None else [min(int(z / self.dz), n - 1) for z in probes]
+        record = outlets + [n * i + segment for i in range(len(names)) for segment in probe_segments]
+
+        kernel = self._kernel()
+        trajectory = integrate(
+            kernel.rhs,
+            t_span[0],
+            self._initial_conditions() if y0 is None else y0,
+            t_span[1],
+            t_eval,
+            record,
+            method=method,
+            jac=kernel.jacobian,
+            rtol=rtol,
+            atol=atol,
+            event=event,
+            profile_every=profile_every
+        )
 
-        if self.initial_conc_H2O != 0:
-            C_H2O_sol = sol.y[self.num_segments:2*self.num_segments, :]
-            outlet_H2O = C_H2O_sol[-1, :]
-            return sol.t, outlet_CO2, outlet_H2O
-        else:
-            return sol.t, outlet_CO2, None
+        if trajectory.status == -1:
+            # raised rather than returned, so that a partial result is never cached
+            raise RuntimeError(f"The integration failed at t = {trajectory.t_final} s: {trajectory.message}")
+        t = trajectory.t
+        recorded = trajectory.recorded
+        if trajectory.t_event is not None:
+            # the exact breakthrough point is appended to the time points computed before it
+            t = np.append(t, trajectory.t_event)
+            recorded = np.hstack([recorded, trajectory.y_event[record][:, None]])
+
+        result = SimulationResult.from_outlets(t, names, recorded[:len(names)])
+        if probes is not None:
+            probes_C = dict(zip(names, recorded[len(names):].reshape(len(names), len(probe_segments), -1)))
+            result.probe_positions = np.array(probes)
+            result.probes_CO2 = probes_C["CO2"]
+            result.probes_H2O = probes_C.get("H2O")
+            if result.other_species is not None:
+                result.probes_other = np.array([probes_C[name] for name in result.other_species])
+        if profile_every is not None:
+            result.profile_every, result.profile_t, result.profiles = profile_every, trajectory.profile_t, trajectory.profiles
+        result._set_solver_info(trajectory.t_final, trajectory.y_final, method, rtol, atol, trajectory.status,
+                                trajectory.message, trajectory.nfev, trajectory.njev, trajectory.nlu)
+        return result
+
+
+class SimulationResult:
+    """
+    Result of Bed.simulate.
+
+    It unpacks (and indexes) as the (t, outlet_CO₂, outlet_H₂O) tuple, outlet_H₂O being None for a dry bed.
+    The outlet curves of the other species fed to the bed (see Bed.species) are the rows of outlets_other,
+    in the order of the names other_species, and outlet(name) returns the curve of any species.
+    The optional probes_CO2/probes_H2O arrays hold the concentrations at probe_positions (one row per probe),
+    probes_other those of the other species (one such array each),
+    and profiles holds the full state of the bed (laid out as in Bed._initial_conditions) at the times profile_t.
+
+    The result is also a checkpoint: it holds the final state y_final at t_final and the solver settings and statistics,
+    so that Bed.extend can continue the simulation, and it can be written to and read from disk with save and load
+    (y_final is None for a result interpolated from a similar bed, Bed.extend then computing it).
+    wall_time holds the time (s) spent computing it, if known.
+    The results of Bed.simulate(mode="preview") instead hold the estimated maximum absolute error of the outlet curves
+    in error_estimate (None otherwise), and those of Bed.simulate(mode="adaptive") the edges of the final non-uniform
+    grid, on which y_final is given, in mesh_edges (None otherwise), and those of a reduced-order model the largest
+    value of its error indicator in rom_error (see adsorpsim.rom, None otherwise).
+    """
+    def __init__(self, t, outlet_CO2, outlet_H2O=None, probe_positions=None, probes_CO2=None, probes_H2O=None, profile_every=None, profile_t=None, profiles=None, other_species=None, outlets_other=None, probes_other=None):
+        self.t = t
+        self.outlet_CO2 = outlet_CO2
+        self.outlet_H2O = outlet_H2O
+        self.probe_positions = probe_positions
+        self.probes_CO2 = probes_CO2
+        self.probes_H2O = probes_H2O
+        self.profile_every = profile_every
+        self.profile_t = profile_t
+        self.profiles = profiles
+        self.other_species = None if other_species is None else [str(name) for name in other_species]
+        self.outlets_other = outlets_other
+        self.probes_other = probes_other
+        self.error_estimate = None
+        self.mesh_edges = None
+        self.rom_error = None
+        self.wall_time = None
+        self._set_solver_info(None, None, None, None, None, None, None, 0, 0, 0)
+
+    def _set_solver_info(self, t_final, y_final, method, rtol, atol, status, message, nfev, njev, nlu):
+        self.t_final = t_final
+        self.y_final = y_final
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self.status = status
+        self.message = message
+        self.nfev = nfev
+        self.njev = njev
+        self.nlu = nlu
+
+    @classmethod
+    def from_outlets(cls, t, names, outlets):
+        "Result holding the outlet curves (one row per species) of the species names, ordered like Bed.species"
+        curves = dict(zip(names, outlets))
+        others = [name for name in names if name not in ("CO2", "H2O")]
+        return cls(t, curves["CO2"], curves.get("H2O"), other_species=others or None,
+                   outlets_other=np.array([curves[name] for name in others]) if others else None)
+
+    def outlet(self, name):
+        "Outlet concentration curve of a species (None if it was not fed to the bed)"
+        if name in ("CO2", "H2O"):
+            return getattr(self, f"outlet_{name}")
+        if self.other_species is None or name not in self.other_species:
+            return None
+        return self.outlets_other[self.other_species.index(name)]
+
+    def __iter__(self):
+        return iter((self.t, self.outlet_CO2, self.outlet_H2O))
+
+    def __getitem__(self, index):
+        return (self.t, self.outlet_CO2, self.outlet_H2O)[index]
+
+    def __len__(self):
+        return 3
+
+    def to_arrays(self):
+        "Dict of the arrays and scalars of the result (None for the missing ones)"
+        return dict(vars(self))
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        "Builds a result from the dict returned by to_arrays (the scalars may be 0-d arrays)"
+        values = {name: value.item() if isinstance(value, np.ndarray) and value.ndim == 0 else value
+                  for name, value in arrays.items()}
+        result = cls(**{name: values[name] for name in (
+            "t", "outlet_CO2", "outlet_H2O", "probe_positions", "probes_CO2", "probes_H2O", "profile_every", "profile_t", "profiles")},
+            **{name: values.get(name) for name in ("other_species", "outlets_other", "probes_other")})
+        result._set_solver_info(*(values[name] for name in (
+            "t_final", "y_final", "method", "rtol", "atol", "status", "message", "nfev", "njev", "nlu")))
+        result.error_estimate = values.get("error_estimate")
+        result.mesh_edges = values.get("mesh_edges")
+        result.rom_error = values.get("rom_error")
+        result.wall_time = values.get("wall_time")
+        return result
+
+    def save(self, path):
+        "Writes the result to a compressed .npz file"
+        save_arrays(path, self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        "Reads a result written by save"
+        return cls.from_arrays(load_arrays(path))
         
 
-#the data were not cached as it does not allow the apparition of new asorbent inputted from the app 
-def download_data(csv_file):
-    "Download the adsorbent database"
-    df = pd.read_csv(csv_file, sep= ";")
-    return df
-
-def load_adsorbent_from_csv(csv_path, adsorbent_name):
-    df = pd.read_csv(csv_path, sep=';')
-    row = df[df['name'] == adsorbent_name]
-
-    if row.empty:
-        raise ValueError(f"Adsorbent '{adsorbent_name}' not found in {csv_path}.")
-
-    row = row.iloc[0]  # Get the first matching row as Series
-
-    adsorbent = Adsorbent_Langmuir(
-        name=row['name'],
-        q_max_CO2=row['q_max_CO2'],
-        K_CO2=row['K_CO2'],
-        k_ads_CO2=row['k_ads_CO2'],
-        density=row['density'],
-        q_max_H2O=row.get('q_max_H2O', 0),  # default to 0 if not present
-        K_H2O=row.get('K_H2O', 0),
-        k_ads_H2O=row.get('k_ads_H2O', 0)
-    )
-    return adsorbent
-
-
 def get_percentage_point(percentage:float, t, outlet_conc):
     """
     This function first identifies the outlet CO2 concentration at the desired percentage
@@ -157,90 +503,27 @@ def get_percentage_point(percentage:float, t, outlet_conc):
     (in other words the nearest value taken by the function)
 
     Once the index is found, we can define and return the point's coordinates
+
+    See adsorpsim.analytics.breakthrough_times for interpolated crossing times of many curves and percentages at once.
     """
     if np.max(outlet_conc)<0.1624:
         almost_pc_point_y=(percentage/100*np.max(outlet_conc))
     else:
         almost_pc_point_y=(percentage/100*0.01624)
 
-    idx_proche = np.abs(outlet_conc - almost_pc_point_y).argmin()
+    # argmin returns the first of the nearest values, which is also the first occurrence of that value
+    index = np.abs(outlet_conc - almost_pc_point_y).argmin()
 
-    pc_point_y = outlet_conc[idx_proche]
-    index = np.where(outlet_conc == pc_point_y)[0][0]
+    pc_point_y = outlet_conc[index]
     pc_point_x = t[index]
     return pc_point_x, pc_point_y
 
-def plot_the_graph(t,outlet_CO2,outlet_H2O,pc_point_x=None,pc_point_y=None):
-    """
-    This function plots the breakthrough graph
-    """
-    #the plot is created
-    fig, ax = plt.subplots(figsize=(8, 5))
-    if pc_point_x is not None and pc_point_y is not None:
-        #the point at wich the desired percentage of adsorbent is saturated in CO2 is plotted
-        ax.plot(pc_point_x, pc_point_y, "rx", markersize=10, label="Percentage point",zorder=3)
-    #the breakthrough curve is plotted
-    ax.plot(t, outlet_CO2, label="Outlet CO₂ Concentration",zorder=1)
-    #if the humidity is not null, the outlet concentration of H2O is plotted
-    if outlet_H2O is not None:
-        ax.plot(t, outlet_H2O, label="Outlet H₂O Concentration", linestyle='--',zorder=2)
-    #the template of the graph is defined
-    ax.set_xlabel('Time (s)')
-    ax.set_ylabel('Outlet CO₂ Concentration (mol/m³)')
-    ax.set_title('Breakthrough Curve')
-    ax.legend()
-    ax.grid(True)
-    return fig
-
-def add_adsorbent_to_list(CSV_PATH, name, q_max_CO2, K_CO2, k_ads_CO2, density, q_max_H2O=0, K_H2O=0, k_ads_H2O=0):
-    """
-    This function reads a given .csv file 
-    and adds a row containing the different needed physical property of an adsorbent
-    The physical properties and the name has to be given to the function
-    The .csv file is then saved
-    """
-    #Verifications for the name
-    if name=="":
-        raise ValueError("The variable 'name' cannot be empty.")
-    if not isinstance(name, str):
-        raise TypeError("The variable 'name' must be a string.")
-    # Verification for the numeric variables
-    numeric_vars = {
-        "q_max_CO2": q_max_CO2,
-        "K_CO2": K_CO2,
-        "k_ads_CO2": k_ads_CO2,
-        "density": density,
-        "q_max_H2O": q_max_H2O,
-        "K_H2O": K_H2O,
-        "k_ads_H2O": k_ads_H2O
-    }
-    for var_name, var_value in numeric_vars.items():
-        if not isinstance(var_value, (float, int)):
-            raise TypeError(f"The variable '{var_name}' must be a float or an int..")
-        if var_value < 0:
-            raise ValueError(f"The variable '{var_name}' cannot be negative..")
-        if var_name in ["q_max_CO2", "K_CO2", "k_ads_CO2", "density"] and var_value == 0:
-            raise ValueError(f"The variable '{var_name}' cannot be zero.")
-    #the file is read 
-    df = pd.read_csv(CSV_PATH, sep=";")
-    # Check if the adsorbent already exists
-    if name in df['name'].values:
-        raise ValueError(f"The adsorbent '{name}' is already in the database.")
-    #creation of a dataframe with the new line (new adsorbent)
-    new_row = {
-    "name": name,
-    "q_max_CO2": q_max_CO2,
-    "K_CO2": K_CO2,
-    "k_ads_CO2": k_ads_CO2,
-    "density": density,
-    "q_max_H2O": q_max_H2O,
-    "K_H2O": K_H2O,
-    "k_ads_H2O": k_ads_H2O
-    }
-    # the new adsorbent is added
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    #the file is saved 
-    df.to_csv(CSV_PATH, sep=";", index=False)
+def _percentage_point_index(outlet_conc, pc_point_y):
+    "Index of the first occurrence of pc_point_y (as returned by get_percentage_point) in the outlet concentration"
+    matches = np.flatnonzero(np.asarray(outlet_conc) == pc_point_y)
+    if len(matches) == 0:
+        raise ValueError(f"{pc_point_y} is not a value of the outlet CO₂ concentration, see get_percentage_point.")
+    return matches[0]
 
 def get_adsorbed_quantity_CO2(outlet_conc, pc_point_x, pc_point_y, flow_rate):
     """
@@ -249,14 +532,12 @@ def get_adsorbed_quantity_CO2(outlet_conc, pc_point_x, pc_point_y, flow_rate):
     An array containing the concentration of adsorbed CO₂ per m³ is created with all the concentrations from the start to the red cross, (which represents the desired percentage of saturated adsorbent in CO₂)
     
     The component of the array are then summed and multiplied by the acquisition time and the flowrate to retrieve a quantity of matter in moles.
+
+    See adsorpsim.analytics.adsorbed_quantity for the uptake integrated over the actual time spacing.
     """
-    adsorbed_array=np.array([])
-    index = np.where(outlet_conc == pc_point_y)[0][0]
-    for elem in outlet_conc[:round(index)+1]:
-        if elem<0.01624:
-            adsorbed=0.01624-elem
-            adsorbed_array=np.append(adsorbed_array, adsorbed)
-    return sum(adsorbed_array)*flow_rate*pc_point_x
+    index = _percentage_point_index(outlet_conc, pc_point_y)
+    adsorbed_array = np.maximum(INLET_CONC_CO2 - outlet_conc[:index+1], 0)
+    return np.sum(adsorbed_array)*flow_rate*pc_point_x
 
 def get_adsorbed_quantity_H2O(outlet_CO2,outlet_H2O, humidity_precentage, pc_point_x, pc_point_y, flow_rate):
     """
@@ -265,97 +546,31 @@ def get_adsorbed_quantity_H2O(outlet_CO2,outlet_H2O, humidity_precentage, pc_poi
     An array containing the concentration of adsorbed H₂O per m³ is created with all the concentrations from the start to the red cross, (which represents the desired percentage of saturated adsorbent in CO₂)
     
     The component of the array are then summed and multiplied by the acquisition time and the flowrate to retrieve a quantity of matter in moles.
+
+    See adsorpsim.analytics.adsorbed_quantity for the uptake integrated over the actual time spacing.
     """
     if outlet_H2O is not None:
-        adsorbed_array=np.array([])
-        index = np.where(outlet_CO2 == pc_point_y)[0][0]
-        max_value = 0.0173 * (humidity_precentage / 100)  # max H2O concentration at given humidity
-        for elem in outlet_H2O[:round(index)+1]:
-            if elem<max_value:
-                adsorbed=max_value-elem
-                adsorbed_array=np.append(adsorbed_array, adsorbed)
-        return sum(adsorbed_array)*flow_rate*pc_point_x
+        index = _percentage_point_index(outlet_CO2, pc_point_y)
+        max_value = MAX_CONC_H2O * (humidity_precentage / 100)  # max H2O concentration at given humidity
+        adsorbed_array = np.maximum(max_value - outlet_H2O[:index+1], 0)
+        return np.sum(adsorbed_array)*flow_rate*pc_point_x
     else:
         return 0
 
-def fit_adsorption_parameters_from_df(df, bed_template,  assumed_density = None, initial_guess=[4.0, 0.2, 1]):
-    """
-    Fit the Langmuir adsorption parameters to experimental CO2 breakthrough data.
 
-    Parameters:
-        df : dataframe containing 'time' and 'outlet_CO2' columns.
-        bed_template (Bed): A Bed object with all fixed parameters except the adsorbent (can use dummy adsorbent initially).
-        initial_guess (list): [q_max_CO2, K_CO2, k_ads_CO2]
+# functions moved to the plotting, database and fitting modules, which import matplotlib, pandas and scipy.optimize,
+# still importable from this module
+_MOVED = {
+    "plot_the_graph": "plotting",
+    "plot_fitted_curve": "plotting",
+    "download_data": "database",
+    "load_adsorbent_from_csv": "database",
+    "add_adsorbent_to_list": "database",
+    "fit_adsorption_parameters_from_df": "fitting",
+}
 
-    Returns:
-        fitted_adsorbent (Adsorbent_Langmuir): Fitted adsorbent object.
-        fig (matplotlib figure): Figure of the fitted breakthrough curve.
-    """
-    
-    if bed_template.adsorbent == None:
-
-        bed_template.adsorbent = Adsorbent_Langmuir(
-        name="Dummy Adsorbant",
-        q_max_CO2=5.0,
-        K_CO2=0.2,
-        k_ads_CO2=0.02,
-        density=assumed_density
-)
-    # Load experimental data
-    t_exp = df['time'].values
-    outlet_CO2_exp = df['outlet_CO2'].values
-
-    def loss(params):
-        q_max, K, k_ads = params
-
-        ads = Adsorbent_Langmuir(
-            name="Fitted",
-            q_max_CO2=q_max,
-            K_CO2=K,
-            k_ads_CO2=k_ads,
-            density=bed_template.adsorbent.density,
-        )
-        bed = Bed(
-            length=bed_template.length,
-            diameter=bed_template.diameter,
-            flow_rate=bed_template.flow_rate,
-            num_segments=bed_template.num_segments,
-            total_time=bed_template.total_time,
-            adsorbent=ads,
-            humidity_percentage=bed_template.humidity_percentage
-        )
 
-        try:
-            t_model, outlet_model, _ = bed.simulate()
-            outlet_interp = np.interp(t_exp, t_model, outlet_model)
-            error = np.mean((outlet_interp - outlet_CO2_exp)**2)
-            return error
-        except Exception as e:
-            return 1e6  # penalize failed simulations
-
-    # Optimization
-    result = minimize(loss, initial_guess, method='Nelder-Mead')
-
-    q_max_opt, K_opt, k_ads_opt = result.x
-
-    fitted_adsorbent = Adsorbent_Langmuir(
-        name="Fitted_Adsorbent",
-        q_max_CO2=q_max_opt,
-        K_CO2=K_opt,
-        k_ads_CO2=k_ads_opt,
-        density=bed_template.adsorbent.density
-    )
-
-    # Plot experimental vs model
-    bed_template.adsorbent = fitted_adsorbent
-    t_sim, outlet_sim, _ = bed_template.simulate()
-    fig, ax = plt.subplots(figsize=(8, 5))
-    ax.plot(t_sim, outlet_sim, label="Fitted model",zorder=1)
-    ax.scatter(t_exp, outlet_CO2_exp, label="Experimental points",color="red", marker="o",zorder=2)
-    ax.set_xlabel('Time (s)')
-    ax.set_ylabel('Outlet CO₂ Concentration (mol/m³)')
-    ax.set_title('Breakthrough Curve')
-    ax.legend()
-    ax.grid(True)
-    
-    return fitted_adsorbent,fig
\ No newline at end of file
+def __getattr__(name):
+    if name in _MOVED:
+        return getattr(importlib.import_module(f"adsorpsim.{_MOVED[name]}"), name)
+    raise AttributeError(f"module 'adsorpsim.core' has no attribute '{name}'")
@@ -0,0 +1,227 @@
+import time
+
+import numpy as np
+from scipy.optimize import NoConvergence, newton_krylov
+
+from adsorpsim.integrate import integrate
+from adsorpsim.kernel import kernel_class
+
+CSS_METHODS = ("picard", "anderson", "newton_krylov")
+
+
+class CycleStep:
+    """
+    A step of an adsorption cycle, lasting duration seconds.
+
+    The bed is fed with its own gas (see Bed.species) when feed is True, and purged with a clean gas otherwise.
+    flow_rate (m³/s) defaults to that of the bed, and counter_current steps flow from the outlet of the bed towards
+    its inlet. As the model is isothermal, affinity_factor multiplies the Langmuir constants K of every species during
+    the step, e.g. below 1 for a heated regeneration step (temperature swing).
+    """
+    def __init__(self, name: str, duration: float, feed: bool =True, flow_rate: float =None, counter_current: bool =False, affinity_factor: float =1.0):
+        if duration <= 0:
+            raise ValueError("The duration of a step must be positive.")
+        self.name = name
+        self.duration = duration
+        self.feed = feed
+        self.flow_rate = flow_rate
+        self.counter_current = counter_current
+        self.affinity_factor = affinity_factor
+
+    def __repr__(self):
+        return (f"CycleStep(name={self.name}, duration={self.duration}, feed={self.feed}, flow_rate={self.flow_rate}, "
+                f"counter_current={self.counter_current}, affinity_factor={self.affinity_factor})")
+
+
+class CycleResult:
+    """
+    Result of CyclicBed.cyclic_steady_state.
+
+    y_css is the state of the bed at the start (and end) of a cycle at cyclic steady state, laid out like
+    Bed._initial_conditions, converged when the scaled change of the state over one cycle, whose history is residuals,
+    is below the tolerance. cycles is the number of cycles simulated to reach it, wall_time the time (s) spent.
+
+    steps holds, for every step of the cycle at cyclic steady state, its name, times (s from the start of the step)
+    and the outlet concentrations of every species (one row each, at the end of the bed the gas leaves from).
+    captured and recovered hold the quantities (mol) of every species retained by the bed during the feed steps
+    and released during the purge steps of that cycle, which balance at cyclic steady state.
+    """
+    def __init__(self, y_css, converged, cycles, residuals, method, wall_time, steps, captured, recovered):
+        self.y_css = y_css
+        self.converged = converged
+        self.cycles = cycles
+        self.residuals = residuals
+        self.method = method
+        self.wall_time = wall_time
+        self.steps = steps
+        self.captured = captured
+        self.recovered = recovered
+
+
+class CyclicBed:
+    """
+    Cycle scheduler of a Bed: the steps (CycleStep objects) are run one after the other, the state of the bed
+    at the end of a step being the initial state of the next one, and the cycle is repeated.
+
+    The cycle defines a map from the state of the bed at the start of a cycle to its state at the end of it,
+    whose fixed point is the cyclic steady state (CSS). It can be found by running the cycles one after the other
+    ("picard", as a unit does, which may take hundreds of cycles), or far faster with the "anderson" acceleration
+    of these iterations or "newton_krylov" shooting on the end-of-cycle state (see cyclic_steady_state).
+
+    Only the upwind scheme is supported, whose kernel handles the clean purge gas.
+    """
+    def __init__(self, bed, steps, method: str ='BDF', rtol: float =1e-8, atol: float =1e-11):
+        if bed.scheme != "upwind":
+            raise ValueError("The cyclic simulation is only available with the upwind scheme.")
+        if len(steps) == 0:
+            raise ValueError("At least one step is needed.")
+        self.bed = bed
+        self.steps = list(steps)
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self.names = [name for name, _, _, _, _ in bed.species()]
+        self.num_species = len(self.names)
+
+        # scales of C and q of every species, used by the convergence criterion and the accelerations
+        density = bed.adsorbent.density
+        C_in = np.array([C_in for _, C_in, _, _, _ in bed.species()])
+        q_scale = np.array([q_max * K * C_in / (1 + K * C_in) for _, C_in, q_max, K, _ in bed.species()])
+        self.scale = np.repeat(np.concatenate([C_in, np.where(q_scale > 0, q_scale, 1 / density)]), bed.num_segments)
+        self._kernels = [self._step_kernel(step) for step in self.steps]
+
+    def _step_kernel(self, step):
+        "Kernel of the bed with the inlet, velocity and affinities of a step"
+        bed = self.bed
+        kernel_type = kernel_class(bed.backend, competitive=bed.adsorbent.competitive)
+        n, velocity, dz, C_in, q_max, K, k_ads, density = kernel_type._bed_arguments(bed)
+        if step.flow_rate is not None:
+            velocity = step.flow_rate / bed.area
+        C_in = C_in if step.feed else np.zeros(len(C_in))
+        return kernel_type(n, velocity, dz, C_in, q_max, np.multiply(K, step.affinity_factor), k_ads, density)
+
+    def _flip(self, y):
+        "State of the bed with the segments in the reverse order, the frame of the counter-current steps"
+        return y.reshape(2, self.num_species, self.bed.num_segments)[:, :, ::-1].ravel()
+
+    def run_cycle(self, y0, record: bool =False):
+        """
+        Runs one cycle from the state y0 and returns the state at its end,
+        and the list of (times, outlets) of every step if record is True (one point per second of every step).
+        """
+        n = self.bed.num_segments
+        outlets = [n * (i + 1) - 1 for i in range(self.num_species)]
+        y = np.array(y0, dtype=float)
+        recorded = []
+        for step, kernel in zip(self.steps, self._kernels):
+            if step.counter_current:
+                y = self._flip(y)
+            t_eval = np.linspace(0, step.duration, max(int(step.duration), 1) + 1) if record else [step.duration]
+            trajectory = integrate(kernel.rhs, 0, y, step.duration, t_eval, outlets,
+                                   method=self.method, jac=kernel.jacobian, rtol=self.rtol, atol=self.atol)
+            if trajectory.status != 0:
+                raise RuntimeError(f"The integration of the step {step.name} failed: {trajectory.message}")
+            y = trajectory.y_final
+            if step.counter_current:
+                y = self._flip(y)
+            recorded.append((trajectory.t, trajectory.recorded))
+        return (y, recorded) if record else y
+
+    def residual(self, y0, y1):
+        "Scaled change of the state over one cycle: the largest of |y1 - y0| / scale"
+        return np.abs((y1 - y0) / self.scale).max()
+
+    def cyclic_steady_state(self, method: str ="anderson", tol: float =1e-6, max_cycles: int =1000, depth: int =5, y0=None):
+        """
+        Finds the cyclic steady state, starting from the state y0 (the clean bed of Bed._initial_conditions by default),
+        and returns a CycleResult.
+
+        With method="picard", the cycles are run one after the other until the scaled change of the state over a cycle
+        is below tol, the slowly adsorbing species often needing hundreds of cycles.
+        With method="anderson", the next state is extrapolated from the last depth cycles (Anderson acceleration of the
+        fixed-point iterations): a least-squares combination of them cancels the change over a cycle, one cycle per
+        iteration, and is kept non-negative. With method="newton_krylov", the equation y_end(y) - y = 0 is solved by
+        Newton's method, its Jacobian-vector products being estimated by finite differences (one cycle each, see
+        scipy.optimize.newton_krylov), which converges in few Newton steps but with many cycles per step.
+
+        A final cycle from the converged state records the outlet curves of the steps; it is not counted in cycles.
+        """
+        if method not in CSS_METHODS:
+            raise ValueError(f"Unknown method '{method}', expected one of {CSS_METHODS}.")
+        start = time.perf_counter()
+        y = self.bed._initial_conditions() if y0 is None else np.array(y0, dtype=float)
+        residuals = []
+        cycles = 0
+        converged = False
+
+        if method == "newton_krylov":
+            best = [np.inf, y / self.scale]
+
+            def shooting(x):
+                nonlocal cycles
+                if cycles >= max_cycles:
+                    raise NoConvergence(best[1])
+                cycles += 1
+                y_start = np.maximum(x, 0) * self.scale
+                change = (self.run_cycle(y_start) - y_start) / self.scale
+                residuals.append(np.abs(change).max())
+                if residuals[-1] < best[0]:
+                    best[:] = residuals[-1], x.copy()
+                return change
+
+            try:
+                x = newton_krylov(shooting, y / self.scale, f_tol=tol)
+                converged = True
+            except NoConvergence:
+                x = best[1]
+            y = np.maximum(x, 0) * self.scale
+        else:
+            x_history, g_history = [], []
+            while cycles < max_cycles:
+                y_end = self.run_cycle(y)
+                cycles += 1
+                residuals.append(self.residual(y, y_end))
+                if residuals[-1] < tol:
+                    y, converged = y_end, True
+                    break
+                if method == "picard":
+                    y = y_end
+                    continue
+                # Anderson acceleration in the scaled variables: the combination of the last states whose change
+                # over a cycle is the smallest in the least-squares sense, mapped through the cycle
+                x_history.append(y / self.scale)
+                g_history.append(y_end / self.scale)
+                x_history, g_history = x_history[-(depth + 1):], g_history[-(depth + 1):]
+                g = g_history[-1]
+                f = g - x_history[-1]
+                if len(x_history) > 1:
+                    F = np.diff(np.array(g_history) - np.array(x_history), axis=0).T
+                    G = np.diff(np.array(g_history), axis=0).T
+                    gamma = np.linalg.lstsq(F, f, rcond=None)[0]
+                    g = g - G @ gamma
+                y = np.maximum(g, 0) * self.scale
+
+        y_end, recorded = self.run_cycle(y, record=True)
+        return CycleResult(
+            y_css=y,
+            converged=converged,
+            cycles=cycles,
+            residuals=np.array(residuals),
+            method=method,
+            wall_time=time.perf_counter() - start,
+            steps=[(step.name, t, outlets) for step, (t, outlets) in zip(self.steps, recorded)],
+            captured=self._balance(recorded, feed=True),
+            recovered=self._balance(recorded, feed=False)
+        )
+
+    def _balance(self, recorded, feed):
+        "Quantities (mol) of every species retained during the feed steps or released during the purge steps"
+        C_in = np.array([C_in for _, C_in, _, _, _ in self.bed.species()])
+        totals = np.zeros(self.num_species)
+        for step, (t, outlets) in zip(self.steps, recorded):
+            if step.feed != feed:
+                continue
+            flow_rate = self.bed.flow_rate if step.flow_rate is None else step.flow_rate
+            rate = flow_rate * (C_in[:, None] - outlets if feed else outlets)
+            totals += (0.5 * (rate[:, 1:] + rate[:, :-1]) * np.diff(t)).sum(axis=1)
+        return dict(zip(self.names, totals))
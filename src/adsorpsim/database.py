@@ -0,0 +1,22 @@
+from adsorpsim import registry
+
+
+#the data are cached by the registry of the file, which reloads them when the file changes (e.g. a new adsorbent inputted from the app)
+def download_data(csv_file):
+    "Download the adsorbent database"
+    return registry.get_registry(csv_file).dataframe()
+
+def load_adsorbent_from_csv(csv_path, adsorbent_name):
+    "Loads an adsorbent from the database, see adsorpsim.registry.AdsorbentRegistry"
+    return registry.get_registry(csv_path).get(adsorbent_name)
+
+
+def add_adsorbent_to_list(CSV_PATH, name, q_max_CO2, K_CO2, k_ads_CO2, density, q_max_H2O=0, K_H2O=0, k_ads_H2O=0):
+    """
+    This function adds a row containing the different needed physical property of an adsorbent
+    to a given .csv file
+    The physical properties and the name has to be given to the function
+    The row is appended to the file, which is not rewritten
+    """
+    # the row is appended to the file under a lock, see adsorpsim.registry.AdsorbentRegistry.add_many
+    registry.get_registry(CSV_PATH).add(name, q_max_CO2, K_CO2, k_ads_CO2, density, q_max_H2O, K_H2O, k_ads_H2O)
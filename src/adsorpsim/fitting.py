@@ -0,0 +1,419 @@
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import least_squares, minimize
+from scipy.stats import qmc
+
+from adsorpsim import library
+from adsorpsim.core import Adsorbent_Langmuir, Bed
+from adsorpsim.integrate import integrate
+from adsorpsim.kernel import BreakthroughKernel
+from adsorpsim.plotting import plot_fitted_curve
+
+FITTED_PARAMETERS = ("q_max_CO2", "K_CO2", "k_ads_CO2")
+# physically plausible ranges of the fitted parameters, sampled by the multi-start fitter
+DEFAULT_BOUNDS = {"q_max_CO2": (0.1, 20.0), "K_CO2": (1e-3, 10.0), "k_ads_CO2": (1e-3, 10.0)}
+GEOMETRY_FIELDS = ("length", "diameter", "flow_rate", "num_segments", "total_time", "humidity_percentage", "backend", "scheme")
+
+
+class SensitivitySystem:
+    """
+    CO₂ breakthrough model of a bed augmented with its forward sensitivity equations
+    with respect to p = (q_max_CO2, K_CO2, k_ads_CO2).
+
+    The state is [y, S_q_max, S_K, S_k_ads] where y = [C_CO2, q_CO2] and S_p = dy/dp follows dS_p/dt = J S_p + df/dp.
+    The water and other species are left out as they do not depend on these parameters with independent isotherms
+    (the fitted adsorbent is not competitive),
+    and the advection is discretised with the upwind scheme whatever the scheme of the bed.
+    The Jacobian given to the solver is block lower triangular: J on the diagonal, and the derivatives of
+    J S_p + df/dp with respect to y (local to every segment) in the first column.
+    """
+    def __init__(self, bed, q_max, K, k_ads):
+        self.n = bed.num_segments
+        self.q_max, self.K, self.k_ads = q_max, K, k_ads
+        self.density = bed.adsorbent.density
+        self.kernel = BreakthroughKernel(self.n, bed.velocity, bed.dz, [bed.initial_conc_CO2], [q_max], [K], [k_ads], self.density)
+        self.y0 = np.zeros(8 * self.n)
+        self.y0[0] = bed.initial_conc_CO2
+        self._out = np.zeros(8 * self.n)
+
+    def rhs(self, t, Y):
+        n = self.n
+        y = Y[:2 * n]
+        S = Y[2 * n:].reshape(3, 2 * n)
+        C, q = y[:n], y[n:]
+
+        self._out[:2 * n] = self.kernel.rhs(t, y)
+        J = self.kernel.jacobian(t, y)
+        dS = self._out[2 * n:].reshape(3, 2 * n)
+        dS[:] = (J @ S.T).T
+
+        # explicit derivatives df/dp of dq/dt = k_ads (q_eq - q) and dC/dt = ... - density dq/dt
+        denominator = 1 + self.K * C
+        dq_dp = (
+            self.k_ads * self.K * C / denominator,
+            self.k_ads * self.q_max * C / denominator ** 2,
+            self.q_max * self.K * C / denominator - q,
+        )
+        for j, derivative in enumerate(dq_dp):
+            dS[j, :n] -= self.density * derivative
+            dS[j, n:] += derivative
+        return self._out
+
+    def jacobian(self, t, Y):
+        n = self.n
+        C = Y[:n]
+        SC = Y[2 * n:].reshape(3, 2 * n)[:, :n]
+        J = sparse.csc_matrix(self.kernel.jacobian(t, Y[:2 * n]))
+
+        # derivatives of the adsorption rate r = k_ads (q_max K C / (1 + K C) - q) and of dr/dp with respect to C and q
+        denominator = 1 + self.K * C
+        d2r_dC2 = -2 * self.k_ads * self.q_max * self.K ** 2 / denominator ** 3
+        d2r_dp_dC = (
+            self.k_ads * self.K / denominator ** 2,
+            self.k_ads * self.q_max * (1 - self.K * C) / denominator ** 3,
+            self.q_max * self.K / denominator ** 2,
+        )
+        d2r_dp_dq = (0.0, 0.0, -1.0)
+
+        blocks = [[J, None, None, None], [None, J, None, None], [None, None, J, None], [None, None, None, J]]
+        for j in range(3):
+            dC = d2r_dC2 * SC[j] + d2r_dp_dC[j]
+            dq = np.full(n, d2r_dp_dq[j])
+            blocks[j + 1][0] = sparse.bmat([
+                [sparse.diags(-self.density * dC), sparse.diags(-self.density * dq)],
+                [sparse.diags(dC), sparse.diags(dq)],
+            ])
+        return sparse.bmat(blocks, format='csc')
+
+    def outlet_sensitivities(self, t_eval, t_bound, rtol=1e-6, atol=1e-9):
+        """
+        Outlet CO₂ concentration (T,) and its derivatives with respect to the three parameters (3, T) at t_eval
+        """
+        outlet = self.n - 1
+        record = [outlet] + [2 * self.n * (j + 1) + outlet for j in range(3)]
+        trajectory = integrate(self.rhs, 0, self.y0, t_bound, t_eval, record, method='BDF', jac=self.jacobian, rtol=rtol, atol=atol)
+        if trajectory.status != 0:
+            raise RuntimeError(f"The sensitivity integration failed: {trajectory.message}")
+        return trajectory.recorded[0], trajectory.recorded[1:]
+
+
+def fit_adsorption_parameters_from_df(df, bed_template,  assumed_density = None, initial_guess=None, plot: bool =True, callback=None):
+    """
+    Fit the Langmuir adsorption parameters to experimental CO2 breakthrough data.
+
+    Parameters:
+        df : dataframe containing 'time' and 'outlet_CO2' columns, or a dict of arrays with these keys
+            (e.g. the memory-mapped columns of adsorpsim.ingest.load_breakthrough_data).
+        bed_template (Bed): A Bed object with all fixed parameters except the adsorbent (can use dummy adsorbent initially),
+            or a ReducedBed to evaluate the candidates with its reduced-order model (see adsorpsim.rom).
+        initial_guess (list): [q_max_CO2, K_CO2, k_ads_CO2], by default the best match of the precomputed
+            breakthrough library (see adsorpsim.library.initial_guess), or library.FALLBACK_GUESS without library.
+        plot (bool): whether to build the figure of the fitted breakthrough curve.
+        callback : optional function called after every evaluation of the loss (one simulation) with the number
+            of evaluations and the lowest loss so far, which may raise an exception to stop the fit (see adsorpsim.background).
+
+    Returns:
+        fitted_adsorbent (Adsorbent_Langmuir): Fitted adsorbent object.
+        fig (matplotlib figure): Figure of the fitted breakthrough curve (None if plot is False).
+    """
+    
+    if bed_template.adsorbent == None:
+
+        bed_template.adsorbent = Adsorbent_Langmuir(
+        name="Dummy Adsorbant",
+        q_max_CO2=5.0,
+        K_CO2=0.2,
+        k_ads_CO2=0.02,
+        density=assumed_density
+)
+    # Load experimental data, without copying the memory-mapped columns of adsorpsim.ingest.load_breakthrough_data
+    t_exp = np.asarray(df['time'])
+    outlet_CO2_exp = np.asarray(df['outlet_CO2'])
+
+    if initial_guess is None:
+        initial_guess = library.initial_guess(bed_template, bed_template.adsorbent.density, t_exp, outlet_CO2_exp)
+    if initial_guess is None:
+        initial_guess = library.FALLBACK_GUESS
+
+    def loss(params):
+        q_max, K, k_ads = params
+
+        ads = Adsorbent_Langmuir(
+            name="Fitted",
+            q_max_CO2=q_max,
+            K_CO2=K,
+            k_ads_CO2=k_ads,
+            density=bed_template.adsorbent.density,
+        )
+        # a copy of the template, so that e.g. a ReducedBed template is simulated with its reduced model
+        bed = bed_template.with_adsorbent(ads)
+
+        try:
+            t_model, outlet_model, _ = bed.simulate()
+            outlet_interp = np.interp(t_exp, t_model, outlet_model)
+            error = np.mean((outlet_interp - outlet_CO2_exp)**2)
+        except Exception as e:
+            error = 1e6  # penalize failed simulations
+        if callback is not None:
+            progress[0] += 1
+            progress[1] = min(progress[1], error)
+            callback(*progress)
+        return error
+
+    # number of evaluations of the loss and lowest loss, reported to callback
+    progress = [0, np.inf]
+
+    # Optimization
+    result = minimize(loss, initial_guess, method='Nelder-Mead')
+
+    q_max_opt, K_opt, k_ads_opt = result.x
+
+    fitted_adsorbent = Adsorbent_Langmuir(
+        name="Fitted_Adsorbent",
+        q_max_CO2=q_max_opt,
+        K_CO2=K_opt,
+        k_ads_CO2=k_ads_opt,
+        density=bed_template.adsorbent.density
+    )
+
+    # Plot experimental vs model
+    bed_template.adsorbent = fitted_adsorbent
+    fig = None
+    if plot:
+        t_sim, outlet_sim, _ = bed_template.simulate()
+        fig = plot_fitted_curve(t_sim, outlet_sim, t_exp, outlet_CO2_exp)
+    
+    return fitted_adsorbent,fig
+
+
+def fit_adsorption_parameters_least_squares(df, bed_template, assumed_density=None, initial_guess=[4.0, 0.2, 1], plot: bool =True, max_nfev: int =None, bounds: dict =None):
+    """
+    Fit the Langmuir adsorption parameters to experimental CO2 breakthrough data with a Gauss-Newton type method.
+
+    The residuals are differentiated exactly with the forward sensitivity equations, so that every iteration of
+    least_squares costs a single (augmented) solve, and the parameter covariance is estimated from the residual Jacobian.
+    The parameters are fitted through their logarithm, which keeps them positive.
+
+    Parameters:
+        df : dataframe containing 'time' and 'outlet_CO2' columns, or a dict of arrays with these keys.
+        bed_template (Bed): A Bed object with all fixed parameters except the adsorbent (can be None if assumed_density is given).
+        initial_guess (list): [q_max_CO2, K_CO2, k_ads_CO2]
+        plot (bool): whether to build the figure of the fitted breakthrough curve.
+        max_nfev (int): maximum number of solves (no limit by default).
+        bounds (dict): optional (low, high) range of q_max_CO2, K_CO2 and k_ads_CO2 (see DEFAULT_BOUNDS).
+
+    Returns:
+        fitted_adsorbent (Adsorbent_Langmuir): Fitted adsorbent object.
+        fig (matplotlib figure): Figure of the fitted breakthrough curve (None if plot is False).
+        report (dict): 'covariance' (3x3) and 'std_errors' of (q_max_CO2, K_CO2, k_ads_CO2), 'cost', 'nfev' (number of solves),
+            'success' and 'message' of the optimisation.
+    """
+    density = bed_template.adsorbent.density if bed_template.adsorbent is not None else assumed_density
+    if density is None:
+        raise ValueError("The density of the adsorbent must be given by the bed template or by assumed_density.")
+
+    t_exp = np.asarray(df['time'], dtype=float)
+    outlet_CO2_exp = np.asarray(df['outlet_CO2'], dtype=float)
+    # sorted data, e.g. the memory-mapped columns of adsorpsim.ingest.load_breakthrough_data, are not copied
+    if np.any(np.diff(t_exp) < 0):
+        order = np.argsort(t_exp, kind='stable')
+        t_exp, outlet_CO2_exp = t_exp[order], outlet_CO2_exp[order]
+    t_bound = max(float(bed_template.total_time), t_exp[-1])
+
+    dummy_bed = _bed_with_density(bed_template, density)
+    solves = {}
+
+    def solve(theta):
+        key = tuple(theta)
+        if key not in solves:
+            params = np.exp(theta)
+            system = SensitivitySystem(dummy_bed, *params)
+            outlet, sensitivities = system.outlet_sensitivities(t_exp, t_bound)
+            # residual Jacobian with respect to log(p): dr/dlog(p) = p dr/dp
+            solves.clear()
+            solves[key] = (outlet - outlet_CO2_exp, (sensitivities * params[:, None]).T)
+        return solves[key]
+
+    theta_bounds = (-np.inf, np.inf)
+    theta0 = np.log(initial_guess)
+    if bounds is not None:
+        theta_bounds = (np.log([bounds[name][0] for name in FITTED_PARAMETERS]), np.log([bounds[name][1] for name in FITTED_PARAMETERS]))
+        theta0 = np.clip(theta0, *theta_bounds)
+    result = least_squares(lambda theta: solve(theta)[0], theta0, jac=lambda theta: solve(theta)[1], method='trf',
+                           bounds=theta_bounds, max_nfev=max_nfev)
+    params = np.exp(result.x)
+
+    # covariance of p from the Jacobian at the optimum: s² (Jp^T Jp)^-1
+    jac_p = result.jac / params[None, :]
+    dof = max(len(t_exp) - len(params), 1)
+    s2 = 2 * result.cost / dof
+    covariance = s2 * np.linalg.pinv(jac_p.T @ jac_p)
+
+    fitted_adsorbent = Adsorbent_Langmuir(
+        name="Fitted_Adsorbent",
+        q_max_CO2=params[0],
+        K_CO2=params[1],
+        k_ads_CO2=params[2],
+        density=density
+    )
+    report = {
+        "covariance": covariance,
+        "std_errors": np.sqrt(np.diag(covariance)),
+        "cost": result.cost,
+        "nfev": result.nfev,
+        "success": result.success,
+        "message": result.message,
+    }
+
+    fig = None
+    if plot:
+        bed_template.adsorbent = fitted_adsorbent
+        t_sim, outlet_sim, _ = bed_template.simulate()
+        fig = plot_fitted_curve(t_sim, outlet_sim, t_exp, outlet_CO2_exp)
+    return fitted_adsorbent, fig, report
+
+
+def latin_hypercube(n: int, bounds: dict =DEFAULT_BOUNDS, seed=None):
+    """
+    n starting points (n, 3) of (q_max_CO2, K_CO2, k_ads_CO2) spread by a Latin hypercube over the logarithm of bounds,
+    as the parameters span several orders of magnitude.
+    """
+    low = np.log([bounds[name][0] for name in FITTED_PARAMETERS])
+    high = np.log([bounds[name][1] for name in FITTED_PARAMETERS])
+    sample = qmc.LatinHypercube(d=len(FITTED_PARAMETERS), seed=seed).random(n)
+    return np.exp(qmc.scale(sample, low, high))
+
+
+def _fit_start(t_exp, outlet_CO2_exp, geometry, density, initial_guess, max_nfev, bounds):
+    """
+    Runs one least-squares fit in a worker process.
+    A failed fit does not raise: its status and error are reported instead, like sweep.run_configuration does.
+    """
+    result = {"status": "ok", "error": None}
+    start = time.perf_counter()
+    try:
+        bed = Bed(adsorbent=None, **geometry)
+        df = pd.DataFrame({"time": t_exp, "outlet_CO2": outlet_CO2_exp})
+        adsorbent, _, report = fit_adsorption_parameters_least_squares(
+            df, bed, assumed_density=density, initial_guess=initial_guess, plot=False, max_nfev=max_nfev, bounds=bounds)
+        result.update({name: getattr(adsorbent, name) for name in FITTED_PARAMETERS})
+        # the root mean square residual is comparable between fits on different numbers of points
+        result["rmse"] = np.sqrt(2 * report["cost"] / len(t_exp))
+        result["nfev"] = report["nfev"]
+    except Exception as e:
+        result.update(status="failed", error="".join(traceback.format_exception_only(type(e), e)).strip())
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def _run_starts(tasks, max_workers):
+    "Runs _fit_start for every task, in a process pool unless max_workers is 1"
+    if max_workers == 1:
+        return [_fit_start(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_fit_start, *zip(*tasks)))
+
+
+def fit_adsorption_parameters_multistart(df, bed_template, assumed_density=None, n_starts: int =8, bounds: dict =DEFAULT_BOUNDS,
+                                         coarse_segments: int =None, decimation: int =10, coarse_max_nfev: int =15,
+                                         n_refine: int =2, max_workers: int =None, seed=None, plot: bool =True):
+    """
+    Fit the Langmuir adsorption parameters from several starting points, cheaply first, then accurately.
+
+    The starts are drawn by a Latin hypercube over bounds (see latin_hypercube) and fitted in a process pool with
+    fit_adsorption_parameters_least_squares on a coarse grid (coarse_segments) and every decimation-th experimental point,
+    with at most coarse_max_nfev solves. Only the n_refine best of them are then refined on the grid of bed_template
+    with all the points. The parameters are kept within bounds at both stages.
+
+    Parameters:
+        df : dataframe containing 'time' and 'outlet_CO2' columns, or a dict of arrays with these keys.
+        bed_template (Bed): A Bed object with all fixed parameters except the adsorbent (can be None if assumed_density is given).
+        n_starts (int): number of starting points.
+        bounds (dict): (low, high) range of q_max_CO2, K_CO2 and k_ads_CO2.
+        coarse_segments (int): number of segments of the coarse stage (half of those of bed_template by default).
+        decimation (int): one experimental point out of decimation is used in the coarse stage.
+        coarse_max_nfev (int): maximum number of solves of every coarse fit.
+        n_refine (int): number of candidates refined at full resolution.
+        max_workers (int): number of worker processes (the fits are run in this process when it is 1).
+        seed : seed of the Latin hypercube.
+        plot (bool): whether to build the figure of the best fitted breakthrough curve.
+
+    Returns:
+        fitted_adsorbent (Adsorbent_Langmuir): best fitted adsorbent.
+        fig (matplotlib figure): Figure of its breakthrough curve (None if plot is False).
+        candidates (DataFrame): one row per fit, with its stage ('coarse' or 'refined'), start index, initial guess
+            (initial_q_max_CO2, ...), fitted parameters, rmse, nfev, status, error and elapsed, sorted by stage and rmse.
+    """
+    density = bed_template.adsorbent.density if bed_template.adsorbent is not None else assumed_density
+    if density is None:
+        raise ValueError("The density of the adsorbent must be given by the bed template or by assumed_density.")
+    if decimation < 1:
+        raise ValueError("The variable 'decimation' must be at least 1.")
+
+    t_exp = np.asarray(df['time'], dtype=float)
+    outlet_CO2_exp = np.asarray(df['outlet_CO2'], dtype=float)
+    geometry = {name: getattr(bed_template, name) for name in GEOMETRY_FIELDS}
+    coarse_geometry = dict(geometry, num_segments=coarse_segments or max(geometry["num_segments"] // 2, 5))
+
+    starts = latin_hypercube(n_starts, bounds, seed)
+    coarse = _run_starts(
+        [(t_exp[::decimation], outlet_CO2_exp[::decimation], coarse_geometry, density, guess, coarse_max_nfev, bounds) for guess in starts],
+        max_workers)
+    for index, (guess, result) in enumerate(zip(starts, coarse)):
+        result.update(stage="coarse", start=index, **{f"initial_{name}": value for name, value in zip(FITTED_PARAMETERS, guess)})
+
+    ranked = sorted((result for result in coarse if result["status"] == "ok"), key=lambda result: result["rmse"])
+    if not ranked:
+        raise RuntimeError("All the coarse fits failed: " + "; ".join(str(result["error"]) for result in coarse))
+    best_coarse = ranked[:n_refine]
+    refined = _run_starts(
+        [(t_exp, outlet_CO2_exp, geometry, density, [result[name] for name in FITTED_PARAMETERS], None, bounds)
+         for result in best_coarse],
+        max_workers)
+    for result, coarse_result in zip(refined, best_coarse):
+        result.update(stage="refined", start=coarse_result["start"],
+                      **{f"initial_{name}": coarse_result[name] for name in FITTED_PARAMETERS})
+
+    columns = ["stage", "start", *(f"initial_{name}" for name in FITTED_PARAMETERS), *FITTED_PARAMETERS,
+               "rmse", "nfev", "status", "error", "elapsed"]
+    candidates = pd.DataFrame(coarse + refined, columns=columns)
+    candidates = candidates.sort_values(["stage", "rmse"], ascending=[False, True], kind="stable").reset_index(drop=True)
+
+    successful = candidates[(candidates["stage"] == "refined") & (candidates["status"] == "ok")]
+    if successful.empty:
+        raise RuntimeError("All the refined fits failed: " + "; ".join(str(result["error"]) for result in refined))
+    best = successful.iloc[0]
+    fitted_adsorbent = Adsorbent_Langmuir(
+        name="Fitted_Adsorbent",
+        q_max_CO2=best["q_max_CO2"],
+        K_CO2=best["K_CO2"],
+        k_ads_CO2=best["k_ads_CO2"],
+        density=density
+    )
+
+    fig = None
+    if plot:
+        bed_template.adsorbent = fitted_adsorbent
+        t_sim, outlet_sim, _ = bed_template.simulate()
+        fig = plot_fitted_curve(t_sim, outlet_sim, t_exp, outlet_CO2_exp)
+    return fitted_adsorbent, fig, candidates
+
+
+def _bed_with_density(bed_template, density):
+    "Copy of the geometry of bed_template, with a dummy adsorbent of the given density"
+    return Bed(
+        length=bed_template.length,
+        diameter=bed_template.diameter,
+        flow_rate=bed_template.flow_rate,
+        num_segments=bed_template.num_segments,
+        total_time=bed_template.total_time,
+        adsorbent=Adsorbent_Langmuir("Dummy Adsorbant", 1.0, 1.0, 1.0, density),
+        humidity_percentage=bed_template.humidity_percentage,
+        backend=bed_template.backend,
+        scheme=bed_template.scheme
+    )
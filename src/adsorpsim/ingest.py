@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from adsorpsim.cache import CACHE_VERSION, _canonical
+
+# where load_breakthrough_data keeps the binary columns of the files it parsed
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "adsorpsim" / "breakthrough"
+DEFAULT_COLUMNS = ("time", "outlet_CO2")
+CHUNK_ROWS = 250_000
+
+# digests of the files already hashed, by (path, modification time, size)
+_digests = {}
+
+
+def file_digest(source, block_size: int =1 << 20):
+    "SHA-256 of the content of a file, given as a path or a binary file object, read by blocks"
+    digest = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        stat = os.stat(source)
+        memo = (os.path.abspath(source), stat.st_mtime_ns, stat.st_size)
+        if memo not in _digests:
+            with open(source, "rb") as file:
+                for block in iter(lambda: file.read(block_size), b""):
+                    digest.update(block)
+            _digests[memo] = digest.hexdigest()
+        return _digests[memo]
+    position = source.tell()
+    for block in iter(lambda: source.read(block_size), b""):
+        digest.update(block)
+    source.seek(position)
+    return digest.hexdigest()
+
+
+def _validated(chunk, columns, first_row, last_time):
+    "The columns of a chunk as float arrays, after checking they are numeric, finite and the time increasing"
+    chunk.columns = [str(name).strip() for name in chunk.columns]
+    missing = [name for name in columns if name not in chunk.columns]
+    if missing:
+        raise ValueError(f"The columns {missing} are missing, found {list(chunk.columns)}.")
+    arrays = []
+    for name in columns:
+        values = pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=float)
+        invalid = np.flatnonzero(~np.isfinite(values))
+        if len(invalid):
+            # the line of the file, counting the header
+            raise ValueError(f"Invalid value '{chunk[name].iloc[invalid[0]]}' of '{name}' on line {first_row + invalid[0] + 2}.")
+        arrays.append(values)
+    time = arrays[columns.index("time")]
+    steps = np.diff(np.concatenate([[last_time], time]))
+    if np.any(steps <= 0):
+        raise ValueError(f"The time must be increasing, which it is not on line {first_row + np.argmax(steps <= 0) + 2}.")
+    return arrays
+
+
+class _Binner:
+    "Averages of the rows over time bins of bin_width seconds from the first time, the rows coming by chunks"
+    def __init__(self, bin_width, time_index):
+        self.bin_width = bin_width
+        self.time_index = time_index
+        self.start = None
+        self.carry = None  # bin, sums and count of the last bin, which the next chunk may continue
+
+    def __call__(self, arrays):
+        time = arrays[self.time_index]
+        if self.start is None:
+            self.start = time[0]
+        bins = np.floor((time - self.start) / self.bin_width).astype(np.int64)
+        starts = np.flatnonzero(np.diff(bins, prepend=bins[0] - 1))
+        sums = np.add.reduceat(np.vstack(arrays), starts, axis=1)
+        counts = np.diff(np.append(starts, len(bins))).astype(float)
+        bins = bins[starts]
+        if self.carry is not None:
+            carried_bin, carried_sums, carried_count = self.carry
+            if carried_bin == bins[0]:
+                sums[:, 0] += carried_sums
+                counts[0] += carried_count
+            else:
+                bins = np.insert(bins, 0, carried_bin)
+                sums = np.insert(sums, 0, carried_sums, axis=1)
+                counts = np.insert(counts, 0, carried_count)
+        self.carry = bins[-1], sums[:, -1], counts[-1]
+        return list(sums[:, :-1] / counts[:-1])
+
+    def flush(self):
+        "Averages of the last bin"
+        _, sums, count = self.carry
+        return list(sums[:, None] / count)
+
+
+def iter_breakthrough_chunks(source, columns=DEFAULT_COLUMNS, decimate: int =1, bin_width: float =None, chunk_rows: int =CHUNK_ROWS):
+    """
+    Streams a ";"-separated breakthrough file (a path or a file object, with or without a UTF-8 byte order mark)
+    by chunks of chunk_rows rows, yielding lists of float arrays, one per column of columns (which includes "time").
+
+    Every value must be numeric and finite and the time strictly increasing, or a ValueError gives the faulty line.
+    With decimate, only every decimate-th row is kept; with bin_width, the rows are averaged over consecutive
+    time bins of bin_width seconds (after the decimation).
+    """
+    columns = list(columns)
+    if "time" not in columns:
+        raise ValueError("The columns must include 'time'.")
+    if decimate < 1:
+        raise ValueError("decimate must be a positive integer.")
+    if bin_width is not None and bin_width <= 0:
+        raise ValueError("bin_width must be positive.")
+    binner = _Binner(bin_width, columns.index("time")) if bin_width is not None else None
+    first_row = 0
+    last_time = -np.inf
+    # utf-8-sig drops the byte order mark written by Excel, which would otherwise stick to the first column name
+    # the other columns are skipped, and a column holding a non-numeric value is read as text and reported by _validated
+    reader = pd.read_csv(source, sep=";", encoding="utf-8-sig", chunksize=chunk_rows,
+                         usecols=lambda name: name.strip() in columns)
+    with reader:
+        for chunk in reader:
+            arrays = _validated(chunk, columns, first_row, last_time)
+            last_time = arrays[columns.index("time")][-1]
+            if decimate > 1:
+                arrays = [values[(-first_row) % decimate::decimate] for values in arrays]
+            first_row += len(chunk)
+            if binner is not None and len(arrays[0]):
+                arrays = binner(arrays)
+            yield arrays
+    if first_row == 0:
+        raise ValueError("The file holds no data.")
+    if binner is not None and binner.carry is not None:
+        yield binner.flush()
+
+
+def _cache_key(digest, columns, decimate, bin_width):
+    fields = {"version": CACHE_VERSION, "file": digest, "columns": list(columns), "decimate": decimate,
+              "bin_width": _canonical(bin_width)}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+def _write_columns(directory, chunks, columns):
+    """
+    Writes the streamed chunks as one .npy file per column into directory, the values of every column
+    being first appended to a raw file, so that the memory used is that of a chunk.
+    """
+    raw_files = [open(directory / f"{name}.raw", "wb") for name in columns]
+    length = 0
+    try:
+        for arrays in chunks:
+            for file, values in zip(raw_files, arrays):
+                np.ascontiguousarray(values, dtype="<f8").tofile(file)
+            length += len(arrays[0])
+    finally:
+        for file in raw_files:
+            file.close()
+    for name in columns:
+        raw = directory / f"{name}.raw"
+        with open(directory / f"{name}.npy", "wb") as npy, open(raw, "rb") as values:
+            np.lib.format.write_array_header_1_0(npy, {"descr": "<f8", "fortran_order": False, "shape": (length,)})
+            shutil.copyfileobj(values, npy, 1 << 20)
+        raw.unlink()
+
+
+def load_breakthrough_data(source, columns=DEFAULT_COLUMNS, decimate: int =1, bin_width: float =None, use_cache: bool =True,
+                           cache_dir=None, chunk_rows: int =CHUNK_ROWS, digest: str =None):
+    """
+    Loads a ";"-separated breakthrough file (e.g. data/real_data.csv, given as a path or a binary file object) as a dict
+    of float arrays by column name, streamed by chunks and validated (see iter_breakthrough_chunks).
+
+    The columns are cached in cache_dir (DEFAULT_CACHE_DIR by default) as .npy files, under a key made of the SHA-256 of
+    the content of the file and the options, and returned memory-mapped (read-only): loading a file already parsed
+    costs its hashing, or nothing for a path unchanged since it was last hashed in the process, and the pages
+    are only read when used. The dict can be passed directly to fit_adsorption_parameters_from_df.
+    digest is the SHA-256 of the content of source when the caller already computed it (see file_digest),
+    which is then not hashed again.
+    Without use_cache, or if the cache cannot be written, the columns are returned in memory.
+    """
+    columns = list(columns)
+
+    def chunks():
+        return iter_breakthrough_chunks(source, columns, decimate, bin_width, chunk_rows)
+
+    if not use_cache:
+        return _concatenated(chunks(), columns)
+
+    directory = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+    entry = directory / _cache_key(file_digest(source) if digest is None else digest, columns, decimate, bin_width)
+    if not entry.is_dir():
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            # written to a temporary directory first so that a concurrent reader never sees partial columns
+            tmp_dir = Path(tempfile.mkdtemp(dir=directory, suffix=".tmp"))
+        except OSError:
+            return _concatenated(chunks(), columns)
+        try:
+            _write_columns(tmp_dir, chunks(), columns)
+            os.replace(tmp_dir, entry)
+        except OSError:
+            # another process stored the same entry first
+            if not entry.is_dir():
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return {name: np.load(entry / f"{name}.npy", mmap_mode="r") for name in columns}
+
+
+def _concatenated(chunks, columns):
+    arrays = list(zip(*chunks))
+    return {name: np.concatenate(values) if values else np.empty(0) for name, values in zip(columns, arrays or [()] * len(columns))}
@@ -0,0 +1,147 @@
+import numpy as np
+from scipy.sparse import issparse
+
+# names of the scipy.integrate solvers, scipy.integrate being slow to import it is only imported by integrate
+SOLVERS = ("BDF", "Radau", "LSODA", "RK45", "RK23", "DOP853")
+# solvers using the Jacobian passed with jac
+IMPLICIT_SOLVERS = ("BDF", "Radau", "LSODA")
+
+# maximum number of output times evaluated at once with the dense output of a step,
+# which bounds the temporary full-state array to CHUNK x state size
+CHUNK = 256
+
+
+def _dense(matrix):
+    return matrix.toarray() if issparse(matrix) else matrix
+
+
+class Trajectory:
+    """
+    Output of integrate: the recorded components at the output times, the optional state snapshots,
+    the terminal event, the final state and the statistics of the solver.
+    """
+    def __init__(self, t, recorded, profile_t, profiles, t_event, y_event, t_final, y_final, status, message, nfev, njev, nlu, last_step=None):
+        self.t = t
+        self.recorded = recorded
+        self.profile_t = profile_t
+        self.profiles = profiles
+        self.t_event = t_event
+        self.y_event = y_event
+        self.t_final = t_final
+        self.y_final = y_final
+        self.status = status
+        self.message = message
+        self.nfev = nfev
+        self.njev = njev
+        self.nlu = nlu
+        self.last_step = last_step
+
+
+def integrate(fun, t0, y0, t_bound, t_eval, record, method='BDF', jac=None, rtol=1e-6, atol=1e-9, event=None, profile_every=None, first_step=None):
+    """
+    Integrates dy/dt = fun(t, y) step by step and only keeps the components listed in record.
+    fun may return a buffer that it overwrites at the next call (see BreakthroughKernel).
+
+    Unlike solve_ivp, which stores the full state at every output time, the memory used is O(len(record) x len(t_eval))
+    plus one full state every profile_every output times, if given.
+    The output times are interpolated with the dense output of the steps, like solve_ivp does.
+
+    event is an optional terminal event function event(t, y) with a 'direction' attribute (solve_ivp convention):
+    the integration stops at its root, which is then the last output time.
+
+    first_step is an optional initial step size, e.g. the last_step of the Trajectory of a previous integration
+    that this one continues, which saves the solver the ramp-up from its conservative estimate.
+    """
+    import scipy.integrate
+
+    if method not in SOLVERS:
+        raise ValueError(f"Unknown method '{method}', expected one of {SOLVERS}.")
+    if method not in ("BDF", "LSODA"):
+        # the other solvers keep the returned derivatives across calls, which fun may reuse as an output buffer
+        fun = lambda t, y, fun=fun: np.array(fun(t, y))
+    if jac is not None and method == "LSODA":
+        # LSODA only takes dense Jacobians
+        jac = lambda t, y, jac=jac: _dense(jac(t, y))
+    options ={"jac": jac} if jac is not None and method in IMPLICIT_SOLVERS else {}
+    if first_step is not None:
+        options["first_step"] = min(first_step, t_bound - t0)
+    solver = getattr(scipy.integrate, method)(fun, t0, y0, t_bound, rtol=rtol, atol=atol, **options)
+
+    t_eval = np.asarray(t_eval, dtype=float)
+    record = np.asarray(record, dtype=int)
+    recorded = np.empty((len(record), len(t_eval)))
+    profile_indices = [] if profile_every is None else list(range(0, len(t_eval), profile_every))
+    profiles = np.empty((len(profile_indices), len(y0)))
+    next_profile = 0
+    n_done = 0
+
+    def store(sol, stop):
+        "Record the output times n_done:stop, evaluated in chunks"
+        nonlocal n_done, next_profile
+        for start in range(n_done, stop, CHUNK):
+            end = min(start + CHUNK, stop)
+            y = sol(t_eval[start:end]) if sol is not None else np.repeat(np.asarray(y0)[:, None], end - start, axis=1)
+            recorded[:, start:end] = y[record]
+            while next_profile < len(profile_indices) and profile_indices[next_profile] < end:
+                profiles[next_profile] = y[:, profile_indices[next_profile] - start]
+                next_profile += 1
+        n_done = stop
+
+    # output times at the initial time
+    store(None, np.searchsorted(t_eval, t0, side='right'))
+
+    direction = getattr(event, "direction", 0)
+    g_old = event(t0, np.asarray(y0)) if event is not None else None
+    t_event = y_event = None
+    # the initial state is returned if the first step fails
+    t, y = t0, y0
+    status = None
+    while status is None:
+        message = solver.step()
+        if solver.status == 'failed':
+            status = -1
+            break
+
+        t_old, t = solver.t_old, solver.t
+        y = solver.y
+        sol = None
+        if event is not None:
+            g_new = event(t, y)
+            up = g_old <= 0 <= g_new
+            down = g_old >= 0 >= g_new
+            if (up and direction >= 0 or down and direction <= 0) and g_old != g_new:
+                from scipy.optimize import brentq
+
+                sol = solver.dense_output()
+                t_event = brentq(lambda s: event(s, sol(s)), t_old, t, xtol=4 * np.finfo(float).eps, rtol=4 * np.finfo(float).eps)
+                y_event = sol(t_event)
+                t, y = t_event, y_event
+                status = 1
+            g_old = g_new
+
+        stop = np.searchsorted(t_eval, t, side='right')
+        if stop > n_done:
+            store(sol if sol is not None else solver.dense_output(), stop)
+
+        if status is None and solver.status == 'finished':
+            status = 0
+            message = "The solver successfully reached the end of the integration interval."
+
+    if status == 1:
+        message = "A termination event occurred."
+    return Trajectory(
+        t=t_eval[:n_done],
+        recorded=recorded[:, :n_done],
+        profile_t=t_eval[profile_indices[:next_profile]],
+        profiles=profiles[:next_profile],
+        t_event=t_event,
+        y_event=y_event,
+        t_final=t,
+        y_final=np.array(y),
+        status=status,
+        message=message,
+        nfev=solver.nfev,
+        njev=solver.njev,
+        nlu=solver.nlu,
+        last_step=solver.t - solver.t_old if solver.t_old is not None else None
+    )
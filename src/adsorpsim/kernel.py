@@ -0,0 +1,552 @@
+import importlib.util
+import warnings
+
+import numpy as np
+from scipy import sparse
+
+# numba is an optional dependency, None if it is not installed; as it takes a while to import, it is False
+# until the first numba kernel imports it (see _numba_loops)
+numba = False if importlib.util.find_spec("numba") is not None else None
+
+BACKENDS = ("numpy", "numba")
+# spatial discretisations of the advection term: first-order upwind, second-order TVD with the minmod
+# or van Leer limiter, and third-order WENO
+SCHEMES = ("upwind", "minmod", "van_leer", "weno3")
+
+
+class BreakthroughKernel:
+    """
+    Preallocated right-hand side and Jacobian of the breakthrough model of a Bed.
+
+    The state vector is laid out as [C_1, ..., C_n, q_1, ..., q_n], one block of num_segments values per species.
+    The parameters are given per block (a scalar being shared by all the blocks), so that the blocks may also
+    belong to different beds stacked into one system (see BatchBed). dz may also be given per segment, with the shape
+    (number of blocks, num_segments), for a non-uniform grid (see adsorpsim.mesh).
+    All the constants are computed once, the state is copied into an internal buffer whose views are created once,
+    and the derivatives are written into a single preallocated output buffer, so that a call allocates no array.
+
+    The arrays returned by rhs and jacobian are reused by the next call: they have to be consumed
+    (or copied) before the kernel is called again, which is what the BDF solver of solve_ivp does.
+    """
+    def __init__(self, num_segments: int, velocity, dz, C_in, q_max, K, k_ads, density):
+        n = num_segments
+        ns = len(C_in)
+        self.num_segments = n
+        self.num_species = ns
+
+        def per_segment(value):
+            return np.repeat(np.broadcast_to(np.asarray(value, dtype=float), (ns,)), n)
+
+        # constants of the model, repeated along the segments so that no broadcasting buffer is needed
+        dz = np.asarray(dz, dtype=float)
+        self.adv = per_segment(velocity) / (dz.ravel() if dz.ndim == 2 else per_segment(dz))
+        self._neg_adv = -self.adv
+        self.C_in = np.asarray(C_in, dtype=float)
+        self.K = per_segment(K)
+        self.q_max_K = per_segment(q_max) * self.K
+        self.k_ads = per_segment(k_ads)
+        self.rho_k_ads = per_segment(density) * self.k_ads
+
+        # state buffer and its views
+        self._y = np.zeros(2 * ns * n)
+        self._C = self._y[:ns * n]
+        self._q = self._y[ns * n:]
+        self._C_first = self._C[::n]
+        self._C_head = self._C[:-1]
+        self._C_tail = self._C[1:]
+
+        # output buffer and its views
+        self._out = np.zeros(2 * ns * n)
+        self._dC = self._out[:ns * n]
+        self._dq = self._out[ns * n:]
+        self._dC_first = self._dC[::n]
+        self._dC_tail = self._dC[1:]
+
+        # scratch buffers
+        self._tmp = np.zeros(ns * n)
+        self._tmp2 = np.zeros(ns * n)
+
+        self._build_jacobian_pattern()
+
+    @classmethod
+    def from_bed(cls, bed):
+        "Build the kernel of a Bed from its current parameters"
+        return cls(*cls._bed_arguments(bed))
+
+    @staticmethod
+    def _bed_arguments(bed):
+        "Arguments of the constructor for the current parameters of a Bed"
+        _, C_in, q_max, K, k_ads = (list(values) for values in zip(*bed.species()))
+        return bed.num_segments, bed.velocity, bed.dz, C_in, q_max, K, k_ads, bed.adsorbent.density
+
+    def rhs(self, t, y):
+        "Time derivatives of the state, written into the preallocated output buffer"
+        np.copyto(self._y, y)
+        C, q, tmp, tmp2 = self._C, self._q, self._tmp, self._tmp2
+
+        # tmp = q_eq - q with the Langmuir equilibrium loading q_eq = q_max*K*C / (1 + K*C)
+        np.multiply(C, self.K, out=tmp2)
+        np.add(tmp2, 1.0, out=tmp2)
+        np.divide(C, tmp2, out=tmp)
+        np.multiply(tmp, self.q_max_K, out=tmp)
+        np.subtract(tmp, q, out=tmp)
+        np.multiply(tmp, self.k_ads, out=self._dq)
+
+        # first-order upwind advection along the concatenated species blocks,
+        # the first segment of each block being then corrected with the inlet concentration
+        np.subtract(self._C_tail, self._C_head, out=self._dC_tail)
+        np.subtract(self._C_first, self.C_in, out=self._dC_first)
+        np.multiply(self._dC, self._neg_adv, out=self._dC)
+
+        # mass transferred to the solid phase
+        np.multiply(tmp, self.rho_k_ads, out=tmp)
+        np.subtract(self._dC, tmp, out=self._dC)
+        return self._out
+
+    def _build_jacobian_pattern(self):
+        """
+        Build the fixed sparsity pattern of the Jacobian once.
+
+        The non-zero values are stored in the buffer self._jac_values, grouped by block, and
+        self._jac_perm maps them onto the data array of the CSC matrix.
+        """
+        n, ns = self.num_segments, self.num_species
+        seg = np.arange(n)
+        C_idx = (np.arange(ns)[:, None] * n + seg).ravel()
+        q_idx = C_idx + ns * n
+        C_up_idx = C_idx.reshape(ns, n)[:, 1:].ravel()
+        C_down_idx = C_idx.reshape(ns, n)[:, :-1].ravel()
+
+        rows = np.concatenate([C_idx, q_idx, C_up_idx, C_idx, q_idx])
+        cols = np.concatenate([C_idx, C_idx, C_down_idx, q_idx, q_idx])
+        size = 2 * ns * n
+        order = np.arange(1, len(rows) + 1, dtype=float)
+        pattern = sparse.csc_matrix((order, (rows, cols)), shape=(size, size))
+        self._jac_perm = pattern.data.astype(int) - 1
+        self._jac = pattern
+
+        self._jac_values = np.zeros(len(rows))
+        block = ns * n
+        self._jac_CC = self._jac_values[:block]
+        self._jac_qC = self._jac_values[block:2 * block]
+        # constant blocks: advection sub-diagonal, C–q coupling and desorption term
+        self._jac_values[2 * block:2 * block + ns * (n - 1)] = self.adv[C_up_idx]
+        self._jac_values[2 * block + ns * (n - 1):3 * block + ns * (n - 1)] = self.rho_k_ads
+        self._jac_values[3 * block + ns * (n - 1):] = -self.k_ads
+
+    def jacobian(self, t, y):
+        "Analytic Jacobian of rhs, as a sparse matrix whose values are updated in place"
+        np.copyto(self._y, y)
+        tmp, tmp2 = self._tmp, self._tmp2
+
+        # tmp = dq_eq/dC = q_max*K / (1 + K*C)^2
+        np.multiply(self._C, self.K, out=tmp2)
+        np.add(tmp2, 1.0, out=tmp2)
+        np.multiply(tmp2, tmp2, out=tmp2)
+        np.divide(self.q_max_K, tmp2, out=tmp)
+
+        np.multiply(tmp, self.k_ads, out=self._jac_qC)
+        np.multiply(tmp, self.rho_k_ads, out=self._jac_CC)
+        np.subtract(self._neg_adv, self._jac_CC, out=self._jac_CC)
+
+        np.take(self._jac_values, self._jac_perm, out=self._jac.data)
+        return self._jac
+
+
+def _rhs_loops(y, out, n, ns, adv, C_in, K, q_max_K, k_ads, rho_k_ads):
+    "Explicit loops of BreakthroughKernel.rhs, compiled in nopython mode by numba"
+    offset = ns * n
+    for s in range(ns):
+        C_up = C_in[s]
+        for i in range(s * n, (s + 1) * n):
+            C = y[i]
+            gap = q_max_K[i] * C / (1.0 + K[i] * C) - y[offset + i]
+            out[offset + i] = k_ads[i] * gap
+            out[i] = -adv[i] * (C - C_up) - rho_k_ads[i] * gap
+            C_up = C
+
+
+def _jacobian_loops(y, values, n, ns, adv, K, q_max_K, k_ads, rho_k_ads):
+    "Explicit loops of BreakthroughKernel.jacobian, compiled in nopython mode by numba"
+    block = ns * n
+    for i in range(block):
+        denominator = 1.0 + K[i] * y[i]
+        dq_eq_dC = q_max_K[i] / (denominator * denominator)
+        values[i] = -adv[i] - rho_k_ads[i] * dq_eq_dC
+        values[block + i] = k_ads[i] * dq_eq_dC
+
+
+_compiled_loops = None
+
+
+def _numba_loops():
+    "_rhs_loops and _jacobian_loops wrapped by numba.njit, numba being imported on the first call"
+    global numba, _compiled_loops
+    if _compiled_loops is None:
+        import numba
+
+        _compiled_loops = numba.njit(cache=True)(_rhs_loops), numba.njit(cache=True)(_jacobian_loops)
+    return _compiled_loops
+
+
+class NumbaBreakthroughKernel(BreakthroughKernel):
+    """
+    BreakthroughKernel whose right-hand side and Jacobian values are computed by numba-compiled loops.
+
+    The loops run over the state directly, which removes the overhead of the dozen of NumPy calls per evaluation.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._rhs_loops, self._jacobian_loops = _numba_loops()
+
+    def rhs(self, t, y):
+        "Time derivatives of the state, written into the preallocated output buffer"
+        self._rhs_loops(y, self._out, self.num_segments, self.num_species, self.adv,
+                   self.C_in, self.K, self.q_max_K, self.k_ads, self.rho_k_ads)
+        return self._out
+
+    def jacobian(self, t, y):
+        "Analytic Jacobian of rhs, as a sparse matrix whose values are updated in place"
+        self._jacobian_loops(y, self._jac_values, self.num_segments, self.num_species, self.adv,
+                        self.K, self.q_max_K, self.k_ads, self.rho_k_ads)
+        np.take(self._jac_values, self._jac_perm, out=self._jac.data)
+        return self._jac
+
+
+class HighOrderBreakthroughKernel(BreakthroughKernel):
+    """
+    BreakthroughKernel whose advection term is discretised with a higher-order finite-volume scheme.
+
+    The gas concentration at the face i+1/2 between the segments i and i+1 is reconstructed from C_(i-1), C_i and C_(i+1)
+    (the flow going towards increasing i), either with a TVD limiter ("minmod" or "van_leer", second order)
+    or with a WENO3 weighting of two linear reconstructions (third order where the profile is smooth),
+    and dC_i/dt = -v/dz (C_(i+1/2) - C_(i-1/2)). The inlet face takes the inlet concentration, the concentration
+    upstream of the inlet being the inlet one, and the concentration is extrapolated as constant past the outlet.
+    These schemes are far less diffusive than the upwind one, so that the same front sharpness needs fewer segments.
+
+    The Jacobian has the same adsorption terms as the upwind one, and its banded advection block
+    (the segments i-2 to i+1 for the segment i) is estimated by finite differences of the advection term
+    perturbing every fourth segment at once, i.e. with four evaluations.
+    """
+    def __init__(self, num_segments: int, velocity, dz, C_in, q_max, K, k_ads, density, scheme: str ="van_leer"):
+        if scheme not in SCHEMES[1:]:
+            raise ValueError(f"Unknown high-order scheme '{scheme}', expected one of {SCHEMES[1:]}.")
+        self.scheme = scheme
+        super().__init__(num_segments, velocity, dz, C_in, q_max, K, k_ads, density)
+        n, ns = self.num_segments, self.num_species
+        # the concentrations of every species with two ghost segments upstream and one downstream
+        self._ext = np.zeros((ns, n + 3))
+        self._ext[:, :2] = self.C_in[:, None]
+        self._ext_C = self._ext[:, 2:n + 2]
+        self._back = self._ext[:, :n + 1]
+        self._centre = self._ext[:, 1:n + 2]
+        self._front = self._ext[:, 2:n + 3]
+        self._d_minus = np.zeros((ns, n + 1))
+        self._d_plus = np.zeros((ns, n + 1))
+        self._faces = np.zeros((ns, n + 1))
+        self._work = np.zeros((ns, n + 1))
+        self._work2 = np.zeros((ns, n + 1))
+        self._advection_out = np.zeros(ns * n)
+        # WENO smoothness offset, scaled like the squared concentration differences
+        self._epsilon = 1e-6 * self.C_in[:, None] ** 2
+        self._C_scale = np.repeat(self.C_in, n)
+
+    @classmethod
+    def from_bed(cls, bed):
+        "Build the kernel of a Bed from its current parameters and scheme"
+        return cls(*cls._bed_arguments(bed), scheme=bed.scheme)
+
+    def _advection(self, C):
+        "Advection term -v/dz (C_(i+1/2) - C_(i-1/2)) of the concentrations C, written into a preallocated buffer"
+        ext, d_minus, d_plus, faces, work, work2 = self._ext, self._d_minus, self._d_plus, self._faces, self._work, self._work2
+        np.copyto(self._ext_C, C.reshape(self.num_species, self.num_segments))
+        ext[:, -1] = ext[:, -2]
+        np.subtract(self._centre, self._back, out=d_minus)
+        np.subtract(self._front, self._centre, out=d_plus)
+
+        if self.scheme == "weno3":
+            # the candidate faces C_i + d_minus/2 (from the segments i-1, i) and C_i + d_plus/2 (from i, i+1)
+            # are weighted by 1/3 and 2/3 where the profile is smooth, and towards the smoothest one across a front
+            np.multiply(d_minus, d_minus, out=work)
+            np.add(work, self._epsilon, out=work)
+            np.multiply(work, work, out=work)
+            np.divide(1.0 / 3.0, work, out=work)
+            np.multiply(d_plus, d_plus, out=work2)
+            np.add(work2, self._epsilon, out=work2)
+            np.multiply(work2, work2, out=work2)
+            np.divide(2.0 / 3.0, work2, out=work2)
+            np.multiply(work, d_minus, out=faces)
+            np.multiply(work2, d_plus, out=d_minus)
+            np.add(faces, d_minus, out=faces)
+            np.add(work, work2, out=work)
+            np.divide(faces, work, out=faces)
+        elif self.scheme == "minmod":
+            # minmod(d_minus, d_plus): the smallest slope when both have the same sign, zero otherwise
+            np.abs(d_minus, out=work)
+            np.abs(d_plus, out=work2)
+            np.minimum(work, work2, out=work)
+            np.sign(d_plus, out=work2)
+            np.multiply(work, work2, out=faces)
+            np.multiply(d_minus, d_plus, out=work)
+            np.greater(work, 0, out=work)
+            np.multiply(faces, work, out=faces)
+        else:
+            # van Leer: the harmonic mean 2 d_minus d_plus / (d_minus + d_plus) when both have the same sign, zero otherwise
+            # (the sum only vanishes where the product is not positive, and is then replaced by one)
+            np.multiply(d_minus, d_plus, out=faces)
+            np.maximum(faces, 0, out=faces)
+            np.add(d_minus, d_plus, out=work)
+            np.equal(work, 0, out=work2)
+            np.add(work, work2, out=work)
+            np.divide(faces, work, out=faces)
+            np.multiply(faces, 2.0, out=faces)
+        # faces = C_i + slope / 2 (the WENO weighting already holds twice the slope)
+        np.multiply(faces, 0.5, out=faces)
+        np.add(faces, self._centre, out=faces)
+        faces[:, 0] = self.C_in
+
+        out = self._advection_out.reshape(self.num_species, self.num_segments)
+        np.subtract(faces[:, 1:], faces[:, :-1], out=out)
+        np.multiply(self._advection_out, self._neg_adv, out=self._advection_out)
+        return self._advection_out
+
+    def rhs(self, t, y):
+        "Time derivatives of the state, written into the preallocated output buffer"
+        np.copyto(self._y, y)
+        C, q, tmp, tmp2 = self._C, self._q, self._tmp, self._tmp2
+
+        # tmp = q_eq - q with the Langmuir equilibrium loading q_eq = q_max*K*C / (1 + K*C)
+        np.multiply(C, self.K, out=tmp2)
+        np.add(tmp2, 1.0, out=tmp2)
+        np.divide(C, tmp2, out=tmp)
+        np.multiply(tmp, self.q_max_K, out=tmp)
+        np.subtract(tmp, q, out=tmp)
+        np.multiply(tmp, self.k_ads, out=self._dq)
+
+        np.copyto(self._dC, self._advection(C))
+        np.multiply(tmp, self.rho_k_ads, out=tmp)
+        np.subtract(self._dC, tmp, out=self._dC)
+        return self._out
+
+    def _build_jacobian_pattern(self):
+        """
+        Build the fixed sparsity pattern of the Jacobian once, and the perturbation groups of the advection block.
+
+        The values are stored like those of BreakthroughKernel: the C-C diagonal, the q-C diagonal,
+        the advection off-diagonals, the C-q diagonal and the q-q diagonal.
+        """
+        n, ns = self.num_segments, self.num_species
+        block = ns * n
+        seg = np.tile(np.arange(n), ns)
+        C_idx = np.arange(block)
+        q_idx = C_idx + block
+
+        # off-diagonal advection entries (row, column) of the segments i-2, i-1 and i+1 within every species
+        off_rows, off_cols = [], []
+        for offset in (-2, -1, 1):
+            valid = (seg + offset >= 0) & (seg + offset < n)
+            off_rows.append(C_idx[valid])
+            off_cols.append(C_idx[valid] + offset)
+        off_rows = np.concatenate(off_rows)
+        off_cols = np.concatenate(off_cols)
+
+        rows = np.concatenate([C_idx, q_idx, off_rows, C_idx, q_idx])
+        cols = np.concatenate([C_idx, C_idx, off_cols, q_idx, q_idx])
+        size = 2 * block
+        order = np.arange(1, len(rows) + 1, dtype=float)
+        pattern = sparse.csc_matrix((order, (rows, cols)), shape=(size, size))
+        self._jac_perm = pattern.data.astype(int) - 1
+        self._jac = pattern
+
+        self._jac_values = np.zeros(len(rows))
+        self._jac_CC = self._jac_values[:block]
+        self._jac_qC = self._jac_values[block:2 * block]
+        self._jac_off = self._jac_values[2 * block:2 * block + len(off_rows)]
+        self._jac_values[2 * block + len(off_rows):3 * block + len(off_rows)] = self.rho_k_ads
+        self._jac_values[3 * block + len(off_rows):] = -self.k_ads
+
+        # the advection entries of a column: the diagonal one and the off-diagonal ones, grouped by column colour
+        all_rows = np.concatenate([C_idx, off_rows])
+        all_cols = np.concatenate([C_idx, off_cols])
+        self._colours = []
+        for colour in range(4):
+            entries = np.flatnonzero(seg[all_cols] % 4 == colour)
+            self._colours.append((C_idx[seg % 4 == colour], all_rows[entries], all_cols[entries], entries))
+        self._jac_adv = np.zeros(len(all_rows))
+        self._C_step = np.zeros(block)
+
+    def jacobian(self, t, y):
+        "Jacobian of rhs, as a sparse matrix whose values are updated in place"
+        np.copyto(self._y, y)
+        C, tmp, tmp2 = self._C, self._tmp, self._tmp2
+
+        # advection block by finite differences, four columns apart being perturbed at once
+        base = self._advection(C).copy()
+        step = np.sqrt(np.finfo(float).eps) * np.maximum(np.abs(C), self._C_scale)
+        for columns, rows, cols, entries in self._colours:
+            np.copyto(self._C_step, C)
+            self._C_step[columns] += step[columns]
+            self._jac_adv[entries] = (self._advection(self._C_step)[rows] - base[rows]) / step[cols]
+
+        # tmp = dq_eq/dC = q_max*K / (1 + K*C)^2
+        np.multiply(C, self.K, out=tmp2)
+        np.add(tmp2, 1.0, out=tmp2)
+        np.multiply(tmp2, tmp2, out=tmp2)
+        np.divide(self.q_max_K, tmp2, out=tmp)
+
+        block = self.num_species * self.num_segments
+        np.multiply(tmp, self.k_ads, out=self._jac_qC)
+        np.multiply(tmp, self.rho_k_ads, out=self._jac_CC)
+        np.subtract(self._jac_adv[:block], self._jac_CC, out=self._jac_CC)
+        self._jac_off[:] = self._jac_adv[block:]
+
+        np.take(self._jac_values, self._jac_perm, out=self._jac.data)
+        return self._jac
+
+
+class CompetitiveBreakthroughKernel(BreakthroughKernel):
+    """
+    BreakthroughKernel with competitive (extended Langmuir) isotherms: the species of a bed share the adsorption sites,
+    q_eq_i = q_max_i K_i C_i / (1 + Σ_j K_j C_j), the sum running over the species in the same segment of the same bed.
+
+    The blocks are laid out species-major, the block s * num_beds + b holding the species s of the bed b (as in BatchBed),
+    num_beds being the number of blocks divided by num_competing, the number of species of every bed
+    (all the blocks belong to one bed by default). The concentrations are thus handled as a (species, beds x segments)
+    array, and the sum over the species is one reduction along its first axis.
+
+    The Jacobian is block-sparse: the C and q rows of a species also depend on the concentrations of the other species
+    of its bed in the same segment, i.e. the C–C and q–C blocks of every pair of species are diagonal.
+    """
+    def __init__(self, num_segments: int, velocity, dz, C_in, q_max, K, k_ads, density, num_competing: int =None):
+        self.num_competing = len(C_in) if num_competing is None else num_competing
+        if len(C_in) % self.num_competing != 0:
+            raise ValueError("The number of blocks must be a multiple of the number of competing species.")
+        super().__init__(num_segments, velocity, dz, C_in, q_max, K, k_ads, density)
+        ns = self.num_competing
+        m = len(self._C) // ns
+        # (species, beds x segments) views of the state and of the constants, and their buffers
+        self._C_grid = self._C.reshape(ns, m)
+        self._q_grid = self._q.reshape(ns, m)
+        self._K_grid = self.K.reshape(ns, m)
+        self._q_max_K_grid = self.q_max_K.reshape(ns, m)
+        self._tmp_grid = self._tmp.reshape(ns, m)
+        self._tmp2_grid = self._tmp2.reshape(ns, m)
+        self._denominator = np.zeros(m)
+        self._coupling = np.zeros((ns, ns, m))
+
+    def rhs(self, t, y):
+        "Time derivatives of the state, written into the preallocated output buffer"
+        np.copyto(self._y, y)
+        tmp = self._tmp
+
+        # denominator 1 + Σ_j K_j C_j of every segment, then tmp = q_eq - q
+        np.multiply(self._C_grid, self._K_grid, out=self._tmp2_grid)
+        np.sum(self._tmp2_grid, axis=0, out=self._denominator)
+        np.add(self._denominator, 1.0, out=self._denominator)
+        np.divide(self._C_grid, self._denominator, out=self._tmp_grid)
+        np.multiply(tmp, self.q_max_K, out=tmp)
+        np.subtract(tmp, self._q, out=tmp)
+        np.multiply(tmp, self.k_ads, out=self._dq)
+
+        # first-order upwind advection, as in BreakthroughKernel.rhs
+        np.subtract(self._C_tail, self._C_head, out=self._dC_tail)
+        np.subtract(self._C_first, self.C_in, out=self._dC_first)
+        np.multiply(self._dC, self._neg_adv, out=self._dC)
+
+        np.multiply(tmp, self.rho_k_ads, out=tmp)
+        np.subtract(self._dC, tmp, out=self._dC)
+        return self._out
+
+    def _build_jacobian_pattern(self):
+        """
+        Build the fixed sparsity pattern of the Jacobian once.
+
+        The values are stored like those of BreakthroughKernel, the C–C and q–C diagonals being replaced by
+        the (species, species, beds x segments) coupling blocks.
+        """
+        n, ns = self.num_segments, self.num_competing
+        block = len(self.C_in) * n
+        m = block // ns
+        C_idx = np.arange(block)
+        q_idx = C_idx + block
+        C_blocks = C_idx.reshape(len(self.C_in), n)
+        C_up_idx = C_blocks[:, 1:].ravel()
+        C_down_idx = C_blocks[:, :-1].ravel()
+        # the entry (i, j, k) couples the species i to the species j in the segment k of the (species, beds x segments) grid
+        species_i, species_j, cell = np.meshgrid(np.arange(ns), np.arange(ns), np.arange(m), indexing='ij')
+        coupling_rows = (species_i * m + cell).ravel()
+        coupling_cols = (species_j * m + cell).ravel()
+
+        rows = np.concatenate([coupling_rows, coupling_rows + block, C_up_idx, C_idx, q_idx])
+        cols = np.concatenate([coupling_cols, coupling_cols, C_down_idx, q_idx, q_idx])
+        size = 2 * block
+        order = np.arange(1, len(rows) + 1, dtype=float)
+        pattern = sparse.csc_matrix((order, (rows, cols)), shape=(size, size))
+        self._jac_perm = pattern.data.astype(int) - 1
+        self._jac = pattern
+
+        self._jac_values = np.zeros(len(rows))
+        couplings = ns * ns * m
+        self._jac_CC = self._jac_values[:couplings].reshape(ns, ns, m)
+        self._jac_qC = self._jac_values[couplings:2 * couplings].reshape(ns, ns, m)
+        offset = 2 * couplings
+        self._jac_values[offset:offset + len(C_up_idx)] = self.adv[C_up_idx]
+        offset += len(C_up_idx)
+        self._jac_values[offset:offset + block] = self.rho_k_ads
+        self._jac_values[offset + block:] = -self.k_ads
+        self._diagonal = np.arange(ns)
+
+    def jacobian(self, t, y):
+        "Analytic Jacobian of rhs, as a sparse matrix whose values are updated in place"
+        np.copyto(self._y, y)
+        ns = self.num_competing
+        m = len(self._denominator)
+        coupling = self._coupling
+
+        np.multiply(self._C_grid, self._K_grid, out=self._tmp2_grid)
+        np.sum(self._tmp2_grid, axis=0, out=self._denominator)
+        np.add(self._denominator, 1.0, out=self._denominator)
+        np.divide(1.0, self._denominator, out=self._denominator)
+
+        # dq_eq_i/dC_j = q_max_i K_i (δ_ij / D - C_i K_j / D²) with D = 1 + Σ_k K_k C_k
+        np.multiply(self._q_max_K_grid, self._C_grid, out=self._tmp_grid)
+        np.multiply(self._tmp_grid, self._denominator, out=self._tmp_grid)
+        np.multiply(self._tmp_grid, self._denominator, out=self._tmp_grid)
+        np.multiply(self._tmp_grid[:, None, :], self._K_grid[None, :, :], out=coupling)
+        np.negative(coupling, out=coupling)
+        coupling[self._diagonal, self._diagonal] += self._q_max_K_grid * self._denominator
+
+        np.multiply(coupling, self.k_ads.reshape(ns, 1, m), out=self._jac_qC)
+        np.multiply(coupling, self.rho_k_ads.reshape(ns, 1, m), out=self._jac_CC)
+        np.negative(self._jac_CC, out=self._jac_CC)
+        self._jac_CC[self._diagonal, self._diagonal] += self._neg_adv.reshape(ns, m)
+
+        np.take(self._jac_values, self._jac_perm, out=self._jac.data)
+        return self._jac
+
+
+def kernel_class(backend: str, scheme: str ="upwind", competitive: bool =False):
+    """
+    Returns the kernel class implementing a backend ("numpy" or "numba"), a spatial scheme (see SCHEMES)
+    and independent or competitive isotherms.
+
+    The NumPy kernel is returned with a warning when numba is requested but not installed.
+    The higher-order schemes and the competitive isotherms are only implemented with NumPy, whatever the backend,
+    and the competitive isotherms only with the upwind scheme.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}.")
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown scheme '{scheme}', expected one of {SCHEMES}.")
+    if competitive:
+        if scheme != "upwind":
+            raise ValueError("The competitive isotherms are only implemented with the upwind scheme.")
+        return CompetitiveBreakthroughKernel
+    if scheme != "upwind":
+        return HighOrderBreakthroughKernel
+    if backend == "numba":
+        if numba is None:
+            warnings.warn("numba is not installed, the NumPy backend is used instead.")
+            return BreakthroughKernel
+        return NumbaBreakthroughKernel
+    return BreakthroughKernel
@@ -0,0 +1,285 @@
+import bisect
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from adsorpsim.similarity import _species_names, residence_time, solve_dimensionless
+
+# bump when the model or the layout of the files changes, older libraries are then refused
+LIBRARY_VERSION = 1
+DEFAULT_LIBRARY_PATH = Path(__file__).resolve().parent / "data" / "breakthrough_library"
+
+# grid of the default library: the number of segments, the stoichiometric ratio R = Γ α / (1 + α),
+# the affinity α = K C_in and the Damköhler number Da = k_ads L / v (see similarity.dimensionless_groups)
+DEFAULT_AXES = {
+    "num_segments": [10, 20, 50, 100, 200, 500],
+    "ratio": list(np.logspace(-1, 4.5, 12)),
+    "affinity": [1e-3, 1e-1, 1.0],
+    "damkohler": list(np.logspace(-3, 3, 13)),
+}
+# reduced time x = s / (1 + R), the breakthrough of an equilibrium bed being at x = 1
+DEFAULT_X = list(np.linspace(0, 3, 301))
+# the curves c = C / C_in in [0, 1] are stored as 16-bit integers
+SCALE = np.iinfo(np.uint16).max
+# initial guess [q_max_CO2, K_CO2, k_ads_CO2] of the fitters when no library is available
+FALLBACK_GUESS = [4.0, 0.2, 1]
+
+
+def _solve_node(num_segments, ratio, affinity, damkohler, x):
+    "Dimensionless outlet curve of one node of the grid at the reduced times x"
+    groups = {
+        "num_segments": int(num_segments),
+        "capacity_CO2": ratio * (1 + affinity) / affinity,
+        "affinity_CO2": affinity,
+        "damkohler_CO2": damkohler,
+    }
+    trajectory = solve_dimensionless(groups, np.asarray(x) * (1 + ratio), rtol=1e-6, atol=1e-8)
+    if trajectory.status != 0:
+        raise RuntimeError(f"The integration of {groups} failed: {trajectory.message}")
+    return trajectory.recorded[0]
+
+
+def build_library(path=DEFAULT_LIBRARY_PATH, axes: dict =DEFAULT_AXES, x=DEFAULT_X, max_workers: int =None, progress=None):
+    """
+    Solves the dimensionless model at every node of the grid axes and writes the library to the directory path:
+    curves.npy (the quantized curves, of shape (*grid, len(x))), errors.npy (the interpolation error estimates)
+    and meta.json (the version, the axes and the reduced times).
+
+    This is done offline, e.g. with python -m adsorpsim.library, as it takes a few minutes for the default grid.
+    The nodes are solved in a process pool (in this process when max_workers is 1),
+    and progress(done, total) is called after every node if given.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    names = list(DEFAULT_AXES)
+    shape = tuple(len(axes[name]) for name in names)
+    nodes = list(np.ndindex(shape))
+    tasks = [[axes[name][i] for name, i in zip(names, node)] + [x] for node in nodes]
+    curves = np.empty(shape + (len(x),))
+
+    if max_workers == 1:
+        results = (_solve_node(*task) for task in tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        results = executor.map(_solve_node, *zip(*tasks), chunksize=8)
+    try:
+        for done, (node, curve) in enumerate(zip(nodes, results), start=1):
+            curves[node] = curve
+            if progress is not None:
+                progress(done, len(nodes))
+    finally:
+        if max_workers != 1:
+            executor.shutdown()
+
+    np.save(path / "curves.npy", np.round(np.clip(curves, 0, 1) * SCALE).astype(np.uint16))
+    np.save(path / "errors.npy", _interpolation_errors(curves).astype(np.float32))
+    meta = {"version": LIBRARY_VERSION, "axes": {name: [float(value) for value in axes[name]] for name in names},
+            "x": [float(value) for value in x]}
+    (path / "meta.json").write_text(json.dumps(meta, indent=1))
+    return BreakthroughLibrary(path)
+
+
+def _interpolation_errors(curves):
+    """
+    Estimate of the error of the linear interpolation along every axis around every node (shape (*grid, number of axes)):
+    |f(i-1) - 2 f(i) + f(i+1)| / 8, maximised over the reduced times, the error bound of the linear interpolation of a
+    function being h² max|f''| / 8. The nodes on a boundary take the estimate of their inner neighbour.
+    """
+    ndim = curves.ndim - 1
+    errors = np.zeros(curves.shape[:-1] + (ndim,))
+    for axis in range(ndim):
+        if curves.shape[axis] < 3:
+            continue
+        second = np.abs(np.diff(curves, n=2, axis=axis)).max(axis=-1) / 8
+        errors[..., axis] = np.concatenate([second.take([0], axis=axis), second, second.take([-1], axis=axis)], axis=axis)
+    return errors
+
+
+class BreakthroughLibrary:
+    """
+    Precomputed dimensionless breakthrough curves, interpolated multilinearly in the logarithm of the grid axes.
+
+    The arrays are memory-mapped, so that loading the library is instantaneous and only the nodes
+    actually used are read from disk.
+    """
+    def __init__(self, path=DEFAULT_LIBRARY_PATH):
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        if meta["version"] != LIBRARY_VERSION:
+            raise ValueError(f"The library at {path} has version {meta['version']}, expected {LIBRARY_VERSION}: rebuild it.")
+        self.path = path
+        self.axes = {name: np.array(values) for name, values in meta["axes"].items()}
+        self._log_axes = [np.log(values).tolist() for values in self.axes.values()]
+        self.x = np.array(meta["x"])
+        self.curves = np.load(path / "curves.npy", mmap_mode="r")
+        self.errors = np.load(path / "errors.npy", mmap_mode="r")
+
+    def _corners(self, values):
+        "Lower indices and weights of the 2^d nodes surrounding a point, and whether it lies outside the grid (per axis)"
+        lower, weight, outside = [], [], []
+        for log_axis, value in zip(self._log_axes, values):
+            log_value = math.log(value)
+            i = min(max(bisect.bisect_left(log_axis, log_value) - 1, 0), len(log_axis) - 2)
+            w = (log_value - log_axis[i]) / (log_axis[i + 1] - log_axis[i])
+            outside.append(not 0 <= w <= 1)
+            lower.append(i)
+            weight.append(min(max(w, 0.0), 1.0))
+        return lower, weight, outside
+
+    def curve(self, num_segments, ratio, affinity, damkohler):
+        """
+        Interpolated dimensionless curve c(x) at the reduced times self.x and an estimate of its maximum absolute error.
+
+        Below the smallest affinity of the grid the isotherm is linear and the curve of the smallest affinity is used.
+        The estimate is infinite if another parameter lies outside the grid.
+        """
+        lower, weight, outside = self._corners([num_segments, ratio, max(affinity, self.axes["affinity"][0]), damkohler])
+        cell = tuple(slice(i, i + 2) for i in lower)
+        # the hypercube of the 2^d surrounding curves is contracted one axis at a time
+        curve = self.curves[cell].astype(float)
+        for w in weight:
+            curve = (1 - w) * curve[0] + w * curve[1]
+        curve /= SCALE
+        # largest estimate of the surrounding nodes, plus the quantization error of the stored curves
+        error = float(self.errors[cell].sum(axis=-1).max()) + 0.5 / SCALE
+        if any(outside):
+            error = np.inf
+        return curve, error
+
+    def outlet(self, groups, s):
+        """
+        Interpolated outlet curves of every species of the dimensionless problem groups (see similarity.dimensionless_groups)
+        at the dimensionless times s, one row per species, and the estimate of their maximum absolute error.
+        Beyond the reduced times of the library the curves are extended by their last value.
+        The curve of a species without capacity, affinity or adsorption rate is not looked up but computed exactly.
+        """
+        curves, errors = [], []
+        for name in _species_names(groups):
+            affinity = groups[f"affinity_{name}"]
+            ratio = groups[f"capacity_{name}"] * affinity / (1 + affinity)
+            if ratio == 0 or groups[f"damkohler_{name}"] == 0:
+                # a species that is not adsorbed (e.g. H₂O on an adsorbent without H₂O parameters) has an exact curve
+                curves.append(_non_adsorbed_outlet(groups["num_segments"], s))
+                errors.append(0.0)
+                continue
+            curve, error = self.curve(groups["num_segments"], ratio, affinity, groups[f"damkohler_{name}"])
+            x = np.asarray(s) / (1 + ratio)
+            if x[-1] > self.x[-1]:
+                error = max(error, 1 - curve[-1])
+            curves.append(np.interp(x, self.x, curve))
+            errors.append(error)
+        return np.array(curves), np.array(errors)
+
+
+def _non_adsorbed_outlet(num_segments, s):
+    """
+    Dimensionless outlet curve at the dimensionless times s of a species that is not adsorbed: the segments downstream
+    of the first one (initially at the inlet concentration) are mixed tanks in series, whose outlet is the regularized
+    lower incomplete gamma function P(n - 1, n s)
+    """
+    from scipy.special import gammainc  # imported here as it takes a while to import
+
+    s = np.asarray(s, dtype=float)
+    if num_segments == 1:
+        return np.ones_like(s)
+    return gammainc(num_segments - 1, num_segments * s)
+
+
+def preview(bed, library=None):
+    """
+    Approximate breakthrough of a bed interpolated from the library (see Bed.simulate(mode="preview")),
+    as a SimulationResult whose error_estimate holds the estimated maximum absolute error of every outlet curve (mol/m³).
+    The library holds upwind curves, so the scheme of the bed is not taken into account, of independent species,
+    so that competitive adsorbents are not supported.
+    """
+    from adsorpsim.core import SimulationResult  # imported here as adsorpsim.core uses this module
+    from adsorpsim.similarity import dimensionless_groups
+
+    if bed.adsorbent.competitive:
+        raise ValueError("The library holds no curves of competing species.")
+    library = default_library() if library is None else library
+    if library is None:
+        raise FileNotFoundError(f"No breakthrough library found at {DEFAULT_LIBRARY_PATH}, build it with build_library.")
+    t = np.linspace(0, bed.total_time, bed.total_time)
+    outlets, errors = library.outlet(dimensionless_groups(bed), t / residence_time(bed))
+    species = bed.species()
+    C_in = np.array([C_in for _, C_in, _, _, _ in species])
+    result = SimulationResult.from_outlets(t, [name for name, _, _, _, _ in species], outlets * C_in[:, None])
+    result.error_estimate = errors * C_in
+    return result
+
+
+def initial_guess(bed, density, t_exp, outlet_CO2_exp, library=None):
+    """
+    [q_max_CO2, K_CO2, k_ads_CO2] whose library curve (at the number of segments of bed) best matches the experimental
+    CO₂ breakthrough, in the least-squares sense, or None if no library is available or if the number of segments
+    of bed lies outside its grid. Used to seed the fitters.
+
+    The best node of the grid is refined with a Nelder-Mead search on the interpolated curves, which takes milliseconds.
+    As very different parameters give almost the same curve at low affinity, the node closest to FALLBACK_GUESS is taken
+    among those within 1 % of the best match, and its affinity is kept.
+    """
+    library = default_library() if library is None else library
+    if library is None or not library.axes["num_segments"][0] <= bed.num_segments <= library.axes["num_segments"][-1]:
+        return None
+    C_in = bed.initial_conc_CO2
+    tau = residence_time(bed)
+    ratio, affinity, damkohler = (library.axes[name] for name in ("ratio", "affinity", "damkohler"))
+
+    # curves of all the (ratio, affinity, damkohler) nodes, interpolated at the number of segments of the bed
+    lower, weight, _ = library._corners([bed.num_segments, ratio[0], affinity[0], damkohler[0]])
+    i, w = lower[0], weight[0]
+    curves = ((1 - w) * library.curves[i] + w * library.curves[i + 1]) / SCALE
+
+    s = np.asarray(t_exp, dtype=float) / tau
+    nodes = list(np.ndindex(curves.shape[:-1]))
+    errors = np.array([np.mean((np.interp(s / (1 + ratio[node[0]]), library.x, curves[node]) * C_in - outlet_CO2_exp) ** 2)
+                       for node in nodes])
+    guesses = np.array([_parameters(ratio[i], affinity[j], damkohler[k], C_in, density, tau) for i, j, k in nodes])
+    # very different parameters give almost the same curve (e.g. along a constant ratio at low affinity):
+    # among the nodes within 1 % of the best match, the closest to the usual guess is taken
+    close = np.flatnonzero(errors <= errors.min() * 1.01)
+    distance = np.abs(np.log(guesses[close] / FALLBACK_GUESS)).sum(axis=1)
+    i, j, k = nodes[close[np.argmin(distance)]]
+
+    # the ratio and the Damköhler number are then refined between the nodes on the interpolated curves,
+    # which costs no ODE solve (the affinity, often poorly determined, is kept)
+    a = affinity[j]
+    bounds = np.log([[ratio[0], ratio[-1]], [damkohler[0], damkohler[-1]]])
+
+    def loss(log_groups):
+        R, Da = np.exp(np.clip(log_groups, bounds[:, 0], bounds[:, 1]))
+        curve, _ = library.curve(bed.num_segments, R, a, Da)
+        return np.mean((np.interp(s / (1 + R), library.x, curve) * C_in - outlet_CO2_exp) ** 2)
+
+    from scipy.optimize import minimize  # imported here as it takes a while to import
+
+    result = minimize(loss, np.log([ratio[i], damkohler[k]]), method='Nelder-Mead')
+    R, Da = np.exp(np.clip(result.x, bounds[:, 0], bounds[:, 1]))
+    return _parameters(R, a, Da, C_in, density, tau)
+
+
+def _parameters(ratio, affinity, damkohler, C_in, density, tau):
+    "[q_max, K, k_ads] of a species with the given dimensionless groups"
+    capacity = ratio * (1 + affinity) / affinity
+    return [capacity * C_in / density, affinity / C_in, damkohler / tau]
+
+_default_library = {}
+
+
+def default_library():
+    "The library shipped in adsorpsim/data (loaded once), or None if it is missing or outdated"
+    if "library" not in _default_library:
+        try:
+            _default_library["library"] = BreakthroughLibrary(DEFAULT_LIBRARY_PATH)
+        except (OSError, ValueError):
+            _default_library["library"] = None
+    return _default_library["library"]
+
+
+if __name__ == "__main__":
+    build_library(progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True))
+    print()
@@ -0,0 +1,152 @@
+import numpy as np
+
+from adsorpsim.integrate import integrate
+from adsorpsim.kernel import kernel_class
+
+
+def remap(values, old_edges, new_edges):
+    """
+    Conservative remapping of cell averages (one row per profile) from the cells bounded by old_edges
+    to those bounded by new_edges, both grids spanning the same interval.
+
+    The cumulative integral of the piecewise constant profile is linear within every old cell, so that its linear
+    interpolation at the new edges is exact: the integral of every profile over the bed is kept to round-off.
+    """
+    values = np.atleast_2d(values)
+    cumulative = np.zeros((len(values), len(old_edges)))
+    np.cumsum(values * np.diff(old_edges), axis=1, out=cumulative[:, 1:])
+    remapped = np.empty((len(values), len(new_edges) - 1))
+    for row in range(len(values)):
+        remapped[row] = np.diff(np.interp(new_edges, old_edges, cumulative[row]))
+    return remapped / np.diff(new_edges)
+
+
+def _window_max(values, edges, centres, reach):
+    """
+    Largest of the values of the cells bounded by edges which come within reach of the centre of every cell.
+
+    These cells are contiguous, their bounds being found by searchsorted over the sorted edges, and the maximum
+    over every such window is that of two overlapping power-of-two blocks of a table of running maxima,
+    in O(n log n) time and memory instead of the O(n²) of comparing every pair of cells.
+    """
+    first = np.searchsorted(edges[1:], centres - reach, side='left')
+    stop = np.searchsorted(edges[:-1], centres + reach, side='right')
+    # every cell is within reach of its own centre
+    first = np.minimum(first, np.arange(len(values)))
+    stop = np.maximum(stop, np.arange(1, len(values) + 1))
+    # table[k][j] is the largest of values[j:j + 2**k]
+    table = [np.asarray(values, dtype=float)]
+    while 2 ** len(table) <= len(values):
+        half = 2 ** (len(table) - 1)
+        table.append(np.maximum(table[-1][:-half], table[-1][half:]))
+    level = np.floor(np.log2(stop - first)).astype(np.intp)
+    size = 1 << level
+    monitor = np.empty(len(values))
+    for k in np.unique(level):
+        cells = level == k
+        monitor[cells] = np.maximum(table[k][first[cells]], table[k][stop[cells] - size[cells]])
+    return monitor
+
+
+def equidistributed_edges(edges, profiles, reach):
+    """
+    Edges of a new grid with the same number of cells, concentrating them where the normalised profiles
+    (one row per profile, cell averages of order one) are steep.
+
+    The monitor function is the largest gradient of the profiles within reach (m) of every cell, which keeps the fine
+    cells over the distance the fronts travel before the next remeshing, plus its mean over the bed: the cells
+    equidistribute it, so that about half of them lie in the fronts and no cell is more than twice the uniform one.
+    """
+    widths = np.diff(edges)
+    centres = 0.5 * (edges[1:] + edges[:-1])
+    # gradients at the inner faces, then the largest one of the two faces of every cell
+    face_gradients = np.abs(np.diff(profiles, axis=1)).max(axis=0) / np.diff(centres)
+    gradients = np.maximum(np.append(face_gradients, 0), np.insert(face_gradients, 0, 0))
+    monitor = _window_max(gradients, edges, centres, reach)
+    floor = np.dot(monitor, widths) / (edges[-1] - edges[0])
+    monitor += floor if floor > 0 else 1.0
+
+    cumulative = np.concatenate([[0], np.cumsum(monitor * widths)])
+    levels = np.linspace(0, cumulative[-1], len(edges))
+    new_edges = np.interp(levels, cumulative, edges)
+    new_edges[0], new_edges[-1] = edges[0], edges[-1]
+    return new_edges
+
+
+def front_velocities(bed):
+    """
+    Velocities (m/s) of the adsorption fronts of the species of the bed according to equilibrium theory,
+    v / (1 + ρ q_eq(C_in) / C_in), in the order of the state vector.
+    """
+    density = bed.adsorbent.density
+    return np.array([bed.velocity / (1 + density * q_max * K / (1 + K * C_in)) for _, C_in, q_max, K, _ in bed.species()])
+
+
+def simulate_adaptive(bed, remesh_every=None, method='BDF', rtol=1e-6, atol=1e-9):
+    """
+    Breakthrough of a bed computed on an adaptive grid of bed.num_segments cells, as a SimulationResult.
+
+    The time is split into windows of remesh_every seconds, by default the time the fastest front still in the bed
+    (whose species has not reached 99 % of its inlet concentration at the outlet, see front_velocities) takes
+    to cross two uniform segments, the last window running to the end once all the fronts have left. Every window is integrated with the upwind scheme on a fixed non-uniform
+    grid, after which the cells are redistributed to follow the concentration fronts (see equidistributed_edges) and
+    C and q are conservatively remapped onto them (see remap). The grid is then far finer than the uniform one in the
+    fronts, so that far fewer segments match a fine uniform grid.
+
+    The result holds the solver statistics summed over the windows, and the final state on the final grid, whose edges
+    are stored as mesh_edges: it is not a checkpoint for Bed.extend, which assumes a uniform grid.
+    """
+    from adsorpsim.core import SimulationResult  # imported here as adsorpsim.core uses this module
+
+    if bed.scheme != "upwind":
+        raise ValueError("The adaptive grid is only available with the upwind scheme.")
+    n = bed.num_segments
+    kernel_type = kernel_class(bed.backend, competitive=bed.adsorbent.competitive)
+    arguments = list(kernel_type._bed_arguments(bed))
+    C_in, q_max, K = (np.asarray(arguments[i], dtype=float) for i in (3, 4, 5))
+    num_species = len(C_in)
+    # scales of C and q, so that the monitor function sees the fronts of every species alike
+    q_scale = q_max * K * C_in / (1 + K * C_in)
+    scales = np.concatenate([C_in, np.where(q_scale > 0, q_scale, 1.0)])
+    velocities = front_velocities(bed)
+
+    t_eval = np.linspace(0, bed.total_time, bed.total_time)
+    recorded = np.empty((num_species, len(t_eval)))
+    edges = np.linspace(0, bed.length, n + 1)
+    y = bed._initial_conditions()
+    t0 = 0.0
+    start = 0
+    nfev = njev = nlu = 0
+    step = None
+    while True:
+        profiles = y.reshape(2 * num_species, n) / scales[:, None]
+        inside = profiles[:num_species, -1] < 0.99
+        if inside.any():
+            velocity = velocities[inside].max()
+            window = 2 * bed.dz / velocity if remesh_every is None else remesh_every
+            new_edges = equidistributed_edges(edges, profiles, velocity * window)
+            y = (remap(profiles, edges, new_edges) * scales[:, None]).ravel()
+            edges = new_edges
+        else:
+            window = bed.total_time - t0
+
+        t1 = min(t0 + window, bed.total_time)
+        stop = np.searchsorted(t_eval, t1, side='right')
+        arguments[2] = np.broadcast_to(np.diff(edges), (num_species, n))
+        kernel = kernel_type(*arguments)
+        trajectory = integrate(kernel.rhs, t0, y, t1, t_eval[start:stop], [n * (i + 1) - 1 for i in range(num_species)],
+                               method=method, jac=kernel.jacobian, rtol=rtol, atol=atol, first_step=step)
+        if trajectory.status != 0:
+            raise RuntimeError(f"The integration failed at t = {trajectory.t_final}: {trajectory.message}")
+        recorded[:, start:stop] = trajectory.recorded
+        nfev, njev, nlu = nfev + trajectory.nfev, njev + trajectory.njev, nlu + trajectory.nlu
+        y, t0, start = trajectory.y_final, t1, stop
+        step = trajectory.last_step
+        if t1 >= bed.total_time:
+            break
+
+    result = SimulationResult.from_outlets(t_eval, [name for name, _, _, _, _ in bed.species()], recorded)
+    result._set_solver_info(t0, y, method, rtol, atol, 0,
+                            "The solver successfully reached the end of the integration interval.", nfev, njev, nlu)
+    result.mesh_edges = edges
+    return result
@@ -0,0 +1,148 @@
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.figure import Figure
+
+# points drawn per series by default: two per pixel of the width of a 8 in figure at 100 dpi,
+# beyond which the curves are downsampled without visible change
+MAX_POINTS = 1600
+
+
+def lttb(x, y, num_points: int):
+    """
+    Indices of the num_points points of (x, y) kept by the Largest-Triangle-Three-Buckets downsampling:
+    the first and last points, and in each of num_points - 2 buckets the point forming the largest triangle
+    with the point kept in the previous bucket and the mean of the next one, so that the fronts and extrema
+    of the curve are kept. All the indices are returned if the series has at most num_points points.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if num_points >= n or num_points < 3:
+        return np.arange(n)
+    # bucket i spans [edges[i], edges[i + 1]), the first and last points being buckets of their own
+    edges = np.linspace(1, n - 1, num_points - 1).astype(np.intp)
+    mean_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges), x[-1])
+    mean_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges), y[-1])
+    indices = np.empty(num_points, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(num_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        # twice the area of the triangles, the mean of the next bucket being the same for all of them
+        area = np.abs((x[a] - mean_x[i + 1]) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (mean_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def downsample(x, *series, max_points: int =MAX_POINTS):
+    """
+    Downsamples series sharing the abscissa x to the union of their LTTB points (at most max_points each),
+    returning x and the series (None being passed through)
+    """
+    x = np.asarray(x)
+    curves = [np.asarray(y) for y in series if y is not None]
+    if len(x) <= max_points or not curves:
+        return (x, *series)
+    indices = np.unique(np.concatenate([lttb(x, y, max_points) for y in curves]))
+    return (x[indices], *(None if y is None else np.asarray(y)[indices] for y in series))
+
+
+def chart_data(t, outlet_CO2, outlet_H2O=None, max_points: int =MAX_POINTS):
+    """
+    Downsampled breakthrough curves as a DataFrame indexed by time, e.g. for st.line_chart,
+    a lighter path than rendering a Matplotlib figure
+    """
+    import pandas as pd
+
+    t, outlet_CO2, outlet_H2O = downsample(t, outlet_CO2, outlet_H2O, max_points=max_points)
+    data = {"Outlet CO₂ Concentration": outlet_CO2}
+    if outlet_H2O is not None:
+        data["Outlet H₂O Concentration"] = outlet_H2O
+    return pd.DataFrame(data, index=pd.Index(t, name="Time (s)"))
+
+
+class _ReusableFigure:
+    """
+    Figure whose axes and artists are created once and whose data are replaced by update,
+    e.g. to draw the curves of every rerun of the app without creating a figure each time.
+    The figure is created without pyplot, so that it is not kept alive by its figure manager and is freed
+    with this object; close (or leaving a with block) frees its artists at once.
+    A pyplot figure (e.g. plt.figure()) can be passed instead, to be shown by plt.show.
+    """
+    def __init__(self, fig=None, max_points: int =MAX_POINTS):
+        self.fig = Figure(figsize=(8, 5)) if fig is None else fig
+        self.ax = self.fig.subplots()
+        self.max_points = max_points
+        self.ax.set_xlabel('Time (s)')
+        self.ax.set_ylabel('Outlet CO₂ Concentration (mol/m³)')
+        self.ax.set_title('Breakthrough Curve')
+        self.ax.grid(True)
+
+    def _rescale(self):
+        "Fits the limits of the axes to the new data and shows the legend of the visible artists"
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+        self.ax.legend(handles=[line for line in self.ax.lines if line.get_visible()])
+
+    def close(self):
+        self.fig.clear()
+        # no-op unless the figure was created by pyplot
+        plt.close(self.fig)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BreakthroughFigure(_ReusableFigure):
+    "Reusable figure of breakthrough curves and of the percentage point, see plot_the_graph"
+    def __init__(self, fig=None, max_points: int =MAX_POINTS):
+        super().__init__(fig, max_points)
+        self.point, = self.ax.plot([], [], "rx", markersize=10, label="Percentage point", zorder=3)
+        self.CO2, = self.ax.plot([], [], label="Outlet CO₂ Concentration", zorder=1)
+        self.H2O, = self.ax.plot([], [], label="Outlet H₂O Concentration", linestyle='--', zorder=2)
+
+    def update(self, t, outlet_CO2, outlet_H2O=None, pc_point_x=None, pc_point_y=None):
+        "Draws new curves (downsampled to max_points each) and returns the figure"
+        t, outlet_CO2, outlet_H2O = downsample(t, outlet_CO2, outlet_H2O, max_points=self.max_points)
+        self.CO2.set_data(t, outlet_CO2)
+        self.H2O.set_visible(outlet_H2O is not None)
+        self.H2O.set_data(t, outlet_CO2 if outlet_H2O is None else outlet_H2O)
+        if pc_point_x is None or pc_point_y is None:
+            pc_point_x = pc_point_y = np.nan
+        self.point.set_visible(not np.isnan(pc_point_x))
+        self.point.set_data([pc_point_x], [pc_point_y])
+        self._rescale()
+        return self.fig
+
+
+class FittedCurveFigure(_ReusableFigure):
+    "Reusable figure of a fitted breakthrough curve over the experimental points, see plot_fitted_curve"
+    def __init__(self, fig=None, max_points: int =MAX_POINTS):
+        super().__init__(fig, max_points)
+        self.fitted, = self.ax.plot([], [], label="Fitted model", zorder=1)
+        # markers without line, which unlike a scatter collection can be updated in place
+        self.experiment, = self.ax.plot([], [], "o", color="red", label="Experimental points", zorder=2)
+
+    def update(self, t_sim, outlet_sim, t_exp, outlet_exp):
+        "Draws a new fitted curve and experimental points (downsampled to max_points each) and returns the figure"
+        self.fitted.set_data(*downsample(t_sim, outlet_sim, max_points=self.max_points))
+        self.experiment.set_data(*downsample(t_exp, outlet_exp, max_points=self.max_points))
+        self._rescale()
+        return self.fig
+
+
+def plot_the_graph(t,outlet_CO2,outlet_H2O,pc_point_x=None,pc_point_y=None,max_points: int =MAX_POINTS):
+    """
+    This function plots the breakthrough graph, downsampled to max_points per curve
+    """
+    return BreakthroughFigure(plt.figure(figsize=(8, 5)), max_points).update(t, outlet_CO2, outlet_H2O, pc_point_x, pc_point_y)
+
+def plot_fitted_curve(t_sim, outlet_sim, t_exp, outlet_exp, max_points: int =MAX_POINTS):
+    """
+    This function plots a fitted breakthrough curve over the experimental points, downsampled to max_points each
+    """
+    return FittedCurveFigure(plt.figure(figsize=(8, 5)), max_points).update(t_sim, outlet_sim, t_exp, outlet_exp)
@@ -0,0 +1,233 @@
+import csv
+import io
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: the appends are only serialised within the process
+    fcntl = None
+
+COLUMNS = ("name", "q_max_CO2", "K_CO2", "k_ads_CO2", "density", "q_max_H2O", "K_H2O", "k_ads_H2O")
+PARAMETERS = COLUMNS[1:]
+# the parameters without which an adsorbent cannot be simulated, the H₂O ones defaulting to 0
+REQUIRED = ("q_max_CO2", "K_CO2", "k_ads_CO2", "density")
+
+_path_locks = {}
+_path_locks_lock = threading.Lock()
+
+
+def validate_adsorbent_row(name, parameters: dict):
+    "Checks the name and the parameters (by column name) of an adsorbent before it is added to a database"
+    if name == "":
+        raise ValueError("The variable 'name' cannot be empty.")
+    if not isinstance(name, str):
+        raise TypeError("The variable 'name' must be a string.")
+    for var_name, var_value in parameters.items():
+        if not isinstance(var_value, (float, int)):
+            raise TypeError(f"The variable '{var_name}' must be a float or an int..")
+        if var_value < 0:
+            raise ValueError(f"The variable '{var_name}' cannot be negative..")
+        if var_name in REQUIRED and var_value == 0:
+            raise ValueError(f"The variable '{var_name}' cannot be zero.")
+
+
+def _path_lock(path):
+    "Lock shared by the registries of a file within the process"
+    with _path_locks_lock:
+        return _path_locks.setdefault(path, threading.Lock())
+
+
+@contextmanager
+def _file_lock(file, exclusive):
+    "Advisory lock on an open file, shared by the readers and exclusive for a writer, across processes"
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+    try:
+        yield
+    finally:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def _format(value):
+    "Text of a parameter in the database, exact for the floats"
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+class AdsorbentRegistry:
+    """
+    Database of adsorbents stored in a ";"-separated .csv file (see data/Adsorbent_data.csv), indexed by name.
+
+    The file is parsed once into an in-memory index, which is reloaded only when its modification time or size
+    changes, e.g. after another session added an adsorbent, so that the lookups cost a dict access.
+    Adding adsorbents appends their rows instead of rewriting the file: the append holds an exclusive lock on the file
+    (fcntl.flock, the readers taking a shared one) during which the duplicates are checked against its current content
+    and the rows are written at once, so that concurrent sessions, threads or processes, neither lose nor corrupt rows.
+    Where fcntl is not available, the appends are only serialised within the process.
+    When the same name appears several times in the file, the first row is used.
+    """
+    def __init__(self, csv_path):
+        self.csv_path = Path(csv_path)
+        self._lock = _path_lock(os.path.abspath(self.csv_path))
+        self._signature = None
+        self._index = {}
+        self._frame = None
+
+    def _stat_signature(self):
+        stat = os.stat(self.csv_path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read(self, file):
+        return pd.read_csv(file, sep=";", dtype={"name": str})
+
+    def _parse(self, file):
+        frame = self._read(file)
+        columns = [frame["name"].tolist()]
+        for column in PARAMETERS:
+            columns.append(frame[column].tolist() if column in frame else [0] * len(frame))
+        index = dict(zip(columns[0], zip(*columns[1:])))
+        if len(index) < len(frame):
+            # the first row of every name is kept
+            index = {}
+            for name, *parameters in zip(*columns):
+                index.setdefault(name, tuple(parameters))
+        return frame, index
+
+    def _refresh(self, locked_file=None):
+        "Reloads the index if the file changed since it was parsed, from locked_file if the caller holds its lock"
+        if self._stat_signature() == self._signature:
+            return
+        if locked_file is not None:
+            locked_file.seek(0)
+            signature = self._stat_signature()
+            frame, index = self._parse(locked_file)
+        else:
+            with open(self.csv_path, "rb") as file, _file_lock(file, exclusive=False):
+                signature = self._stat_signature()
+                frame, index = self._parse(file)
+        self._frame, self._index, self._signature = frame, index, signature
+
+    def __len__(self):
+        self._refresh()
+        return len(self._index)
+
+    def __contains__(self, name):
+        self._refresh()
+        return name in self._index
+
+    def names(self):
+        "Names of the adsorbents, in the order of the file"
+        self._refresh()
+        return list(self._index)
+
+    def dataframe(self):
+        "Copy of the whole database as a DataFrame"
+        self._refresh()
+        if self._frame is None:
+            # the index was updated by an append of this registry, after which the file is parsed again
+            with open(self.csv_path, "rb") as file, _file_lock(file, exclusive=False):
+                self._frame = self._read(file)
+        return self._frame.copy()
+
+    def parameters(self, name):
+        "Dict of the parameters of an adsorbent by column name"
+        self._refresh()
+        if name not in self._index:
+            raise ValueError(f"Adsorbent '{name}' not found in {self.csv_path}.")
+        return dict(zip(PARAMETERS, self._index[name]))
+
+    def get(self, name):
+        "The adsorbent of that name, as an Adsorbent_Langmuir"
+        from adsorpsim.core import Adsorbent_Langmuir  # imported here as adsorpsim.core uses this module
+
+        return Adsorbent_Langmuir(name, **self.parameters(name))
+
+    def get_many(self, names):
+        "The adsorbents of those names, in the same order, after checking that they all exist"
+        self._refresh()
+        missing = [name for name in names if name not in self._index]
+        if missing:
+            raise ValueError(f"Adsorbents {missing} not found in {self.csv_path}.")
+        return [self.get(name) for name in names]
+
+    def add(self, name, q_max_CO2, K_CO2, k_ads_CO2, density, q_max_H2O=0, K_H2O=0, k_ads_H2O=0):
+        "Appends an adsorbent to the database, see add_many"
+        self.add_many([{"name": name, "q_max_CO2": q_max_CO2, "K_CO2": K_CO2, "k_ads_CO2": k_ads_CO2, "density": density,
+                        "q_max_H2O": q_max_H2O, "K_H2O": K_H2O, "k_ads_H2O": k_ads_H2O}])
+
+    def add_many(self, adsorbents):
+        """
+        Appends several adsorbents to the database, given as Adsorbent_Langmuir objects or dicts by column name
+        (the H₂O parameters defaulting to 0), in a single write.
+        Either all of them are added, or none if one is invalid or its name is already in use.
+        The fields are written in the order of the header of the file; a nonzero parameter without a column raises.
+        """
+        rows = []
+        for adsorbent in adsorbents:
+            if isinstance(adsorbent, dict):
+                name = adsorbent.get("name", "")
+                parameters = {column: adsorbent.get(column, 0) for column in PARAMETERS}
+            else:
+                name = adsorbent.name
+                parameters = {column: getattr(adsorbent, column) for column in PARAMETERS}
+            validate_adsorbent_row(name, parameters)
+            rows.append((name, *parameters.values()))
+        names = [row[0] for row in rows]
+        if len(set(names)) != len(names):
+            raise ValueError("The adsorbents to add must have distinct names.")
+        if not rows:
+            return
+
+        with self._lock, open(self.csv_path, "a+b") as file, _file_lock(file, exclusive=True):
+            # the duplicates are checked against the content of the file once it is locked, not the cached one
+            self._refresh(locked_file=file)
+            existing = [name for name in names if name in self._index]
+            if existing:
+                raise ValueError(f"The adsorbent '{existing[0]}' is already in the database.")
+            # the fields are written in the order of the header of the file, whose columns may be reordered or missing
+            file.seek(0)
+            header = next(csv.reader([file.readline().decode("utf-8-sig")], delimiter=";"), [])
+            header = [column.strip() for column in header]
+            if "name" not in header:
+                raise ValueError(f"{self.csv_path} has no 'name' column.")
+            for row in rows:
+                dropped = [column for column, value in zip(PARAMETERS, row[1:]) if column not in header and value != 0]
+                if dropped:
+                    raise ValueError(f"{self.csv_path} has no column {dropped[0]!r} to store the adsorbent '{row[0]}'.")
+            buffer = io.StringIO()
+            csv.writer(buffer, delimiter=";", lineterminator="\n").writerows(
+                [row[0] if column == "name" else _format(row[1 + PARAMETERS.index(column)]) if column in PARAMETERS else ""
+                 for column in header] for row in rows)
+            file.seek(0, os.SEEK_END)
+            text = buffer.getvalue()
+            if file.tell() > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    text = "\n" + text
+            file.write(text.encode())
+            file.flush()
+            os.fsync(file.fileno())
+            # a new dict, as other threads may be reading the current one
+            index = dict(self._index)
+            index.update((row[0], row[1:]) for row in rows)
+            self._frame, self._index = None, index
+            self._signature = self._stat_signature()
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(csv_path):
+    "The AdsorbentRegistry of a file, shared by all the callers (e.g. the sessions of the app) within the process"
+    path = os.path.abspath(csv_path)
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = AdsorbentRegistry(path)
+        return _registries[path]
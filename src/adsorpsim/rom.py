@@ -0,0 +1,283 @@
+import hashlib
+import time
+
+import numpy as np
+from scipy import sparse
+
+from adsorpsim import cache
+from adsorpsim.cache import simulation_key
+from adsorpsim.core import Bed, SimulationResult
+from adsorpsim.integrate import integrate
+
+# largest error indicator of the reduced solution (see ReducedOrderModel.simulate) accepted without falling back
+# to the full model: the indicator is of the order of the error of the outlet curves relative to the inlet concentration
+DEFAULT_TOLERANCE = 0.02
+
+
+def pod_basis(snapshots, energy: float =1 - 1e-8, max_rank: int =None):
+    """
+    Orthonormal basis (one column per mode) of the proper orthogonal decomposition of snapshots (one column each):
+    the fewest leading left singular vectors keeping the fraction energy of the sum of the squared singular values,
+    at most max_rank of them. Snapshots that are all zero (e.g. the loadings of a species that is not adsorbed)
+    keep a single mode.
+    """
+    U, s, _ = np.linalg.svd(snapshots, full_matrices=False)
+    kept = np.cumsum(s ** 2) / max(np.sum(s ** 2), np.finfo(float).tiny)
+    rank = int(np.searchsorted(kept, energy) + 1) if s[0] > 0 else 1
+    if max_rank is not None:
+        rank = min(rank, max_rank)
+    return U[:, :min(rank, U.shape[1])]
+
+
+def deim_indices(basis):
+    "Interpolation indices of the discrete empirical interpolation method (DEIM), picked greedily for every column"
+    indices = [int(np.argmax(np.abs(basis[:, 0])))]
+    for j in range(1, basis.shape[1]):
+        coefficients = np.linalg.solve(basis[indices, :j], basis[indices, j])
+        residual = basis[:, j] - basis[:, :j] @ coefficients
+        indices.append(int(np.argmax(np.abs(residual))))
+    return np.array(indices)
+
+
+def _block_diagonal(blocks):
+    return sparse.block_diag(blocks, format="csr").toarray()
+
+
+class ReducedOrderModel:
+    """
+    Proper-orthogonal-decomposition reduced-order model of the breakthrough of beds with the same number of segments
+    and species (upwind scheme, independent isotherms), trained on the states of full solves (see train).
+
+    The gas and solid concentrations of every species are each approximated on a POD basis of the training states,
+    C ≈ V_C a_C and q ≈ V_q a_q, and the equations of the model are projected onto these bases (Galerkin), so that
+    only len(a_C) + len(a_q) ODEs are solved instead of 2 x species x segments. The nonlinear Langmuir loading q_eq(C)
+    is only evaluated at the few segments picked by DEIM, whose basis is that of the training loadings,
+    so that the cost of the reduced right-hand side and Jacobian does not depend on the number of segments.
+
+    The bases do not depend on the parameters: a model trained on beds spanning a range of parameters (e.g. those
+    explored by a fit) is used for any bed with the same number of segments and species, the projected operators
+    being assembled for its parameters (see simulate).
+    """
+    def __init__(self, num_segments, species, basis_C, basis_q, deim_basis, deim_points):
+        self.num_segments = num_segments
+        self.species = list(species)
+        self.basis_C = basis_C
+        self.basis_q = basis_q
+        self.deim_basis = deim_basis
+        self.deim_points = deim_points
+        # oblique projector of the loadings interpolated at the DEIM points onto their basis
+        self._deim_projector = deim_basis @ np.linalg.inv(deim_basis[deim_points])
+        self._C_points = basis_C[deim_points]
+        # identifies the model in the keys of the results cache (see ReducedBed.simulate)
+        digest = hashlib.sha256()
+        for array in (basis_C, basis_q, deim_basis, deim_points):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        self.fingerprint = digest.hexdigest()
+
+    def __repr__(self):
+        return (f"ReducedOrderModel(num_segments={self.num_segments}, species={self.species}, "
+                f"modes_C={self.basis_C.shape[1]}, modes_q={self.basis_q.shape[1]}, deim_points={len(self.deim_points)})")
+
+    @classmethod
+    def train(cls, beds, energy: float =1 - 1e-10, max_modes: int =None, snapshot_every: int =None, method: str ='BDF', rtol: float =1e-6, atol: float =1e-9):
+        """
+        Builds a model from the full solves of beds sharing the number of segments and species, whose states are
+        recorded every snapshot_every time points (by default about 200 states per bed, see Bed.simulate).
+
+        The bases of every species and of its gas and solid concentrations, and the DEIM basis of its loading,
+        keep the fraction energy of the snapshots (see pod_basis), with at most max_modes modes each.
+        """
+        beds = list(beds)
+        if len(beds) == 0:
+            raise ValueError("At least one bed is needed.")
+        n = beds[0].num_segments
+        names = [name for name, _, _, _, _ in beds[0].species()]
+        for bed in beds:
+            if bed.num_segments != n or [name for name, _, _, _, _ in bed.species()] != names:
+                raise ValueError("All the beds must have the same number of segments and species.")
+            if bed.scheme != "upwind" or bed.adsorbent.competitive:
+                raise ValueError("The reduced-order model is only available with the upwind scheme and independent isotherms.")
+
+        ns = len(names)
+        snapshots_C, snapshots_q, snapshots_g = [[] for _ in range(ns)], [[] for _ in range(ns)], [[] for _ in range(ns)]
+        for bed in beds:
+            every = snapshot_every or max(bed.total_time // 200, 1)
+            profiles = bed.simulate(use_cache=False, profile_every=every, method=method, rtol=rtol, atol=atol).profiles
+            states = profiles.reshape(len(profiles), 2, ns, n)
+            for i, (_, C_in, q_max, K, _) in enumerate(bed.species()):
+                # the snapshots of every species are scaled by its inlet concentration and loading, so that
+                # beds of different feeds and capacities weigh alike (a species that is not adsorbed keeps its zero loadings)
+                q_in = q_max * K * C_in / (1 + K * C_in)
+                q_in = np.where(q_in > 0, q_in, 1.0)
+                C = states[:, 0, i].T
+                snapshots_C[i].append(C / C_in)
+                snapshots_q[i].append(states[:, 1, i].T / q_in)
+                snapshots_g[i].append(q_max * K * C / (1 + K * C) / q_in)
+
+        def bases(snapshots):
+            return [pod_basis(np.hstack(blocks), energy, max_modes) for blocks in snapshots]
+
+        # the loadings and the equilibrium loadings share their basis, which is also the DEIM one: the solid phase
+        # then relaxes exactly onto the interpolated equilibrium, whereas a mismatch between the two bases, multiplied
+        # by the fast mass-transfer rate ρ k_ads, would act as a spurious source of the gas phase
+        basis_C = bases(snapshots_C)
+        basis_q = bases([q + g for q, g in zip(snapshots_q, snapshots_g)])
+        deim_points = np.concatenate([i * n + deim_indices(basis) for i, basis in enumerate(basis_q)])
+        basis_q = _block_diagonal(basis_q)
+        return cls(n, names, _block_diagonal(basis_C), basis_q, basis_q, deim_points)
+
+    def supports(self, bed):
+        "Whether the model applies to a bed: same number of segments and species, upwind scheme and independent isotherms"
+        return (bed.num_segments == self.num_segments and [name for name, _, _, _, _ in bed.species()] == self.species
+                and bed.scheme == "upwind" and not bed.adsorbent.competitive)
+
+    def _operators(self, bed):
+        """
+        Reduced right-hand side and Jacobian of the model for the parameters of a bed,
+        and the residual of its mass balance (see simulate).
+        """
+        n, ns = self.num_segments, len(self.species)
+        C_in, q_max, K, k_ads = (np.array(values, dtype=float) for values in list(zip(*bed.species()))[1:])
+        density = bed.adsorbent.density
+        V_C, V_q, projector, points = self.basis_C, self.basis_q, self._deim_projector, self.deim_points
+        rate = np.repeat(k_ads, n)
+
+        # dC/dt = -v/dz (C_i - C_(i-1)) + ρ k_ads (q - q_eq(C)), dq/dt = k_ads (q_eq(C) - q), C_(-1) = C_in
+        advection = sparse.block_diag([sparse.diags([np.ones(n), -np.ones(n - 1)], [0, -1])] * ns, format="csr") * (bed.velocity / bed.dz)
+        inlet = np.zeros(ns * n)
+        inlet[::n] = bed.velocity / bed.dz * C_in
+        A_CC = -V_C.T @ (advection @ V_C)
+        A_Cq = V_C.T @ ((density * rate)[:, None] * V_q)
+        A_qq = -V_q.T @ (rate[:, None] * V_q)
+        b_C = V_C.T @ inlet
+        B_C = -V_C.T @ ((density * rate)[:, None] * projector)
+        B_q = V_q.T @ (rate[:, None] * projector)
+        Z = self._C_points
+        point_q_max_K = (q_max * K)[points // n]
+        point_K = K[points // n]
+        r_C = V_C.shape[1]
+
+        def loading(a_C):
+            "Langmuir loading at the DEIM points and its derivative, smooth across the small negative undershoots"
+            C = Z @ a_C
+            denominator = 1 + point_K * C
+            return point_q_max_K * C / denominator, point_q_max_K / denominator ** 2
+
+        out = np.empty(r_C + V_q.shape[1])
+        jacobian = np.zeros((len(out), len(out)))
+        jacobian[:r_C, r_C:] = A_Cq
+        jacobian[r_C:, r_C:] = A_qq
+
+        def rhs(t, a):
+            g, _ = loading(a[:r_C])
+            out[:r_C] = A_CC @ a[:r_C] + A_Cq @ a[r_C:] + b_C + B_C @ g
+            out[r_C:] = A_qq @ a[r_C:] + B_q @ g
+            return out
+
+        def jac(t, a):
+            _, dg = loading(a[:r_C])
+            dgZ = dg[:, None] * Z
+            jacobian[:r_C, :r_C] = A_CC + B_C @ dgZ
+            jacobian[r_C:, :r_C] = B_q @ dgZ
+            return jacobian
+
+        # the mass balance of every species over the sections [0, z] of the bed: the accumulation rate of C + ρ q,
+        # with the reconstructed state and its reduced time derivative, against the flux v (C_in - C(z)) entering them;
+        # it does not hold the stiff transfer terms, whose cancellation would swamp it, nor the derivative along z,
+        # which would amplify the small oscillations of the truncated modes with the number of segments
+        flux_scale = bed.velocity / bed.dz * C_in
+
+        def residual(a):
+            da = rhs(0, a)
+            balance = V_C @ da[:r_C] + density * (V_q @ da[r_C:]) + advection @ (V_C @ a[:r_C]) - inlet
+            return (np.abs(np.cumsum(balance.reshape(ns, n), axis=1)).max(axis=1) / flux_scale).max()
+
+        return rhs, jac, residual
+
+    def simulate(self, bed, tolerance: float =DEFAULT_TOLERANCE, checks: int =20, method: str ="auto", rtol: float =1e-6, atol: float =1e-9):
+        """
+        Breakthrough of a bed computed with the reduced model, as a SimulationResult whose rom_error holds an error
+        indicator: the largest mismatch of the mass balance of any inlet section of the bed for the reconstructed state
+        and its reduced time derivative, relative to the inlet flux, averaged over checks evenly spaced output times after the start.
+
+        When the bed is not supported (see supports) or the indicator exceeds tolerance, the full model is solved
+        instead (Bed.simulate), and rom_error is then None.
+        The result holds no final state, the reconstructed one being approximate: Bed.extend computes it with the
+        full model when continuing the simulation.
+        The reduced system is small and dense: method "auto" integrates it with LSODA, which is then the fastest,
+        and lets Bed.simulate pick the solver of the full model when falling back.
+        """
+        if not self.supports(bed):
+            return self._full(bed, method, rtol, atol)
+        start = time.perf_counter()
+        n, ns = self.num_segments, len(self.species)
+        rhs, jac, residual = self._operators(bed)
+        y0 = bed._initial_conditions()
+        a0 = np.concatenate([self.basis_C.T @ y0[:ns * n], self.basis_q.T @ y0[ns * n:]])
+        t_eval = np.linspace(0, bed.total_time, bed.total_time)
+        # the reduced coordinates are recorded, from which the outlets and the check states are reconstructed
+        reduced_method = "LSODA" if method == "auto" else method
+        trajectory = integrate(rhs, 0, a0, bed.total_time, t_eval, np.arange(len(a0)),
+                               method=reduced_method, jac=jac, rtol=rtol, atol=atol)
+        if trajectory.status != 0:
+            return self._full(bed, method, rtol, atol)
+        coordinates = trajectory.recorded
+        checked = np.unique(np.linspace(0, len(t_eval) - 1, checks + 1)[1:].astype(int))
+        error = np.mean([residual(coordinates[:, k]) for k in checked])
+        if error > tolerance:
+            return self._full(bed, method, rtol, atol)
+
+        r_C = self.basis_C.shape[1]
+        names = [name for name, _, _, _, _ in bed.species()]
+        outlets = self.basis_C[[n * (i + 1) - 1 for i in range(ns)]] @ coordinates[:r_C]
+        result = SimulationResult.from_outlets(t_eval, names, outlets)
+        result._set_solver_info(bed.total_time, None, reduced_method, rtol, atol, 0, trajectory.message,
+                                trajectory.nfev, trajectory.njev, trajectory.nlu)
+        result.rom_error = error
+        result.wall_time = time.perf_counter() - start
+        return result
+
+    @staticmethod
+    def _full(bed, method, rtol, atol):
+        result = Bed.simulate(bed, method=method, rtol=rtol, atol=atol)
+        result.rom_error = None
+        return result
+
+
+class ReducedBed(Bed):
+    """
+    Bed simulated with a ReducedOrderModel (see ReducedOrderModel.simulate), a drop-in replacement of Bed e.g. for
+    the template of fit_adsorption_parameters_from_df or in a sweep (see sweep.run_sweep).
+
+    simulate falls back to the full model of Bed.simulate for the options the reduced model does not provide
+    (probes, profiles, stop_at_breakthrough and the other modes). Its default method is "auto", which suits both
+    the reduced and the full model. With use_cache, the reduced results are kept in the results cache
+    (see adsorpsim.cache) under a key that also holds the reduced model and the tolerance.
+    """
+    def __init__(self, *args, reduced_model: ReducedOrderModel, tolerance: float =DEFAULT_TOLERANCE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reduced_model = reduced_model
+        self.tolerance = tolerance
+
+    @classmethod
+    def from_bed(cls, bed, reduced_model: ReducedOrderModel, tolerance: float =DEFAULT_TOLERANCE):
+        "ReducedBed with the parameters of a Bed"
+        return cls(bed.length, bed.diameter, bed.flow_rate, bed.num_segments, bed.total_time, bed.adsorbent,
+                   humidity_percentage=bed.humidity_percentage, backend=bed.backend, scheme=bed.scheme,
+                   inlet_concentrations=bed.inlet_concentrations, reduced_model=reduced_model, tolerance=tolerance)
+
+    def simulate(self, use_cache: bool =True, stop_at_breakthrough: float =None, probes=None, profile_every: int =None, mode: str ="full", method: str ="auto", rtol: float =1e-6, atol: float =1e-9):
+        if stop_at_breakthrough is not None or probes is not None or profile_every is not None or mode != "full":
+            return super().simulate(use_cache, stop_at_breakthrough, probes, profile_every, mode, method, rtol, atol)
+        results_cache = cache.default_cache
+        if not (use_cache and results_cache.enabled):
+            return self.reduced_model.simulate(self, self.tolerance, method=method, rtol=rtol, atol=atol)
+        key = simulation_key(self, method=method, rtol=rtol, atol=atol, reduced_model=self.reduced_model.fingerprint,
+                             tolerance=self.tolerance)
+        cached = results_cache.get(key)
+        if cached is None:
+            result = self.reduced_model.simulate(self, self.tolerance, method=method, rtol=rtol, atol=atol)
+            results_cache.put(key, result.to_arrays())
+            return result
+        # copies are returned so that the caller cannot modify the cached arrays
+        return SimulationResult.from_arrays({name: None if array is None else array.copy() for name, array in cached.items()})
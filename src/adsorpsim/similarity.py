@@ -0,0 +1,151 @@
+import hashlib
+import json
+
+import numpy as np
+
+from adsorpsim.cache import CACHE_VERSION, SimulationCache, _canonical
+from adsorpsim.integrate import integrate
+from adsorpsim.kernel import kernel_class
+
+def residence_time(bed):
+    "Time scale of the dimensionless model: the residence time L/v of the gas in the bed (s)"
+    return bed.length / bed.velocity
+
+
+def dimensionless_groups(bed):
+    """
+    Dimensionless groups that, with the number of segments, fully determine the breakthrough curves of a bed.
+
+    With s = t v / L, c = C / C_in and θ = ρ q / C_in, the model of every species reads
+        dc_i/ds = -n (c_i - c_(i-1)) - Da (Γ α c_i / (1 + α c_i) - θ_i)
+        dθ_i/ds = Da (Γ α c_i / (1 + α c_i) - θ_i)
+    with the capacity Γ = ρ q_max / C_in, the affinity α = K C_in and the Damköhler number Da = k_ads L / v
+    (with a competitive adsorbent, the denominators become 1 + Σ_j α_j c_j and the group competitive is set).
+    Beds sharing these groups have the same curves c(s), whatever their length, diameter and flow rate.
+    """
+    groups = {"num_segments": bed.num_segments}
+    if bed.adsorbent.competitive:
+        groups["competitive"] = True
+    tau = residence_time(bed)
+    for name, C_in, q_max, K, k_ads in bed.species():
+        groups[f"capacity_{name}"] = bed.adsorbent.density * q_max / C_in
+        groups[f"affinity_{name}"] = K * C_in
+        groups[f"damkohler_{name}"] = k_ads * tau
+    return groups
+
+
+def _species_names(groups):
+    "Names of the species of the dimensionless problem groups, in the order of the state"
+    return [name[len("capacity_"):] for name in groups if name.startswith("capacity_")]
+
+
+def _scaled_atol(bed, atol):
+    "Absolute tolerance on the dimensionless state equivalent to atol on the dimensional one"
+    n = bed.num_segments
+    species = bed.species()
+    scale_C = [C_in for _, C_in, _, _, _ in species]
+    scale_q = [C_in / bed.adsorbent.density for _, C_in, _, _, _ in species]
+    return atol / np.repeat(scale_C + scale_q, n)
+
+
+def similarity_key(bed, method, rtol, atol):
+    """
+    Stable hash of the dimensionless problem of a bed: its groups, its backend and scheme and the solver settings,
+    the absolute tolerance being scaled like the state.
+    Beds only differing by their length, diameter and flow rate share the key as long as they share the groups.
+    """
+    fields = {
+        "version": CACHE_VERSION,
+        "groups": {name: _canonical(value) for name, value in dimensionless_groups(bed).items()},
+        "backend": bed.backend,
+        "scheme": bed.scheme,
+        "solver": {"method": method, "rtol": _canonical(rtol), "atol": _canonical(_scaled_atol(bed, atol))},
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+def solve_dimensionless(groups, s_eval, method='BDF', rtol=1e-6, atol=1e-9, backend="numpy", scheme="upwind"):
+    """
+    Integrates the dimensionless model given by groups (see dimensionless_groups) up to s_eval[-1],
+    recording the outlet of every species (one row each) at the dimensionless times s_eval.
+    atol is a scalar or one value per component of the dimensionless state [c, θ].
+    Returns the Trajectory of adsorpsim.integrate.integrate.
+    """
+    n = groups["num_segments"]
+    names = _species_names(groups)
+    # the kernel of a bed of unit length and velocity, the capacity taking the place of q_max with a unit density
+    kernel = kernel_class(backend, scheme, groups.get("competitive", False))(
+        n, 1.0, 1.0 / n, np.ones(len(names)),
+        [groups[f"capacity_{name}"] for name in names],
+        [groups[f"affinity_{name}"] for name in names],
+        [groups[f"damkohler_{name}"] for name in names],
+        1.0,
+        **({} if scheme == "upwind" else {"scheme": scheme})
+    )
+    y0 = np.zeros(2 * len(names) * n)
+    y0[::n][:len(names)] = 1.0
+    trajectory = integrate(kernel.rhs, 0, y0, s_eval[-1], s_eval, [n * (i + 1) - 1 for i in range(len(names))],
+                           method=method, jac=kernel.jacobian, rtol=rtol, atol=atol)
+    return trajectory
+
+
+def simulate_similar(bed, method='BDF', rtol=1e-6, atol=1e-9, similarity_cache=None):
+    """
+    Breakthrough of a bed computed through its dimensionless model (see dimensionless_groups), as a SimulationResult.
+
+    The dimensionless outlet curves are looked up in similarity_cache under similarity_key: an entry computed for
+    another bed is reused, its time axis being rescaled by the residence time and its concentrations by the inlet ones,
+    as long as it covers the dimensionless duration of this bed at least as finely; it is then interpolated with a cubic
+    spline at the time points of this bed. Otherwise the dimensionless model is solved and stored.
+
+    The result holds the final state only when it was solved for this bed or for one with the same dimensionless
+    time points; otherwise Bed.extend computes it when continuing the simulation.
+    """
+    from adsorpsim.core import SimulationResult  # imported here as adsorpsim.core uses this module
+
+    tau = residence_time(bed)
+    t_eval = np.linspace(0, bed.total_time, bed.total_time)
+    s_eval = t_eval / tau
+    species = bed.species()
+    key = similarity_key(bed, method, rtol, atol)
+
+    cached = similarity_cache.get(key) if similarity_cache is not None and similarity_cache.enabled else None
+    reusable = (
+        cached is not None
+        and cached["s"][-1] >= s_eval[-1]
+        and (len(s_eval) < 2 or len(cached["s"]) >= 2 and cached["s"][1] <= s_eval[1] * (1 + 1e-12))
+    )
+    if not reusable:
+        trajectory = solve_dimensionless(dimensionless_groups(bed), s_eval, method, rtol, _scaled_atol(bed, atol), bed.backend, bed.scheme)
+        if trajectory.status != 0:
+            raise RuntimeError(f"The dimensionless integration failed: {trajectory.message}")
+        solved = {"s": trajectory.t, "outlets": trajectory.recorded, "y_final": trajectory.y_final,
+                  "nfev": trajectory.nfev, "njev": trajectory.njev, "nlu": trajectory.nlu}
+        if similarity_cache is not None and similarity_cache.enabled and (cached is None or s_eval[-1] >= cached["s"][-1]):
+            similarity_cache.put(key, solved)
+        cached = solved
+
+    if len(cached["s"]) == len(s_eval) and np.array_equal(cached["s"], s_eval):
+        outlets = np.array(cached["outlets"])
+        y_final = np.array(cached["y_final"])
+    else:
+        from scipy.interpolate import CubicSpline  # imported here as it takes a while to import
+
+        outlets = CubicSpline(cached["s"], cached["outlets"], axis=1)(s_eval)
+        y_final = None
+
+    C_in = [C_in for _, C_in, _, _, _ in species]
+    result = SimulationResult.from_outlets(t_eval, [name for name, _, _, _, _ in species], outlets * np.array(C_in)[:, None])
+    if y_final is not None:
+        n = bed.num_segments
+        scale = np.repeat(C_in + [value / bed.adsorbent.density for value in C_in], n)
+        y_final = y_final * scale
+    # the statistics are those of the dimensionless solve, which may have been done for another bed
+    result._set_solver_info(bed.total_time, y_final, method, rtol, atol, 0,
+                            "The solver successfully reached the end of the integration interval.",
+                            int(cached["nfev"]), int(cached["njev"]), int(cached["nlu"]))
+    return result
+
+
+# cache of dimensionless solutions used by Bed.simulate, it can be replaced or disabled with enabled = False
+default_similarity_cache = SimulationCache()
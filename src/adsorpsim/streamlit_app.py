@@ -1,37 +1,74 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
+import threading
+from collections import OrderedDict
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import os
 
 from adsorpsim import Bed, Adsorbent_Langmuir
-from adsorpsim import download_data,get_percentage_point,add_adsorbent_to_list,plot_the_graph,get_adsorbed_quantity_CO2,get_adsorbed_quantity_H2O,fit_adsorption_parameters_from_df
+from adsorpsim import get_registry,get_percentage_point,add_adsorbent_to_list,get_adsorbed_quantity_CO2,get_adsorbed_quantity_H2O,load_breakthrough_data
+from adsorpsim.background import BackgroundFit
+from adsorpsim.ingest import file_digest
+from adsorpsim.plotting import BreakthroughFigure, FittedCurveFigure, chart_data
 
 #the data are loaded: are the data consist of different adsorbents with their physical properties
 current_file = Path(os.path.abspath(''))
 csv_file = current_file.parents[2] / "AdsorpSim" / "data" / "Adsorbent_data.csv"
 
-#the data are downloaded
-df = download_data(csv_file)
-
-#a dictionnary indexed by the adsorbents names is created, there is an entry for each adsorbent present in the dataset
-adsorbants = {}
-for _, row in df.iterrows():
-    ads = Adsorbent_Langmuir(
-        name=row["name"],
-        q_max_CO2=row["q_max_CO2"],
-        K_CO2=row["K_CO2"],
-        k_ads_CO2=row["k_ads_CO2"],
-        density=row["density"],
-        q_max_H2O=row["q_max_H2O"],
-        K_H2O=row["K_H2O"],
-        k_ads_H2O=row["k_ads_H2O"]
-    )
-    adsorbants[row["name"]] = ads
+#the registry indexes the adsorbents by name, it is shared by the sessions and only reads the file again when it changes
+registry = get_registry(csv_file)
 
 #a list of all the registered adsorbents is created
-list_adsorbents = list(adsorbants.keys())
+list_adsorbents = registry.names()
+
+ADSORBENT_FIELDS = ("q_max_CO2", "K_CO2", "k_ads_CO2", "density", "q_max_H2O", "K_H2O", "k_ads_H2O")
+
+#the last full simulation of every set of parameters other than the total time is kept as a checkpoint
+#(shared by the sessions, hence guarded by a lock), so that increasing the total time only integrates the added time with Bed.extend
+CHECKPOINTS = 64
+@st.cache_resource
+def checkpoints():
+    return OrderedDict(), threading.Lock()
+
+#the simulations are cached by their physical parameters, so that the widgets that do not change them
+#(e.g. the graph toggle or the forms) rerun the app without simulating again
+@st.cache_data(max_entries=64)
+def simulate(bed_parameters, adsorbent_parameters, mode="full"):
+    bed = Bed(**bed_parameters, adsorbent=Adsorbent_Langmuir("Manual adsorbant", *adsorbent_parameters))
+    if mode != "full":
+        result = bed.simulate(mode=mode)
+        #a preview outside the range of the library has no finite error estimate and is not shown
+        if not np.all(np.isfinite(result.error_estimate)):
+            return None
+        return tuple(result)
+    key = (tuple((name, value) for name, value in bed_parameters.items() if name != "total_time"), adsorbent_parameters)
+    store, lock = checkpoints()
+    #the lock is only held to read and update the store, not during the integration
+    with lock:
+        checkpoint = store.get(key)
+    if checkpoint is not None and checkpoint.t_final < bed.total_time:
+        result = bed.extend(checkpoint, bed.total_time)
+    else:
+        result = bed.simulate()
+    #a result interpolated from a similar bed holds no final state to continue from,
+    #and another session may have stored a longer checkpoint in the meantime
+    with lock:
+        stored = store.get(key)
+        if result.y_final is not None and (stored is None or result.t_final > stored.t_final):
+            store[key] = result
+        if key in store:
+            store.move_to_end(key)
+        while len(store) > CHECKPOINTS:
+            store.popitem(last=False)
+    return tuple(result)
+
+#the preview is interpolated from the precomputed library in microseconds, when available for this bed
+def simulate_preview(bed_parameters, adsorbent_parameters):
+    try:
+        return simulate(bed_parameters, adsorbent_parameters, mode="preview")
+    except (ValueError, FileNotFoundError):
+        return None
 
 
 
@@ -106,14 +143,15 @@ if choix=="Manual Modifications":
 
 #code for the adsorbents registered in the dataset
 else:
+    chosen = registry.get(choix)
     #adsorbent parameters
-    q_max_CO2_ad = st.sidebar.number_input('Q(max, CO₂) [mol/kg]', value=adsorbants[choix].q_max_CO2, step=1.0)
-    K_CO2_ad = st.sidebar.number_input('K(CO₂) [m³/mol]', value=adsorbants[choix].K_CO2 , step=0.1,format="%.4f")
-    k_ads_CO2_ad = st.sidebar.number_input('k(ads, CO₂) [1/s]', value=adsorbants[choix].k_ads_CO2 ,format="%.4f",step=0.1)
-    density_ad = st.sidebar.number_input('Density[kg/m³]', value=adsorbants[choix].density ,step=100.0)
-    q_max_H2O_ad = st.sidebar.number_input('Q(max, H₂O) [mol/kg]', value=adsorbants[choix].q_max_H2O , step=1.0)
-    K_H2O_ad = st.sidebar.number_input('K (H₂O)[m³/mol]', value=adsorbants[choix].K_H2O, step=0.1,format="%.4f")
-    k_ads_H2O_ad = st.sidebar.number_input('k(ads, H₂O) [1/s]', value=adsorbants[choix].k_ads_H2O ,format="%.4f",step=0.1)
+    q_max_CO2_ad = st.sidebar.number_input('Q(max, CO₂) [mol/kg]', value=chosen.q_max_CO2, step=1.0)
+    K_CO2_ad = st.sidebar.number_input('K(CO₂) [m³/mol]', value=chosen.K_CO2 , step=0.1,format="%.4f")
+    k_ads_CO2_ad = st.sidebar.number_input('k(ads, CO₂) [1/s]', value=chosen.k_ads_CO2 ,format="%.4f",step=0.1)
+    density_ad = st.sidebar.number_input('Density[kg/m³]', value=chosen.density ,step=100.0)
+    q_max_H2O_ad = st.sidebar.number_input('Q(max, H₂O) [mol/kg]', value=chosen.q_max_H2O , step=1.0)
+    K_H2O_ad = st.sidebar.number_input('K (H₂O)[m³/mol]', value=chosen.K_H2O, step=0.1,format="%.4f")
+    k_ads_H2O_ad = st.sidebar.number_input('k(ads, H₂O) [1/s]', value=chosen.k_ads_H2O ,format="%.4f",step=0.1)
     #create modulable adsorbent with the reported parameters
     adsorbent = Adsorbent_Langmuir(
     name="Manual adsorbant",
@@ -171,12 +209,36 @@ if submitted:
 #### Plotting:
 
 #different values needed for plotting the graph are calculated using functions that are shown in "core.py"
-t, outlet_CO2, outlet_H2O = bed.simulate()
-pc_point_x, pc_point_y = get_percentage_point(percentage_CO2,t,outlet_CO2)
+bed_parameters = dict(length=length, diameter=diameter, flow_rate=flow_rate, num_segments=num_segments,
+                      total_time=total_time, humidity_percentage=humidity_percentage)
+adsorbent_parameters = tuple(float(getattr(bed.adsorbent, name)) for name in ADSORBENT_FIELDS)
 #a toggle to show or not the graph is created
 on_off = st.toggle("Show the graph", value=True)
+#the interactive chart only receives the downsampled curves, and is lighter to draw than the figure
+lightweight = st.toggle("Interactive chart (without the percentage point)", value=False)
+graph = st.empty()
+#the figures of a session are created once and redrawn with the new curves at each rerun
+figures = st.session_state.setdefault("figures", {"breakthrough": BreakthroughFigure(), "fit": FittedCurveFigure()})
+def draw(container, t, outlet_CO2, outlet_H2O, pc_point_x=None, pc_point_y=None):
+    if lightweight:
+        container.line_chart(chart_data(t, outlet_CO2, outlet_H2O))
+    else:
+        container.pyplot(figures["breakthrough"].update(t, outlet_CO2, outlet_H2O, pc_point_x, pc_point_y))
+#the preview is shown while the full-resolution solve runs, and then replaced by it,
+#unless this session already simulated these parameters, whose full solve is then cached
+simulated = st.session_state.setdefault("simulated", set())
+simulation_key = (tuple(bed_parameters.items()), adsorbent_parameters)
+if on_off and simulation_key not in simulated:
+    preview = simulate_preview(bed_parameters, adsorbent_parameters)
+    if preview is not None:
+        with graph.container():
+            st.caption("Preview: the full-resolution simulation is running")
+            draw(st, *preview)
+t, outlet_CO2, outlet_H2O = simulate(bed_parameters, adsorbent_parameters)
+simulated.add(simulation_key)
+pc_point_x, pc_point_y = get_percentage_point(percentage_CO2,t,outlet_CO2)
 if on_off:
-    st.pyplot(plot_the_graph(t,outlet_CO2,outlet_H2O,pc_point_x,pc_point_y))
+    draw(graph, t, outlet_CO2, outlet_H2O, pc_point_x, pc_point_y)
 
 
 
@@ -204,6 +266,59 @@ with col22:
 
 ### adsorbent parameters from csv file:
 
+#the progress of the fit is polled every second while it runs, after which the whole app is rerun once to show its results
+def show_fit_results(job, df2, fit_bed_parameters, presumed_density, polling):
+    if not job.done:
+        st.progress(job.progress, text=f"Fitting the adsorbent parameters: {job.evaluations} simulations, "
+                                       f"lowest mean squared error {job.best_loss:.3g}")
+        if st.button("Cancel the fit"):
+            job.cancel()
+        return
+    if polling:
+        st.rerun()
+    if job.cancelled:
+        st.info("The fit was cancelled.")
+        if st.button("Restart the fit"):
+            del st.session_state["fit"]
+            st.rerun()
+        return
+    if job.error is not None:
+        st.error(f"The fit failed: {job.error}")
+        return
+    fitted_adsorbent = job.adsorbent
+    #show the results of the fitted parameters
+    st.write("The deducted parameters of the adsorbent are shown below:")
+    col1,col2,col3 = st.columns([1, 1, 1])
+    with col1:
+        tile1=st.container(height = 120)
+        tile1.metric("Q(max, CO₂) [mol/kg]", round(fitted_adsorbent.q_max_CO2, 2))
+    with col2:
+        tile1=st.container(height = 120)
+        tile1.metric("K(CO₂) [m³/mol]", round(fitted_adsorbent.K_CO2, 4))
+    with col3:
+        tile1=st.container(height = 120)
+        tile1.metric("k(ads, CO₂) [1/s]", round(fitted_adsorbent.k_ads_CO2, 4))
+    #Add the opportunity to directly add the adsorbent to the dataset
+    col1,col2 = st.columns([1, 1])
+    with col1:
+        add_deducted_ads_name = st.text_input("Please name the adsorbent to add it to the list")
+    with col2:
+        st.write("")
+        st.write("")
+        if st.button("Add the adsorbent to the list"):
+            if add_deducted_ads_name=="":
+                st.sidebar.error("the adsorbent must be named") 
+            else:
+                add_adsorbent_to_list(csv_file,add_deducted_ads_name+" "+"(without H₂O properties)",round(fitted_adsorbent.q_max_CO2, 2),round(fitted_adsorbent.K_CO2, 4),round(fitted_adsorbent.k_ads_CO2, 4),presumed_density)
+                st.success("The adsorbent was added to the list without specifying its property to adsorb water, please refresh the page (Ctrl+R)")  
+    #show the fitted graph, whose simulation is cached like the others
+    t_sim, outlet_sim, _ = simulate(fit_bed_parameters, tuple(float(getattr(fitted_adsorbent, name)) for name in ADSORBENT_FIELDS))
+    st.pyplot(figures["fit"].update(t_sim, outlet_sim, df2["time"], df2["outlet_CO2"]))
+    #show the uploaded csv file
+    st.write("Aperçu du fichier :")
+    st.dataframe(pd.DataFrame(df2))
+
+
 st.title("Upload your csv file to deduct the adsorbent's parameters")
 #show the needed format of the csv file
 st.write("The csv file should respect the following format AND use ; as separator")
@@ -217,53 +332,27 @@ data = pd.DataFrame(
 # Load the csv file
 st.dataframe(data, use_container_width=True)
 st.markdown("Drag and drop your csv file here, the fitted curve will respect the previously given bed parameters")
-st.markdown(" ⚠ Adding a file may significantly increase the running time of the app ⚠")
+st.markdown("The parameters are fitted in the background, the simulation above stays available meanwhile")
 uploaded_file = st.file_uploader("", type="csv")
 #asks the density of the adsorbent to be able to calculate the parameters
 if uploaded_file is not None:
     st.write("Please enter the assumed density of the adsorbent.")
     presumed_density=st.number_input("Density [kg/m³]", value=0.0 ,step=100.0, key="presumed density")
     if presumed_density!=0:
-        # Calculate the parameters of the adsorbent from the csv file
-        df2 = pd.read_csv(uploaded_file,sep=";")
-        bed2 = Bed(
-            length=length,
-            diameter=diameter,
-            flow_rate=flow_rate,
-            num_segments=num_segments,
-            total_time = df2["time"].iloc[-1],
-            adsorbent=None,
-            humidity_percentage=humidity_percentage
-        )
-        fitted_adsorbent,fig= fit_adsorption_parameters_from_df(df2,bed2,presumed_density)
-        #show the results of the fitted parameters
-        st.write("The deducted parameters of the adsorbent are shown below:")
-        col1,col2,col3 = st.columns([1, 1, 1])
-        with col1:
-            tile1=st.container(height = 120)
-            tile1.metric("Q(max, CO₂) [mol/kg]", round(fitted_adsorbent.q_max_CO2, 2))
-        with col2:
-            tile1=st.container(height = 120)
-            tile1.metric("K(CO₂) [m³/mol]", round(fitted_adsorbent.K_CO2, 4))
-        with col3:
-            tile1=st.container(height = 120)
-            tile1.metric("k(ads, CO₂) [1/s]", round(fitted_adsorbent.k_ads_CO2, 4))
-        #Add the opportunity to directly add the adsorbent to the dataset
-        col1,col2 = st.columns([1, 1])
-        with col1:
-            add_deducted_ads_name = st.text_input("Please name the adsorbent to add it to the list")
-        with col2:
-            st.write("")
-            st.write("")
-            if st.button("Add the adsorbent to the list"):
-                if add_deducted_ads_name=="":
-                    st.sidebar.error("the adsorbent must be named") 
-                else:
-                    add_adsorbent_to_list(csv_file,add_deducted_ads_name+" "+"(without H₂O properties)",round(fitted_adsorbent.q_max_CO2, 2),round(fitted_adsorbent.K_CO2, 4),round(fitted_adsorbent.k_ads_CO2, 4),presumed_density)
-                    st.success("The adsorbent was added to the list without specifying its property to adsorb water, please refresh the page (Ctrl+R)")  
-        #show the fitted graph      
-        st.pyplot(fig)
-        #show the uploaded csv file
-        st.write("Aperçu du fichier :")
-        st.dataframe(df2)
-
+        # the columns of the file are parsed once and cached on disk under the hash of its content
+        uploaded_file.seek(0)
+        upload_digest = file_digest(uploaded_file)
+        df2 = load_breakthrough_data(uploaded_file, digest=upload_digest)
+        fit_bed_parameters = dict(bed_parameters, total_time=int(df2["time"][-1]))
+        bed2 = Bed(**fit_bed_parameters, adsorbent=None)
+        #the fit runs in a background thread, so that the simulation above stays available while it runs,
+        #and is only started again when the file, the bed or the density change
+        fit_key = (upload_digest, tuple(fit_bed_parameters.items()), presumed_density)
+        previous_fit = st.session_state.get("fit")
+        if previous_fit is None or previous_fit[0] != fit_key:
+            if previous_fit is not None:
+                previous_fit[1].cancel()
+            st.session_state["fit"] = (fit_key, BackgroundFit(df2, bed2, presumed_density))
+        job = st.session_state["fit"][1]
+        show_fit = st.fragment(show_fit_results, run_every=None if job.done else 1.0)
+        show_fit(job, df2, fit_bed_parameters, presumed_density, polling=not job.done)
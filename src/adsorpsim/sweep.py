@@ -0,0 +1,190 @@
+import itertools
+import signal
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from adsorpsim.core import (
+    Adsorbent_Langmuir,
+    Bed,
+    get_percentage_point,
+    get_adsorbed_quantity_CO2,
+    get_adsorbed_quantity_H2O,
+)
+from adsorpsim.rom import ReducedBed
+from adsorpsim.similarity import similarity_key
+
+BED_PARAMETERS = ("length", "diameter", "flow_rate", "num_segments", "total_time", "humidity_percentage", "scheme",
+                  "inlet_concentrations")
+ADSORBENT_PARAMETERS = ("q_max_CO2", "K_CO2", "k_ads_CO2", "density", "q_max_H2O", "K_H2O", "k_ads_H2O", "other_species",
+                        "competitive")
+SOLVER_PARAMETERS = ("method", "rtol", "atol")
+RESULT_COLUMNS = ("breakthrough_time", "adsorbed_CO2", "adsorbed_H2O")
+SOLVER_COLUMNS = ("method", "nfev", "njev", "nlu", "rom_error")
+
+
+def parameter_grid(base: dict, **axes):
+    """
+    Builds the list of configurations of a full factorial sweep.
+
+    base holds the parameters shared by all the configurations, and every keyword argument
+    gives the list of values taken by one parameter, e.g. parameter_grid(base, length=[0.5, 1.0], K_CO2=[0.1, 0.2]).
+    """
+    names = list(axes)
+    return [dict(base, **dict(zip(names, values))) for values in itertools.product(*axes.values())]
+
+
+def _build_bed(config):
+    "Bed (and adsorbent) described by a configuration"
+    adsorbent = Adsorbent_Langmuir(
+        name=config.get("name", "Sweep"),
+        **{key: config[key] for key in ADSORBENT_PARAMETERS if key in config}
+    )
+    return Bed(adsorbent=adsorbent, **{key: config[key] for key in BED_PARAMETERS if key in config})
+
+
+def _similarity_order(indexed):
+    """
+    Sorts (index, configuration) pairs by the key of their dimensionless problem (see adsorpsim.similarity),
+    so that similar configurations are run one after the other in the same worker, which solves them only once.
+    """
+    def key(item):
+        try:
+            return similarity_key(_build_bed(item[1]), 'BDF', 1e-6, 1e-9)
+        except Exception:
+            return ""
+    return sorted(indexed, key=key)
+
+
+def _timeout_handler(signum, frame):
+    raise TimeoutError("the simulation exceeded the time limit")
+
+
+def run_configuration(config: dict, percentage: float =90, timeout: float =None, early_stop: bool =False, reduced_model=None):
+    """
+    Simulates one configuration and returns its breakthrough time and adsorbed quantities.
+
+    With early_stop, the integration stops at the breakthrough (see Bed.simulate(stop_at_breakthrough=...)),
+    the percentage then being relative to the inlet CO₂ concentration rather than to the maximum outlet one;
+    when the breakthrough is not reached within total_time, the status is "not_reached" and the results are NaN.
+
+    config holds the Bed and Adsorbent_Langmuir parameters (and optionally a 'name', and the 'method', 'rtol'
+    and 'atol' of Bed.simulate), and the solver used and its statistics are reported with the results.
+    With a reduced_model (see adsorpsim.rom.ReducedOrderModel), the bed is simulated as a ReducedBed,
+    rom_error being None when it fell back to the full model.
+    A failed or timed-out simulation does not raise: its status and error are reported instead.
+    The timeout is only enforced on platforms providing SIGALRM and in the main thread, as the signal handlers
+    cannot be set from another one (e.g. a sweep run with max_workers=1 from a thread).
+    """
+    result = {"status": "ok", "error": None}
+    use_alarm = (timeout is not None and hasattr(signal, "SIGALRM")
+                 and threading.current_thread() is threading.main_thread())
+    previous_handler = None
+    start = time.perf_counter()
+    try:
+        try:
+            if use_alarm:
+                previous_handler = signal.signal(signal.SIGALRM, _timeout_handler)
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            bed = _build_bed(config)
+            if reduced_model is not None:
+                bed = ReducedBed.from_bed(bed, reduced_model)
+            solver_options = {key: config[key] for key in SOLVER_PARAMETERS if key in config}
+            if early_stop:
+                simulation = bed.simulate(stop_at_breakthrough=percentage, **solver_options)
+                t, outlet_CO2, outlet_H2O = simulation
+                pc_point_x, pc_point_y = t[-1], outlet_CO2[-1]
+            else:
+                simulation = bed.simulate(**solver_options)
+                t, outlet_CO2, outlet_H2O = simulation
+                pc_point_x, pc_point_y = get_percentage_point(percentage, t, outlet_CO2)
+            result.update({name: getattr(simulation, name) for name in SOLVER_COLUMNS})
+            if early_stop and simulation.status != 1:
+                # the integration reached total_time without stopping at the breakthrough, whose point is then unknown
+                result.update(status="not_reached", breakthrough_time=np.nan, adsorbed_CO2=np.nan, adsorbed_H2O=np.nan,
+                              error=f"the breakthrough at {percentage} % of the inlet CO₂ is not reached within total_time")
+            else:
+                result["breakthrough_time"] = pc_point_x
+                result["adsorbed_CO2"] = get_adsorbed_quantity_CO2(outlet_CO2, pc_point_x, pc_point_y, bed.flow_rate)
+                result["adsorbed_H2O"] = get_adsorbed_quantity_H2O(
+                    outlet_CO2, outlet_H2O, bed.humidity_percentage, pc_point_x, pc_point_y, bed.flow_rate)
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                if previous_handler is not None:
+                    signal.signal(signal.SIGALRM, previous_handler)
+    except TimeoutError as e:
+        result.update(status="timeout", error=str(e))
+    except Exception as e:
+        result.update(status="failed", error="".join(traceback.format_exception_only(type(e), e)).strip())
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def _run_chunk(chunk, percentage, timeout, early_stop, reduced_model=None):
+    "Runs a chunk of (index, configuration) pairs in a worker process"
+    return [(index, run_configuration(config, percentage, timeout, early_stop, reduced_model)) for index, config in chunk]
+
+
+def run_sweep(configurations, percentage: float =90, max_workers: int =None, chunk_size: int =1, timeout: float =None, failure_value: float =np.nan, progress=None, early_stop: bool =False, reduced_model=None):
+    """
+    Runs Bed.simulate for every configuration in a process pool and aggregates the results in a DataFrame.
+
+    Parameters:
+        configurations : list of dicts of Bed and Adsorbent_Langmuir parameters (see parameter_grid).
+        percentage : percentage of saturation defining the breakthrough point (see get_percentage_point).
+        max_workers : number of worker processes (the configurations are run in this process when it is 1).
+        chunk_size : number of configurations sent to a worker at once. The configurations are grouped by
+            dimensionless problem (see adsorpsim.similarity), so that similar beds share a chunk as far as possible.
+        timeout : time limit in seconds of every simulation (not enforced by a serial sweep run outside the main thread).
+        failure_value : value reported for the results of failed, timed-out or (with early_stop) not-reached simulations
+            (e.g. 1e6 to penalize them like the fitter does).
+        progress : optional callable progress(done, total) called whenever a chunk is finished.
+        early_stop : stop every integration at the breakthrough (see run_configuration).
+        reduced_model : optional ReducedOrderModel simulating the configurations (see run_configuration).
+
+    Returns:
+        DataFrame with one row per configuration, in the input order: the parameters followed by
+        breakthrough_time, adsorbed_CO2, adsorbed_H2O, status, error, elapsed, and the method and
+        statistics (nfev, njev, nlu) of the solver and the rom_error of the reduced model (None without it).
+    """
+    if chunk_size < 1:
+        raise ValueError("The variable 'chunk_size' must be at least 1.")
+    configurations = list(configurations)
+    indexed = _similarity_order(enumerate(configurations))
+    chunks = [indexed[i:i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+    results = [None] * len(configurations)
+    done = 0
+
+    def collect(chunk_results):
+        nonlocal done
+        for index, result in chunk_results:
+            results[index] = result
+        done += len(chunk_results)
+        if progress is not None:
+            progress(done, len(configurations))
+
+    if max_workers == 1:
+        for chunk in chunks:
+            collect(_run_chunk(chunk, percentage, timeout, early_stop, reduced_model))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_run_chunk, chunk, percentage, timeout, early_stop, reduced_model): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    chunk_results = future.result()
+                except Exception as e:
+                    # the worker itself died (e.g. killed or out of memory)
+                    chunk_results = [(index, {"status": "failed", "error": repr(e), "elapsed": np.nan})
+                                     for index, _ in futures[future]]
+                collect(chunk_results)
+
+    df = pd.DataFrame(configurations)
+    df_results = pd.DataFrame(results, columns=[*RESULT_COLUMNS, "status", "error", "elapsed", *SOLVER_COLUMNS])
+    failed = df_results["status"] != "ok"
+    df_results.loc[failed, list(RESULT_COLUMNS)] = failure_value
+    return pd.concat([df, df_results], axis=1)
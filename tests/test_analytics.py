@@ -0,0 +1,42 @@
+import pytest
+import numpy as np
+from adsorpsim import Adsorbent_Langmuir, Bed, get_percentage_point
+from adsorpsim.analytics import breakthrough_times, cumulative_uptake, adsorbed_quantity
+
+
+@pytest.fixture
+def curves():
+    t = np.linspace(0, 100, 101)
+    outlet = np.vstack([
+        0.01624 / (1 + np.exp(-(t - 40) / 5)),
+        0.01624 / (1 + np.exp(-(t - 60) / 5)),
+    ])
+    return t, outlet
+
+# Test crossing times are interpolated for many curves and percentages at once
+def test_breakthrough_times_batch(curves):
+    t, outlet = curves
+    times = breakthrough_times(t, outlet, [10, 50, 90], reference=0.01624)
+    assert times.shape == (2, 3)
+    assert times[0, 1] == pytest.approx(40, abs=1e-2)
+    assert times[1, 1] == pytest.approx(60, abs=1e-2)
+    assert np.isnan(breakthrough_times(t, outlet[0], 150, reference=0.01624))
+    assert breakthrough_times(t, outlet[0], 50, reference=0.01624) == pytest.approx(times[0, 1])
+
+# Test the crossing time agrees with get_percentage_point on a simulated curve
+def test_breakthrough_times_matches_percentage_point():
+    ads = Adsorbent_Langmuir("A", 2.0, 0.5, 1.0, 1000)
+    t, outlet, _ = Bed(1.0, 0.1, 0.01, 20, 2000, ads).simulate()
+    x, _ = get_percentage_point(50, t, outlet)
+    assert breakthrough_times(t, outlet, 50) == pytest.approx(x, abs=t[1] - t[0])
+
+# Test the trapezoidal uptake against the analytic integral of a linear outlet curve
+def test_cumulative_uptake_and_adsorbed_quantity():
+    t = np.linspace(0, 10, 11)
+    outlet = np.linspace(0, 1, 11)
+    uptake = cumulative_uptake(t, outlet, flow_rate=2.0, inlet_conc=1.0)
+    # integral of 2 * (1 - t/10) from 0 to t
+    assert np.allclose(uptake, 2 * (t - t ** 2 / 20))
+    assert adsorbed_quantity(t, outlet, 2.0, 5.0, inlet_conc=1.0) == pytest.approx(7.5)
+    both = adsorbed_quantity(t, np.vstack([outlet, outlet]), 2.0, [[5.0, np.nan], [10.0, 2.5]], inlet_conc=1.0)
+    assert both[0, 0] == pytest.approx(7.5) and np.isnan(both[0, 1]) and both[1, 0] == pytest.approx(10)
@@ -0,0 +1,32 @@
+import pytest
+import numpy as np
+import pandas as pd
+from adsorpsim import Adsorbent_Langmuir, Bed
+from adsorpsim.background import BackgroundFit
+
+
+@pytest.fixture
+def experiment():
+    bed = Bed(1.0, 0.1, 1e-5, 5, 10, Adsorbent_Langmuir("TestAds", 2.0, 0.5, 1.0, 1000))
+    t, outlet_CO2, _ = bed.simulate()
+    noise = np.random.default_rng(0).normal(0, 0.0001, size=len(outlet_CO2))
+    return pd.DataFrame({"time": t, "outlet_CO2": outlet_CO2 + noise})
+
+# Test a background fit reports its progress and leaves its template untouched
+def test_background_fit(experiment):
+    template = Bed(1.0, 0.1, 1e-5, 5, 10, None)
+    job = BackgroundFit(experiment, template, 1000)
+    assert job.wait(timeout=60)
+    assert job.error is None and isinstance(job.adsorbent, Adsorbent_Langmuir)
+    assert job.evaluations > 0 and np.isfinite(job.best_loss) and job.progress == 1.0
+    assert template.adsorbent is None and job.bed.adsorbent.density == 1000
+
+# Test a cancelled fit stops at its next evaluation without result
+def test_background_fit_cancel(experiment):
+    job = BackgroundFit(experiment, Bed(1.0, 0.1, 1e-5, 5, 10, None), 1000)
+    job.cancel()
+    # an evaluation running when the fit is cancelled may still be reported
+    evaluations = job.evaluations
+    assert job.wait(timeout=60)
+    assert job.cancelled and job.adsorbent is None
+    assert job.evaluations <= evaluations + 1
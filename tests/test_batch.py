@@ -0,0 +1,41 @@
+import pytest
+import numpy as np
+from adsorpsim import Adsorbent_Langmuir, Bed, BatchBed
+
+
+@pytest.fixture
+def beds():
+    ads_1 = Adsorbent_Langmuir("A", 2.0, 0.5, 1.0, 1000, 1.0, 0.1, 0.5)
+    ads_2 = Adsorbent_Langmuir("B", 4.0, 0.2, 0.1, 700)
+    return [
+        Bed(1.0, 0.1, 0.01, 20, 200, ads_1),
+        Bed(0.5, 0.2, 0.02, 20, 200, ads_2),
+        Bed(1.5, 0.1, 0.01, 20, 200, ads_1, humidity_percentage=50),
+    ]
+
+# Test the stacked solve reproduces the individual simulations
+def test_batch_matches_individual_beds(beds):
+    t, outlet_CO2, outlet_H2O = BatchBed.from_beds(beds).simulate()
+    assert outlet_CO2.shape == outlet_H2O.shape == (3, 200)
+    for i, bed in enumerate(beds):
+        t_bed, CO2_bed, H2O_bed = bed.simulate()
+        assert np.allclose(t, t_bed)
+        assert np.allclose(outlet_CO2[i], CO2_bed, rtol=1e-3, atol=1e-7)
+        if H2O_bed is not None:
+            assert np.allclose(outlet_H2O[i], H2O_bed, rtol=1e-3, atol=1e-7)
+        else:
+            assert np.allclose(outlet_H2O[i], 0)
+
+# Test scalar parameters are broadcast and dry batches return no H2O outlet
+def test_batch_broadcast_dry():
+    batch = BatchBed([0.5, 1.0], 0.1, 0.01, 10, 50, 2.0, 0.5, 1.0, 1000)
+    assert batch.velocity.shape == (2,)
+    t, outlet_CO2, outlet_H2O = batch.simulate()
+    assert outlet_CO2.shape == (2, 50)
+    assert outlet_H2O is None
+
+# Test beds with different grids cannot be stacked
+def test_batch_rejects_different_grids(beds):
+    beds[0].num_segments = 10
+    with pytest.raises(ValueError):
+        BatchBed.from_beds(beds)
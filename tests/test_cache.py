@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+from adsorpsim import Adsorbent_Langmuir, Bed
+from adsorpsim import cache
+from adsorpsim.cache import SimulationCache, simulation_key
+
+
+@pytest.fixture
+def sample_adsorbent():
+    return Adsorbent_Langmuir("TestAds", 2.0, 0.5, 1.0, 1000, 1.0, 0.1, 0.5)
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    results_cache = SimulationCache()
+    monkeypatch.setattr(cache, "default_cache", results_cache)
+    return results_cache
+
+# Test the key depends on the physical parameters and the solver settings, not on the adsorbent name or number types
+def test_simulation_key(sample_adsorbent):
+    bed = Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent)
+    renamed = Adsorbent_Langmuir("Other", 2, 0.5, 1, 1000.0, 1, 0.1, 0.5)
+    assert simulation_key(bed, rtol=1e-6) == simulation_key(Bed(1, 0.1, 1e-5, 5, 10, renamed), rtol=1e-6)
+    assert simulation_key(bed, rtol=1e-6) != simulation_key(bed, rtol=1e-3)
+    assert simulation_key(bed) != simulation_key(Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent, humidity_percentage=10))
+
+# Test Bed.simulate uses the cache transparently and returns copies of the cached arrays
+def test_simulate_uses_cache(sample_adsorbent, fresh_cache):
+    bed = Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent, humidity_percentage=50)
+    t, outlet_CO2, outlet_H2O = bed.simulate()
+    outlet_CO2[:] = -1
+    t2, outlet_CO2_2, outlet_H2O_2 = Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent, humidity_percentage=50).simulate()
+    assert fresh_cache.stats()["misses"] == 1
+    assert fresh_cache.stats()["memory_hits"] == 1
+    assert np.all(outlet_CO2_2 >= 0)
+    assert np.allclose(outlet_H2O, outlet_H2O_2)
+    bed.simulate(use_cache=False)
+    assert fresh_cache.stats()["memory_hits"] == 1
+
+# Test a failed integration raises, even on its first step, and is not cached
+def test_failed_simulation_not_cached(sample_adsorbent, fresh_cache, monkeypatch):
+    from scipy.integrate import BDF
+    from adsorpsim.integrate import integrate
+    bed = Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent)
+    with monkeypatch.context() as patch:
+        patch.setattr(BDF, "_step_impl", lambda self: (False, "step failed"))
+        trajectory = integrate(lambda t, y: -y, 0, np.ones(2), 1, np.linspace(0, 1, 5), [0])
+        assert trajectory.status == -1 and trajectory.t_final == 0 and np.array_equal(trajectory.y_final, np.ones(2))
+        with pytest.raises(RuntimeError):
+            bed.simulate(stop_at_breakthrough=50)
+    assert bed.simulate(stop_at_breakthrough=50).status in (0, 1)
+    assert fresh_cache.stats()["misses"] == 2
+
+# Test the in-memory tier evicts the least recently used entry
+def test_memory_lru_eviction():
+    results_cache = SimulationCache(max_entries=2)
+    results_cache.put("a", {"t": np.zeros(3), "outlet_H2O": None})
+    results_cache.put("b", {"t": np.ones(3), "outlet_H2O": None})
+    results_cache.get("a")
+    results_cache.put("c", {"t": np.ones(3), "outlet_H2O": None})
+    assert results_cache.get("b") is None
+    assert results_cache.get("a") is not None
+    assert len(results_cache) == 2
+
+# Test the on-disk tier survives a new cache instance and is bounded in size
+def test_disk_tier(tmp_path):
+    results_cache = SimulationCache(directory=tmp_path)
+    results_cache.put("key", {"t": np.arange(5.0), "outlet_H2O": None})
+    other = SimulationCache(directory=tmp_path)
+    value = other.get("key")
+    assert np.array_equal(value["t"], np.arange(5.0)) and value["outlet_H2O"] is None
+    assert other.stats()["disk_hits"] == 1
+
+    small = SimulationCache(directory=tmp_path / "small", max_disk_bytes=1)
+    small.put("first", {"t": np.random.rand(1000)})
+    small.put("second", {"t": np.random.rand(1000)})
+    assert len(list((tmp_path / "small").glob("*.npz"))) == 0
+    assert small.get("second") is not None  # still in memory
@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import pytest
 import numpy as np
 import pandas as pd
@@ -6,6 +8,7 @@ from pathlib import Path
 from adsorpsim import (
     Adsorbent_Langmuir,
     Bed,
+    SimulationResult,
     download_data,
     get_percentage_point,
     plot_the_graph,
@@ -91,6 +94,9 @@ def test_adsorbed_CO2_quantity(sample_bed):
     x, y = get_percentage_point(50, t, outlet_CO2)
     q_CO2 = get_adsorbed_quantity_CO2(outlet_CO2, x, y, sample_bed.flow_rate)
     assert q_CO2 >= 0
+    # a point which is not on the curve raises instead of integrating up to the first sample
+    with pytest.raises(ValueError):
+        get_adsorbed_quantity_CO2(outlet_CO2, x, y + 1e-9, sample_bed.flow_rate)
 
 # Test H2O adsorbed quantity calculation
 def test_adsorbed_H2O_quantity(sample_adsorbent):
@@ -137,3 +143,119 @@ def test_fit_adsorption_parameters(sample_bed):
     assert isinstance(fitted_adsorbent, Adsorbent_Langmuir)
     assert fig is not None
     assert fitted_adsorbent.q_max_CO2 > 0
+
+# Test the analytic sparse Jacobian against a finite-difference estimate (dry and humid layouts)
+@pytest.mark.parametrize("humidity", [0, 50])
+def test_jacobian_matches_finite_difference(sample_adsorbent, humidity):
+    bed = Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent, humidity_percentage=humidity)
+    y = np.random.default_rng(0).uniform(0, 0.02, size=len(bed._initial_conditions()))
+    J = bed._jacobian(0, y).toarray()
+    eps = 1e-8
+    f0 = bed._ode_system(0, y)
+    J_fd = np.empty_like(J)
+    for j in range(len(y)):
+        y_step = y.copy()
+        y_step[j] += eps
+        J_fd[:, j] = (bed._ode_system(0, y_step) - f0) / eps
+    assert np.allclose(J, J_fd, rtol=1e-4, atol=1e-6)
+
+# Test the preallocated kernel against the explicit upwind/Langmuir equations
+def test_kernel_rhs_matches_equations(sample_adsorbent):
+    bed = Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent, humidity_percentage=50)
+    n = bed.num_segments
+    y = np.random.default_rng(1).uniform(0, 0.02, size=4 * n)
+    dy = bed._ode_system(0, y)
+    for i, (C_in, q_max, K, k_ads) in enumerate([
+        (bed.initial_conc_CO2, 2.0, 0.5, 1.0),
+        (bed.initial_conc_H2O, 1.0, 0.1, 0.5),
+    ]):
+        C = y[i * n:(i + 1) * n]
+        q = y[(2 + i) * n:(3 + i) * n]
+        dq = k_ads * (q_max * K * C / (1 + K * C) - q)
+        dC = -bed.velocity * (C - np.concatenate([[C_in], C[:-1]])) / bed.dz - 1000 * dq
+        assert np.allclose(dy[i * n:(i + 1) * n], dC)
+        assert np.allclose(dy[(2 + i) * n:(3 + i) * n], dq)
+    # the kernel is reused as long as the parameters are unchanged
+    assert bed._kernel() is bed._kernel()
+
+# Test the integration stops at the interpolated breakthrough point
+def test_simulate_stop_at_breakthrough(sample_adsorbent):
+    bed = Bed(1.0, 0.1, 0.01, 20, 2000, sample_adsorbent, humidity_percentage=50)
+    t_full, outlet_full, _ = bed.simulate()
+    t, outlet_CO2, outlet_H2O = bed.simulate(stop_at_breakthrough=50)
+    target = 0.5 * bed.initial_conc_CO2
+    assert t[-1] < t_full[-1]
+    assert len(t) == len(outlet_CO2) == len(outlet_H2O)
+    assert outlet_CO2[-1] == pytest.approx(target, rel=1e-6)
+    assert np.all(outlet_CO2[:-1] < target)
+    assert t[-1] == pytest.approx(np.interp(target, outlet_full, t_full), rel=1e-2)
+    with pytest.raises(ValueError):
+        bed.simulate(stop_at_breakthrough=150)
+
+# Test the outlet-only integration matches solve_ivp and records the requested probes and profiles
+def test_simulate_outlet_only_probes_and_profiles(sample_adsorbent):
+    from scipy.integrate import solve_ivp
+    bed = Bed(1.0, 0.1, 0.01, 20, 500, sample_adsorbent, humidity_percentage=50)
+    result = bed.simulate(probes=[0.0, 0.5, 1.0], profile_every=100)
+    t, outlet_CO2, outlet_H2O = result
+    sol = solve_ivp(bed._ode_system, (0, 500), bed._initial_conditions(), t_eval=t, method='BDF',
+                    jac=bed._jacobian, rtol=1e-6, atol=1e-9)
+    assert np.allclose(outlet_CO2, sol.y[19], rtol=1e-6, atol=1e-10)
+    assert np.allclose(outlet_H2O, sol.y[39], rtol=1e-6, atol=1e-10)
+    assert result.probes_CO2.shape == result.probes_H2O.shape == (3, 500)
+    assert np.allclose(result.probes_CO2[1], sol.y[10], rtol=1e-6, atol=1e-10)
+    assert np.allclose(result.probes_CO2[2], outlet_CO2)
+    assert np.allclose(result.profile_t, t[::100])
+    assert np.allclose(result.profiles, sol.y[:, ::100].T, rtol=1e-6, atol=1e-10)
+
+# Test a simulation extended from a checkpoint matches a simulation run directly to the new total time
+def test_extend_from_checkpoint(sample_adsorbent, tmp_path):
+    bed = Bed(1.0, 0.1, 0.01, 20, 300, sample_adsorbent, humidity_percentage=50)
+    result = bed.simulate(use_cache=False, probes=[0.5])
+    assert result.t_final == 300 and len(result.y_final) == 80
+    result.save(tmp_path / "checkpoint.npz")
+    checkpoint = SimulationResult.load(tmp_path / "checkpoint.npz")
+    assert checkpoint.method == "BDF" and np.array_equal(checkpoint.y_final, result.y_final)
+
+    extended = bed.extend(checkpoint, 600)
+    direct = Bed(1.0, 0.1, 0.01, 20, 600, sample_adsorbent, humidity_percentage=50).simulate(use_cache=False, probes=[0.5])
+    after = extended.t > 300
+    assert np.allclose(extended.t[after], direct.t[direct.t > 300])
+    assert np.allclose(extended.outlet_CO2[after], direct.outlet_CO2[direct.t > 300], rtol=1e-3, atol=1e-8)
+    assert np.allclose(extended.probes_H2O[:, after], direct.probes_H2O[:, direct.t > 300], rtol=1e-3, atol=1e-8)
+    assert extended.t_final == 600 and extended.nfev > result.nfev
+    with pytest.raises(ValueError):
+        Bed(1.0, 0.1, 0.01, 10, 300, sample_adsorbent).extend(checkpoint, 600)
+
+# Test the automatic solver choice and the solver settings and statistics of the results
+def test_simulate_solver_selection(sample_adsorbent):
+    zeolite = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0)
+    assert Bed(1.0, 0.1, 0.01, 50, 3000, zeolite).auto_method() == 'LSODA'
+    assert Bed(1.0, 0.1, 0.01, 200, 3000, zeolite).auto_method() == 'BDF'
+    slow = Adsorbent_Langmuir("slow", 2.0, 0.5, 1e-3, 1000)
+    assert Bed(1.0, 0.1, 1e-5, 5, 10, slow).auto_method() == 'RK45'
+    assert Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent).auto_method() == 'LSODA'
+
+    bed = Bed(1.0, 0.1, 0.01, 50, 1000, zeolite)
+    reference = bed.simulate(use_cache=False)
+    result = bed.simulate(use_cache=False, method="auto")
+    assert result.method == 'LSODA' and reference.method == 'BDF'
+    assert np.allclose(result.outlet_CO2, reference.outlet_CO2, atol=1e-4 * bed.initial_conc_CO2)
+    assert result.nfev > 0 and result.njev > 0 and result.wall_time > 0
+    loose = bed.simulate(use_cache=False, rtol=1e-3, atol=1e-6)
+    assert loose.rtol == 1e-3 and loose.nfev < reference.nfev
+    with pytest.raises(ValueError):
+        bed.simulate(method="Euler")
+
+# Test importing the package and accessing Bed leaves out the plotting, database and fitting dependencies,
+# and that the functions moved out of adsorpsim.core are still available from it
+def test_lazy_imports():
+    code = ("import sys, adsorpsim; adsorpsim.Bed; "
+            "print([name for name in ('matplotlib', 'pandas', 'scipy.optimize', 'numba') if name in sys.modules])")
+    assert subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip() == "[]"
+    from adsorpsim.core import plot_the_graph as moved
+    assert moved is plot_the_graph
+    with pytest.raises(AttributeError):
+        import adsorpsim
+        adsorpsim.not_a_name
+
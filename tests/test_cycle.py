@@ -0,0 +1,42 @@
+import pytest
+import numpy as np
+from adsorpsim import Adsorbent_Langmuir, Bed, CycleStep, CyclicBed
+
+
+@pytest.fixture
+def cyclic_bed():
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 0.05, 650.0)
+    bed = Bed(1.0, 0.1, 0.01, 20, 100, adsorbent)
+    steps = [
+        CycleStep("adsorption", 100),
+        CycleStep("desorption", 100, feed=False, counter_current=True, affinity_factor=0.7),
+    ]
+    return CyclicBed(bed, steps)
+
+# Test the accelerated iterations reach the cyclic steady state of the plain cycling in fewer cycles
+def test_cyclic_steady_state_acceleration(cyclic_bed):
+    picard = cyclic_bed.cyclic_steady_state("picard", tol=1e-7)
+    anderson = cyclic_bed.cyclic_steady_state("anderson", tol=1e-7)
+    assert picard.converged and anderson.converged
+    assert anderson.cycles < picard.cycles / 2
+    assert np.abs((anderson.y_css - picard.y_css) / cyclic_bed.scale).max() < 1e-4
+    # the state is periodic, and what is captured during the feed is released during the purge
+    assert cyclic_bed.residual(anderson.y_css, cyclic_bed.run_cycle(anderson.y_css)) < 1e-6
+    assert anderson.captured["CO2"] == pytest.approx(anderson.recovered["CO2"], rel=1e-2)
+    assert [name for name, _, _ in anderson.steps] == ["adsorption", "desorption"]
+
+# Test a recorded cycle holds one point per second of every step and a non-negative final state
+def test_cycle_step_handoff(cyclic_bed):
+    y = cyclic_bed.bed._initial_conditions()
+    y_end, recorded = cyclic_bed.run_cycle(y, record=True)
+    t, outlets = recorded[1]
+    assert len(t) == 101 and outlets.shape == (1, 101)
+    assert np.all(y_end >= -1e-9)
+
+# Test an unknown method and the high-order schemes are rejected
+def test_cyclic_validation(cyclic_bed):
+    with pytest.raises(ValueError):
+        cyclic_bed.cyclic_steady_state("secant")
+    bed = Bed(1.0, 0.1, 0.01, 20, 100, cyclic_bed.bed.adsorbent, scheme="weno3")
+    with pytest.raises(ValueError):
+        CyclicBed(bed, cyclic_bed.steps)
@@ -0,0 +1,69 @@
+import pytest
+import numpy as np
+import pandas as pd
+from adsorpsim import Adsorbent_Langmuir, Bed
+from adsorpsim.fitting import (
+    SensitivitySystem,
+    fit_adsorption_parameters_least_squares,
+    fit_adsorption_parameters_multistart,
+    latin_hypercube,
+)
+
+
+@pytest.fixture
+def true_adsorbent():
+    return Adsorbent_Langmuir("True", 3.0, 0.3, 0.5, 800)
+
+@pytest.fixture
+def bed(true_adsorbent):
+    return Bed(1.0, 0.1, 0.01, 10, 1500, true_adsorbent)
+
+# Test the forward sensitivities against central finite differences of the outlet curve
+def test_outlet_sensitivities_match_finite_differences(bed):
+    t_eval = np.linspace(0, 1500, 50)
+    params = np.array([3.0, 0.3, 0.5])
+    outlet, sensitivities = SensitivitySystem(bed, *params).outlet_sensitivities(t_eval, 1500, rtol=1e-8, atol=1e-12)
+    assert np.allclose(outlet, bed.simulate(use_cache=False)[1][np.searchsorted(np.linspace(0, 1500, 1500), t_eval)], atol=1e-4)
+    for j in range(3):
+        step = np.zeros(3)
+        step[j] = 1e-4 * params[j]
+        up = SensitivitySystem(bed, *(params + step)).outlet_sensitivities(t_eval, 1500, rtol=1e-8, atol=1e-12)[0]
+        down = SensitivitySystem(bed, *(params - step)).outlet_sensitivities(t_eval, 1500, rtol=1e-8, atol=1e-12)[0]
+        assert np.allclose(sensitivities[j], (up - down) / (2 * step[j]), rtol=1e-2, atol=1e-2 * np.abs(sensitivities[j]).max())
+
+# Test the least-squares fitter recovers the parameters of synthetic data with few solves
+def test_least_squares_fit_recovers_parameters(bed):
+    t, outlet, _ = bed.simulate()
+    df = pd.DataFrame({"time": t[::10], "outlet_CO2": outlet[::10]})
+    template = Bed(1.0, 0.1, 0.01, 10, 1500, None)
+    fitted, fig, report = fit_adsorption_parameters_least_squares(df, template, assumed_density=800, initial_guess=[2.0, 0.5, 1.0])
+    assert fitted.q_max_CO2 == pytest.approx(3.0, rel=1e-2)
+    assert fitted.K_CO2 == pytest.approx(0.3, rel=5e-2)
+    assert fitted.k_ads_CO2 == pytest.approx(0.5, rel=5e-2)
+    assert report["success"] and report["nfev"] < 50
+    assert report["covariance"].shape == (3, 3)
+    assert fig is not None
+
+# Test the starting points cover every interval of the log-scaled bounds once
+def test_latin_hypercube_within_bounds():
+    bounds = {"q_max_CO2": (0.1, 10.0), "K_CO2": (0.01, 1.0), "k_ads_CO2": (0.1, 1.0)}
+    starts = latin_hypercube(5, bounds, seed=0)
+    assert starts.shape == (5, 3)
+    for column, (low, high) in zip(starts.T, bounds.values()):
+        bins = np.floor(5 * np.log(column / low) / np.log(high / low))
+        assert sorted(bins) == [0, 1, 2, 3, 4]
+
+# Test the multi-start fitter refines the best coarse candidates and recovers the identifiable parameters
+def test_multistart_fit(bed):
+    t, outlet, _ = bed.simulate()
+    df = pd.DataFrame({"time": t, "outlet_CO2": outlet})
+    template = Bed(1.0, 0.1, 0.01, 10, 1500, None)
+    fitted, fig, candidates = fit_adsorption_parameters_multistart(
+        df, template, assumed_density=800, n_starts=3, n_refine=1, max_workers=2, seed=0, plot=False)
+    assert fig is None
+    assert list(candidates["stage"]) == ["refined", "coarse", "coarse", "coarse"]
+    assert (candidates["status"] == "ok").all()
+    assert candidates.loc[0, "rmse"] <= candidates["rmse"].min()
+    # at this low CO2 concentration the isotherm is nearly linear, so only q_max_CO2 * K_CO2 is well determined
+    assert fitted.q_max_CO2 * fitted.K_CO2 == pytest.approx(0.9, rel=2e-2)
+    assert fitted.k_ads_CO2 == pytest.approx(0.5, rel=5e-2)
@@ -0,0 +1,62 @@
+import pytest
+import numpy as np
+import pandas as pd
+from adsorpsim import Adsorbent_Langmuir, Bed, fit_adsorption_parameters_from_df
+from adsorpsim.ingest import file_digest, load_breakthrough_data
+
+
+def _write(path, t, outlet, bom=True):
+    text = "time;outlet_CO2\r\n" + "".join(f"{a};{b}\r\n" for a, b in zip(t, outlet))
+    path.write_bytes(("﻿" if bom else "").encode() + text.encode())
+
+# Test a file with a byte order mark is read, cached as memory-mapped columns and cached again when it changes
+def test_breakthrough_cache(tmp_path):
+    path = tmp_path / "logger.csv"
+    t = np.arange(100.0)
+    outlet = np.linspace(0, 0.016, 100)
+    _write(path, t, outlet)
+    data = load_breakthrough_data(path, cache_dir=tmp_path / "cache")
+    assert isinstance(data["time"], np.memmap)
+    assert np.array_equal(data["time"], t) and np.allclose(data["outlet_CO2"], outlet, rtol=1e-12, atol=0)
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+    load_breakthrough_data(path, cache_dir=tmp_path / "cache")
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    with open(path, "rb") as file:
+        digest = file_digest(file)
+        assert np.array_equal(load_breakthrough_data(file, cache_dir=tmp_path / "cache", digest=digest)["time"], t)
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    _write(path, t, 2 * outlet, bom=False)
+    assert np.allclose(load_breakthrough_data(path, cache_dir=tmp_path / "cache")["outlet_CO2"], 2 * outlet, rtol=1e-12, atol=0)
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+# Test the decimation and the binning do not depend on the chunks, and the faulty lines are reported
+@pytest.mark.parametrize("chunk_rows", [7, 1000])
+def test_breakthrough_chunks(tmp_path, chunk_rows):
+    path = tmp_path / "logger.csv"
+    t = np.arange(0, 200.0, 0.5)
+    outlet = np.sin(t) ** 2
+    _write(path, t, outlet)
+    decimated = load_breakthrough_data(path, decimate=3, use_cache=False, chunk_rows=chunk_rows)
+    assert np.array_equal(decimated["time"], t[::3])
+    binned = load_breakthrough_data(path, bin_width=10, use_cache=False, chunk_rows=chunk_rows)
+    expected = pd.DataFrame({"outlet_CO2": outlet}).groupby(t // 10).mean()["outlet_CO2"]
+    assert np.allclose(binned["outlet_CO2"], expected) and np.allclose(binned["time"], np.arange(20) * 10 + 4.75)
+
+    _write(path, [0, 1, 1], [0, 0, 0])
+    with pytest.raises(ValueError, match="line 4"):
+        load_breakthrough_data(path, use_cache=False, chunk_rows=chunk_rows)
+    path.write_text("time;outlet_CO2\n0;0\n1;n/a\n")
+    with pytest.raises(ValueError, match="line 3"):
+        load_breakthrough_data(path, use_cache=False, chunk_rows=chunk_rows)
+
+# Test the fitter accepts the memory-mapped columns
+def test_fit_from_breakthrough_data(tmp_path):
+    bed = Bed(1.0, 0.1, 1e-5, 5, 10, Adsorbent_Langmuir("TestAds", 2.0, 0.5, 1.0, 1000))
+    t, outlet_CO2, _ = bed.simulate()
+    path = tmp_path / "logger.csv"
+    _write(path, t, outlet_CO2 + np.random.default_rng(0).normal(0, 0.0001, size=len(outlet_CO2)))
+    data = load_breakthrough_data(path, cache_dir=tmp_path / "cache")
+    fitted_adsorbent, fig = fit_adsorption_parameters_from_df(data, bed)
+    assert isinstance(fitted_adsorbent, Adsorbent_Langmuir)
+    assert fitted_adsorbent.q_max_CO2 > 0
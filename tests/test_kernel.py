@@ -0,0 +1,124 @@
+import pytest
+import numpy as np
+from adsorpsim import Adsorbent_Langmuir, Bed
+from adsorpsim import kernel
+from adsorpsim.analytics import breakthrough_times
+from adsorpsim.kernel import (
+    BreakthroughKernel, CompetitiveBreakthroughKernel, HighOrderBreakthroughKernel, NumbaBreakthroughKernel, kernel_class
+)
+
+
+@pytest.fixture
+def sample_adsorbent():
+    return Adsorbent_Langmuir("TestAds", 2.0, 0.5, 1.0, 1000, 1.0, 0.1, 0.5)
+
+# Test the numba kernel evaluates the same RHS and Jacobian as the NumPy kernel
+@pytest.mark.parametrize("humidity", [0, 50])
+def test_numba_kernel_matches_numpy_kernel(sample_adsorbent, humidity):
+    pytest.importorskip("numba")
+    bed = Bed(1.0, 0.1, 1e-5, 7, 10, sample_adsorbent, humidity_percentage=humidity)
+    y = np.random.default_rng(0).uniform(0, 0.02, size=len(bed._initial_conditions()))
+    numpy_kernel = BreakthroughKernel.from_bed(bed)
+    numba_kernel = NumbaBreakthroughKernel.from_bed(bed)
+    assert np.allclose(numba_kernel.rhs(0, y), numpy_kernel.rhs(0, y))
+    assert np.allclose(numba_kernel.jacobian(0, y).toarray(), numpy_kernel.jacobian(0, y).toarray())
+
+# Test the outlet curves of both backends agree within the solver tolerance
+@pytest.mark.parametrize("humidity", [0, 50])
+def test_numba_backend_outlet_parity(sample_adsorbent, humidity):
+    pytest.importorskip("numba")
+    outlets = []
+    for backend in ("numpy", "numba"):
+        bed = Bed(1.0, 0.1, 0.01, 30, 300, sample_adsorbent, humidity_percentage=humidity, backend=backend)
+        outlets.append(bed.simulate())
+    (t_np, co2_np, h2o_np), (t_nb, co2_nb, h2o_nb) = outlets
+    assert np.allclose(t_np, t_nb)
+    assert np.allclose(co2_np, co2_nb, rtol=1e-4, atol=1e-8)
+    if humidity:
+        assert np.allclose(h2o_np, h2o_nb, rtol=1e-4, atol=1e-8)
+
+# Test the numba backend falls back to NumPy when numba is not installed
+def test_numba_backend_fallback(monkeypatch):
+    monkeypatch.setattr(kernel, "numba", None)
+    with pytest.warns(UserWarning, match="numba is not installed"):
+        assert kernel_class("numba") is BreakthroughKernel
+
+# Test an unknown backend is rejected
+def test_unknown_backend(sample_adsorbent):
+    with pytest.raises(ValueError):
+        Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent, backend="fortran")
+
+# Test the Jacobian of the higher-order schemes matches finite differences of their RHS
+@pytest.mark.parametrize("scheme", ["minmod", "van_leer", "weno3"])
+@pytest.mark.parametrize("humidity", [0, 50])
+def test_high_order_jacobian(sample_adsorbent, scheme, humidity):
+    bed = Bed(1.0, 0.1, 1e-5, 9, 10, sample_adsorbent, humidity_percentage=humidity, scheme=scheme)
+    kernel = kernel_class(bed.backend, bed.scheme).from_bed(bed)
+    assert isinstance(kernel, HighOrderBreakthroughKernel)
+    y = np.random.default_rng(0).uniform(0, 0.02, size=len(bed._initial_conditions()))
+    jacobian = kernel.jacobian(0, y).toarray()
+    f0 = kernel.rhs(0, y).copy()
+    finite_differences = np.empty_like(jacobian)
+    for j in range(len(y)):
+        y_step = y.copy()
+        y_step[j] += 1e-9
+        finite_differences[:, j] = (kernel.rhs(0, y_step) - f0) / 1e-9
+    assert np.allclose(jacobian, finite_differences, rtol=1e-4, atol=1e-6 * np.abs(jacobian).max())
+
+# Test the higher-order schemes are closer than the upwind one to a fine-grid 50 % breakthrough time
+def test_high_order_schemes_converge_faster():
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0)
+    def half_breakthrough(num_segments, scheme):
+        bed = Bed(1.0, 0.1, 0.01, num_segments, 1000, adsorbent, scheme=scheme)
+        t, outlet_CO2, _ = bed.simulate(use_cache=False)
+        return breakthrough_times(t, outlet_CO2, 50, reference=bed.initial_conc_CO2)
+    reference = half_breakthrough(400, "weno3")
+    upwind_error = abs(half_breakthrough(20, "upwind") - reference)
+    for scheme in ("van_leer", "weno3"):
+        assert abs(half_breakthrough(20, scheme) - reference) < upwind_error
+
+# Test an unknown scheme is rejected
+def test_unknown_scheme(sample_adsorbent):
+    with pytest.raises(ValueError):
+        Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent, scheme="lax_wendroff")
+
+# Test the Jacobian of the competitive kernel matches finite differences of its RHS (CO2, H2O and N2)
+def test_competitive_jacobian():
+    adsorbent = Adsorbent_Langmuir("TestAds", 2.0, 0.5, 1.0, 1000, 1.0, 0.1, 0.5,
+                                   other_species={"N2": (0.5, 0.05, 2.0)}, competitive=True)
+    bed = Bed(1.0, 0.1, 1e-5, 6, 10, adsorbent, humidity_percentage=50, inlet_concentrations={"N2": 30.0})
+    kernel = kernel_class(bed.backend, bed.scheme, competitive=True).from_bed(bed)
+    assert isinstance(kernel, CompetitiveBreakthroughKernel)
+    y = np.random.default_rng(0).uniform(0, 2, size=len(bed._initial_conditions()))
+    jacobian = kernel.jacobian(0, y).toarray()
+    f0 = kernel.rhs(0, y).copy()
+    finite_differences = np.empty_like(jacobian)
+    for j in range(len(y)):
+        y_step = y.copy()
+        y_step[j] += 1e-7
+        finite_differences[:, j] = (kernel.rhs(0, y_step) - f0) / 1e-7
+    assert np.allclose(jacobian, finite_differences, rtol=1e-4, atol=1e-6 * np.abs(jacobian).max())
+
+# Test independent species are unaffected by the others, and competing ones break through earlier
+def test_multicomponent_breakthrough(sample_adsorbent):
+    other = {"N2": (1.0, 0.05, 1.0)}
+    independent = Adsorbent_Langmuir("TestAds", 2.0, 0.5, 1.0, 1000, 1.0, 0.1, 0.5, other_species=other)
+    competitive = Adsorbent_Langmuir("TestAds", 2.0, 0.5, 1.0, 1000, 1.0, 0.1, 0.5, other_species=other, competitive=True)
+    beds = [Bed(1.0, 0.1, 0.01, 20, 400, adsorbent, humidity_percentage=50, inlet_concentrations={"N2": 30.0})
+            for adsorbent in (independent, competitive)]
+    single = Bed(1.0, 0.1, 0.01, 20, 400, sample_adsorbent, humidity_percentage=50).simulate(use_cache=False)
+    mixed, competing = (bed.simulate(use_cache=False) for bed in beds)
+    assert list(mixed.other_species) == ["N2"]
+    assert mixed.outlet("N2").shape == mixed.t.shape
+    assert np.allclose(mixed.outlet_CO2, single.outlet_CO2, rtol=1e-4, atol=1e-6)
+    assert np.allclose(mixed.outlet_H2O, single.outlet_H2O, rtol=1e-4, atol=1e-6)
+    # less CO2 is retained when the species compete for the sites
+    assert competing.outlet_CO2.sum() > mixed.outlet_CO2.sum()
+
+# Test unknown species and competitive high-order beds are rejected
+def test_multicomponent_validation(sample_adsorbent):
+    with pytest.raises(ValueError):
+        Bed(1.0, 0.1, 1e-5, 5, 10, sample_adsorbent, inlet_concentrations={"N2": 30.0})
+    competitive = Adsorbent_Langmuir("TestAds", 2.0, 0.5, 1.0, 1000, competitive=True)
+    with pytest.raises(ValueError):
+        Bed(1.0, 0.1, 1e-5, 5, 10, competitive, scheme="weno3")
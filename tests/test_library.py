@@ -0,0 +1,75 @@
+import pytest
+import numpy as np
+from adsorpsim import Adsorbent_Langmuir, Bed
+from adsorpsim import library
+from adsorpsim.library import BreakthroughLibrary, build_library, initial_guess, preview
+from adsorpsim.similarity import residence_time, solve_dimensionless
+
+AXES = {"num_segments": [10, 20], "ratio": [10.0, 100.0], "affinity": [1e-3, 1e-1], "damkohler": [0.1, 1.0, 10.0]}
+X = np.linspace(0, 3, 151)
+
+
+@pytest.fixture(scope="module")
+def small_library(tmp_path_factory):
+    return build_library(tmp_path_factory.mktemp("library"), AXES, X, max_workers=1)
+
+def node_bed(num_segments, ratio, affinity, damkohler, density=800.0, total_time=2000):
+    "Bed whose dimensionless groups are the given ones"
+    bed = Bed(1.0, 0.1, 0.01, num_segments, total_time, None)
+    C_in = bed.initial_conc_CO2
+    capacity = ratio * (1 + affinity) / affinity
+    bed.adsorbent = Adsorbent_Langmuir("Node", capacity * C_in / density, affinity / C_in, damkohler / residence_time(bed), density)
+    return bed
+
+# Test the library reproduces the solved curves at its nodes and reloads from disk
+def test_library_nodes(small_library):
+    curve, error = small_library.curve(20, 100.0, 1e-1, 1.0)
+    groups = {"num_segments": 20, "capacity_CO2": 100.0 * 1.1 / 0.1, "affinity_CO2": 0.1, "damkohler_CO2": 1.0}
+    exact = solve_dimensionless(groups, X * 101, atol=1e-8).recorded[0]
+    assert np.allclose(curve, exact, atol=1e-4)
+    assert np.isfinite(error)
+    reloaded = BreakthroughLibrary(small_library.path)
+    assert np.array_equal(reloaded.curve(20, 100.0, 1e-1, 1.0)[0], curve)
+    # below the smallest affinity the isotherm is linear, the other axes are not extrapolated
+    assert np.isfinite(small_library.curve(20, 100.0, 1e-5, 1.0)[1])
+    assert small_library.curve(20, 100.0, 1e-1, 100.0)[1] == np.inf
+
+# Test the preview of a bed between the nodes stays within its error estimate of the full simulation
+def test_preview_error_estimate(small_library):
+    bed = node_bed(14, 30.0, 1e-2, 3.0)
+    result = preview(bed, small_library)
+    full = bed.simulate(use_cache=False)
+    assert np.allclose(result.t, full.t)
+    assert result.outlet_H2O is None
+    assert np.abs(result.outlet_CO2 - full.outlet_CO2).max() <= result.error_estimate[0]
+
+# Test the H₂O curve of a humid bed whose adsorbent has no H₂O parameters is the exact non-adsorbed one
+def test_preview_non_adsorbed_species(small_library):
+    bed = Bed(1.0, 0.1, 0.01, 14, 2000, node_bed(14, 30.0, 1e-2, 3.0).adsorbent, humidity_percentage=50)
+    result = preview(bed, small_library)
+    full = bed.simulate(use_cache=False)
+    assert result.error_estimate[1] == 0
+    assert np.abs(result.outlet_H2O - full.outlet_H2O).max() <= 1e-5 * bed.initial_conc_H2O
+    assert np.abs(result.outlet_CO2 - full.outlet_CO2).max() <= result.error_estimate[0]
+
+# Test the library seeds the fitter with the parameters of the node matching the data
+def test_initial_guess(small_library):
+    bed = node_bed(10, 100.0, 1e-1, 1.0)
+    t, outlet_CO2, _ = bed.simulate(use_cache=False)
+    guess = initial_guess(bed, 800.0, t, outlet_CO2, small_library)
+    ads = bed.adsorbent
+    assert guess == pytest.approx([ads.q_max_CO2, ads.K_CO2, ads.k_ads_CO2], rel=2e-2)
+
+# Test Bed.simulate(mode="preview") answers from the shipped library
+def test_simulate_preview():
+    if library.default_library() is None:
+        pytest.skip("no breakthrough library shipped")
+    bed = Bed(1.0, 0.1, 0.01, 100, 3000, Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0), humidity_percentage=0)
+    result = bed.simulate(mode="preview")
+    full = bed.simulate(use_cache=False)
+    assert np.abs(result.outlet_CO2 - full.outlet_CO2).max() <= result.error_estimate[0]
+    assert result.error_estimate[0] < 0.05 * bed.initial_conc_CO2
+    with pytest.raises(ValueError):
+        bed.simulate(mode="preview", probes=[0.5])
+    with pytest.raises(ValueError):
+        bed.simulate(mode="fast")
@@ -0,0 +1,59 @@
+import pytest
+import numpy as np
+from adsorpsim import Adsorbent_Langmuir, Bed
+from adsorpsim import cache
+from adsorpsim.cache import SimulationCache
+from adsorpsim.mesh import _window_max, equidistributed_edges, remap
+
+
+@pytest.fixture
+def zeolite():
+    return Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0)
+
+# Test the remapping keeps the integral of the profiles and constant profiles
+def test_remap_is_conservative():
+    rng = np.random.default_rng(0)
+    old_edges = np.concatenate([[0], np.sort(rng.uniform(0, 2, 9)), [2]])
+    new_edges = np.concatenate([[0], np.sort(rng.uniform(0, 2, 14)), [2]])
+    values = np.vstack([rng.uniform(0, 1, 10), np.full(10, 3.0)])
+    remapped = remap(values, old_edges, new_edges)
+    assert remapped.shape == (2, 15)
+    assert np.allclose(remapped @ np.diff(new_edges), values @ np.diff(old_edges))
+    assert np.allclose(remapped[1], 3.0)
+
+# Test the cells concentrate at a front and keep the bounds of the bed
+def test_equidistributed_edges():
+    edges = np.linspace(0, 1, 51)
+    centres = 0.5 * (edges[1:] + edges[:-1])
+    profile = 1 / (1 + np.exp((centres - 0.3) / 0.01))
+    new_edges = equidistributed_edges(edges, profile[None, :], 0.0)
+    widths = np.diff(new_edges)
+    assert new_edges[0] == 0 and new_edges[-1] == 1 and np.all(widths > 0)
+    assert widths[np.searchsorted(new_edges, 0.3) - 1] < 0.2 * widths.max()
+    assert widths.max() <= 2 * 1 / 50 * (1 + 1e-9)
+
+# Test the largest gradient within reach of every cell matches the comparison of every pair of cells
+def test_window_max_matches_pairwise():
+    rng = np.random.default_rng(0)
+    for reach in [0.0, 0.05, 0.3, 2.0]:
+        edges = np.concatenate([[0], np.sort(rng.uniform(0, 1, 39)), [1]])
+        values = rng.uniform(0, 1, 40)
+        centres = 0.5 * (edges[1:] + edges[:-1])
+        nearby = np.abs(centres[:, None] - centres[None, :]) <= reach + 0.5 * np.diff(edges)[None, :]
+        assert np.array_equal(_window_max(values, edges, centres, reach), np.where(nearby, values[None, :], 0).max(axis=1))
+
+# Test the adaptive grid is closer than the uniform one with as many segments to a fine uniform grid
+def test_adaptive_matches_fine_grid(zeolite, monkeypatch):
+    monkeypatch.setattr(cache, "default_cache", SimulationCache())
+    reference = Bed(1.0, 0.1, 0.01, 1280, 1000, zeolite).simulate(use_cache=False)
+    bed = Bed(1.0, 0.1, 0.01, 80, 1000, zeolite)
+    adaptive = bed.simulate(mode="adaptive")
+    uniform = bed.simulate(use_cache=False)
+    adaptive_error = np.abs(adaptive.outlet_CO2 - reference.outlet_CO2).max()
+    assert adaptive_error < 0.5 * np.abs(uniform.outlet_CO2 - reference.outlet_CO2).max()
+    assert len(adaptive.mesh_edges) == 81 and len(adaptive.y_final) == 160
+    assert bed.simulate(mode="adaptive").outlet_CO2 == pytest.approx(adaptive.outlet_CO2)
+    with pytest.raises(ValueError):
+        bed.extend(adaptive, 1200)
+    with pytest.raises(ValueError):
+        bed.simulate(mode="adaptive", stop_at_breakthrough=50)
@@ -0,0 +1,41 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from adsorpsim import plot_the_graph
+from adsorpsim.plotting import BreakthroughFigure, chart_data, lttb
+
+
+# Test the downsampling keeps the ends and the peaks of a noisy front, and leaves short series untouched
+def test_lttb():
+    t = np.linspace(0, 1000, 100_000)
+    outlet = 0.016 / (1 + np.exp(-(t - 500) / 20)) + np.random.default_rng(0).normal(0, 1e-4, len(t))
+    outlet[30_000] += 0.01
+    outlet[70_000] -= 0.01
+    indices = lttb(t, outlet, 500)
+    assert len(indices) == 500 and indices[0] == 0 and indices[-1] == len(t) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 30_000 in indices and 70_000 in indices
+    assert np.array_equal(lttb(t[:100], outlet[:100], 500), np.arange(100))
+
+# Test a figure is reused with new curves, at most max_points long, and its hidden artists are out of the legend
+def test_figure_reuse():
+    t = np.linspace(0, 1000, 10_000)
+    outlet = np.tanh(t / 100)
+    figure = BreakthroughFigure(max_points=200)
+    fig = figure.update(t, outlet, outlet / 2, 500.0, 0.01)
+    assert len(figure.CO2.get_xdata()) <= 400 and figure.H2O.get_visible() and figure.point.get_visible()
+    assert figure.update(t, 2 * outlet) is fig and len(fig.axes) == 1
+    assert not figure.H2O.get_visible() and not figure.point.get_visible()
+    assert [text.get_text() for text in figure.ax.get_legend().get_texts()] == ["Outlet CO₂ Concentration"]
+    assert figure.ax.get_ylim()[1] >= 2 * outlet.max()
+
+    before = len(plt.get_fignums())
+    fig = plot_the_graph(t, outlet, None)
+    assert len(fig.axes[0].lines[1].get_xdata()) <= 1600 and len(plt.get_fignums()) == before + 1
+    plt.close(fig)
+
+# Test the data of the lightweight chart are downsampled curves indexed by time
+def test_chart_data():
+    t = np.linspace(0, 1000, 10_000)
+    data = chart_data(t, np.tanh(t / 100), np.tanh(t / 200), max_points=100)
+    assert list(data.columns) == ["Outlet CO₂ Concentration", "Outlet H₂O Concentration"]
+    assert data.index.name == "Time (s)" and 100 <= len(data) <= 200 and data.index.is_monotonic_increasing
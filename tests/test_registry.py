@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+
+import pytest
+import pandas as pd
+from adsorpsim import Adsorbent_Langmuir, AdsorbentRegistry, load_adsorbent_from_csv
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "adsorbents.csv"
+    path.write_text("name;q_max_CO2;K_CO2;k_ads_CO2;density;q_max_H2O;K_H2O;k_ads_H2O\n"
+                    "zeolite 13X;6.42;0.164882124;1.8;650.0;0.0;0.0;0.0\n"
+                    "Lewatit;3.4;9.0;0.003;744.0;8.0;0.0011;0.002\n")
+    return path
+
+
+def _add_rows(csv_path, worker, count):
+    registry = AdsorbentRegistry(csv_path)
+    for i in range(count):
+        registry.add(f"ads-{worker}-{i}", 1.0 + i, 0.1, 0.01, 700)
+
+# Test the lookups are served from the index, which is reloaded when the file is changed by someone else
+def test_registry_lookup_and_reload(csv_path):
+    registry = AdsorbentRegistry(csv_path)
+    assert registry.names() == ["zeolite 13X", "Lewatit"]
+    assert registry.get("Lewatit").k_ads_H2O == 0.002
+    assert load_adsorbent_from_csv(csv_path, "zeolite 13X").density == 650.0
+    with pytest.raises(ValueError):
+        registry.get("MOF-74")
+
+    frame = pd.read_csv(csv_path, sep=";")
+    frame.loc[0, "density"] = 1200.0
+    frame.to_csv(csv_path, sep=";", index=False)
+    assert registry.get("zeolite 13X").density == 1200.0
+    assert load_adsorbent_from_csv(csv_path, "zeolite 13X").density == 1200.0
+
+# Test the bulk APIs, that the rows are appended and that a batch with a duplicate adds nothing
+def test_registry_add_many(csv_path):
+    registry = AdsorbentRegistry(csv_path)
+    registry.add_many([Adsorbent_Langmuir("MOF; 1", 0.1 + 0.2, 1e-3, 0.5, 900),
+                       {"name": "MOF-2", "q_max_CO2": 2.0, "K_CO2": 0.2, "k_ads_CO2": 0.1, "density": 1000}])
+    assert [ads.q_max_CO2 for ads in registry.get_many(["MOF-2", "MOF; 1"])] == [2.0, 0.1 + 0.2]
+    assert AdsorbentRegistry(csv_path).get("MOF; 1").q_max_CO2 == pytest.approx(0.1 + 0.2, rel=1e-15)
+    assert len(pd.read_csv(csv_path, sep=";")) == 4
+
+    size = os.path.getsize(csv_path)
+    with pytest.raises(ValueError):
+        registry.add_many([{"name": "MOF-3", "q_max_CO2": 1.0, "K_CO2": 0.2, "k_ads_CO2": 0.1, "density": 1000},
+                           {"name": "Lewatit", "q_max_CO2": 1.0, "K_CO2": 0.2, "k_ads_CO2": 0.1, "density": 1000}])
+    with pytest.raises(ValueError):
+        registry.add("MOF-3", 1.0, 0.2, 0.1, 0)
+    with pytest.raises(ValueError):
+        registry.get_many(["MOF-2", "MOF-3"])
+    assert os.path.getsize(csv_path) == size
+
+# Test rows are appended in the order of the header of the file, and that a column missing from it is not dropped silently
+def test_registry_add_reordered_header(tmp_path):
+    csv_path = tmp_path / "adsorbents.csv"
+    csv_path.write_text("density;name;K_CO2;q_max_CO2;k_ads_CO2\n"
+                        "650.0;zeolite 13X;0.164882124;6.42;1.8\n")
+    registry = AdsorbentRegistry(csv_path)
+    registry.add("MOF-2", 2.0, 0.2, 0.1, 1000)
+    assert csv_path.read_text().splitlines()[-1] == "1000;MOF-2;0.2;2.0;0.1"
+    adsorbent = AdsorbentRegistry(csv_path).get("MOF-2")
+    assert (adsorbent.q_max_CO2, adsorbent.K_CO2, adsorbent.k_ads_CO2, adsorbent.density) == (2.0, 0.2, 0.1, 1000)
+
+    size = os.path.getsize(csv_path)
+    with pytest.raises(ValueError):
+        registry.add("MOF-3", 2.0, 0.2, 0.1, 1000, q_max_H2O=1.0, K_H2O=0.1, k_ads_H2O=0.1)
+    assert os.path.getsize(csv_path) == size
+
+# Test appends from concurrent processes are neither lost nor interleaved
+@pytest.mark.skipif(os.name != "posix", reason="the appends are only locked across processes with fcntl")
+def test_registry_concurrent_appends(csv_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_add_rows, args=(csv_path, worker, 25)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+    frame = pd.read_csv(csv_path, sep=";")
+    assert len(frame) == 102 and frame["name"].is_unique
+    assert frame["q_max_CO2"].notna().all()
+    assert len(AdsorbentRegistry(csv_path)) == 102
@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+from adsorpsim import Adsorbent_Langmuir, Bed
+from adsorpsim import cache
+from adsorpsim.cache import SimulationCache
+from adsorpsim.core import SimulationResult
+from adsorpsim.rom import ReducedBed, ReducedOrderModel
+from adsorpsim.sweep import run_configuration
+
+
+def zeolite(factor=1.0, total_time=1000, num_segments=50):
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42 * factor, 0.164882124, 1.8 / factor, 650.0)
+    return Bed(1.0, 0.1, 0.01, num_segments, total_time, adsorbent)
+
+@pytest.fixture(scope="module")
+def reduced_model():
+    return ReducedOrderModel.train([zeolite(factor) for factor in (0.7, 1.0, 1.4)])
+
+# Test the reduced model reproduces the full model between its training beds
+def test_reduced_model_accuracy(reduced_model):
+    bed = zeolite(1.2)
+    full = bed.simulate(use_cache=False)
+    reduced = reduced_model.simulate(bed)
+    assert reduced.rom_error is not None and reduced.rom_error < 0.02
+    assert len(reduced_model.deim_points) < bed.num_segments
+    assert np.abs(reduced.outlet_CO2 - full.outlet_CO2).max() < 0.01 * bed.initial_conc_CO2
+
+# Test the full model is solved when the bed is not supported or the error indicator is too large
+def test_reduced_model_fallback(reduced_model):
+    short = ReducedOrderModel.train([zeolite(total_time=200)])
+    bed = zeolite(total_time=2000)
+    assert short.simulate(bed).rom_error is None
+    assert short.simulate(bed, tolerance=np.inf).rom_error > 0.1
+    assert reduced_model.simulate(zeolite(num_segments=40)).rom_error is None
+
+# Test a model is trained on a humid bed whose adsorbent has no H₂O parameters, H₂O keeping a single loading mode
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+def test_reduced_model_non_adsorbed_species():
+    adsorbent = Adsorbent_Langmuir("zeolite 13X", 6.42, 0.164882124, 1.8, 650.0)
+    model = ReducedOrderModel.train([Bed(1.0, 0.1, 0.01, 50, 2000, adsorbent, humidity_percentage=50)])
+    bed = Bed(1.0, 0.1, 0.01, 50, 2000, Adsorbent_Langmuir("zeolite 13X", 6.0, 0.17, 1.6, 650.0), humidity_percentage=50)
+    full = bed.simulate(use_cache=False)
+    reduced = model.simulate(bed)
+    assert reduced.rom_error is not None and model.basis_q.shape[1] < bed.num_segments
+    assert np.abs(reduced.outlet_CO2 - full.outlet_CO2).max() < 0.01 * bed.initial_conc_CO2
+    # the H₂O front crosses the bed within the first second, between two snapshots
+    assert np.abs(reduced.outlet_H2O - full.outlet_H2O)[5:].max() < 0.01 * bed.initial_conc_H2O
+
+# Test a ReducedBed is a drop-in Bed: its copies keep the reduced model, its results are cached and extended,
+# and sweeps report the error indicator
+def test_reduced_bed(reduced_model, monkeypatch):
+    results_cache = SimulationCache()
+    monkeypatch.setattr(cache, "default_cache", results_cache)
+    bed = ReducedBed.from_bed(zeolite(), reduced_model)
+    copy = bed.with_adsorbent(Adsorbent_Langmuir("Fitted", 6.0, 0.16, 1.5, 650.0))
+    assert isinstance(copy, ReducedBed) and copy.reduced_model is reduced_model
+    t, outlet_CO2, outlet_H2O = copy.simulate()
+    assert outlet_H2O is None and len(t) == len(outlet_CO2)
+    cached = copy.simulate()
+    assert results_cache.stats()["memory_hits"] == 1 and cached.rom_error is not None
+    assert np.array_equal(cached.outlet_CO2, outlet_CO2)
+    copy.simulate(use_cache=False)
+    assert results_cache.stats()["memory_hits"] == 1
+    extended = copy.extend(cached, 1500)
+    direct = Bed(1.0, 0.1, 0.01, 50, 1500, copy.adsorbent).simulate(use_cache=False)
+    assert np.allclose(extended.outlet_CO2[-1], direct.outlet_CO2[-1], rtol=1e-3)
+    with pytest.raises(ValueError):
+        copy.extend(SimulationResult(t, outlet_CO2), 1500)
+    config = {"length": 1.0, "diameter": 0.1, "flow_rate": 0.01, "num_segments": 50, "total_time": 1000,
+              "q_max_CO2": 6.42, "K_CO2": 0.164882124, "k_ads_CO2": 1.8, "density": 650.0}
+    result = run_configuration(config, reduced_model=reduced_model)
+    assert result["status"] == "ok" and result["rom_error"] < 0.02
@@ -0,0 +1,62 @@
+import pytest
+import numpy as np
+from adsorpsim import Adsorbent_Langmuir, Bed
+from adsorpsim import cache, similarity
+from adsorpsim.cache import SimulationCache
+from adsorpsim.similarity import dimensionless_groups, residence_time, similarity_key, simulate_similar
+
+
+@pytest.fixture
+def sample_adsorbent():
+    return Adsorbent_Langmuir("TestAds", 2.0, 0.5, 1.0, 1000, 1.0, 0.1, 0.5)
+
+@pytest.fixture
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(cache, "default_cache", SimulationCache())
+    similarity_cache = SimulationCache()
+    monkeypatch.setattr(similarity, "default_similarity_cache", similarity_cache)
+    return similarity_cache
+
+# Test geometrically scaled beds with the same residence time share their groups and key, unlike other beds
+def test_dimensionless_groups(sample_adsorbent):
+    bed = Bed(1.0, 0.1, 0.01, 10, 300, sample_adsorbent, humidity_percentage=50)
+    scaled = Bed(2.0, 0.2, 0.08, 10, 600, sample_adsorbent, humidity_percentage=50)
+    assert residence_time(scaled) == pytest.approx(residence_time(bed))
+    assert dimensionless_groups(scaled) == pytest.approx(dimensionless_groups(bed))
+    assert set(dimensionless_groups(Bed(1.0, 0.1, 0.01, 10, 300, sample_adsorbent))) == {
+        "num_segments", "capacity_CO2", "affinity_CO2", "damkohler_CO2"}
+    bed_key = similarity_key(bed, 'BDF', 1e-6, 1e-9)
+    assert similarity_key(Bed(2.0, 0.1, 0.02, 10, 300, sample_adsorbent, humidity_percentage=50), 'BDF', 1e-6, 1e-9) == bed_key
+    assert similarity_key(Bed(2.0, 0.1, 0.01, 10, 300, sample_adsorbent, humidity_percentage=50), 'BDF', 1e-6, 1e-9) != bed_key
+    assert similarity_key(bed, 'BDF', 1e-6, 1e-8) != bed_key
+
+# Test the dimensionless model reproduces the dimensional one, final state included
+@pytest.mark.parametrize("humidity", [0, 50])
+def test_simulate_similar_matches_direct_solve(sample_adsorbent, humidity):
+    bed = Bed(1.0, 0.1, 0.01, 10, 300, sample_adsorbent, humidity_percentage=humidity)
+    direct = bed._solve('BDF', 1e-6, 1e-9)
+    result = simulate_similar(bed)
+    assert np.allclose(result.t, direct.t)
+    assert np.allclose(result.outlet_CO2, direct.outlet_CO2, rtol=1e-5, atol=1e-9)
+    if humidity:
+        assert np.allclose(result.outlet_H2O, direct.outlet_H2O, rtol=1e-5, atol=1e-9)
+    assert np.allclose(result.y_final, direct.y_final, rtol=1e-5, atol=1e-9)
+
+# Test Bed.simulate reuses the solution of a similar bed, rescaled in time, without a new solve, and can extend it
+def test_similar_beds_share_a_solve(sample_adsorbent, fresh_caches):
+    Bed(1.0, 0.1, 0.01, 10, 600, sample_adsorbent).simulate()
+    scaled = Bed(1.0, 0.2, 0.04, 10, 400, sample_adsorbent)
+    t, outlet_CO2, _ = scaled.simulate()
+    assert fresh_caches.stats()["misses"] == 1
+    assert fresh_caches.stats()["memory_hits"] == 1
+    direct = scaled.simulate(use_cache=False)
+    assert np.allclose(t, direct.t)
+    assert np.allclose(outlet_CO2, direct.outlet_CO2, rtol=1e-4, atol=1e-8)
+    # its final state is computed when it is extended
+    extended = scaled.extend(scaled.simulate(), 800)
+    longer = Bed(1.0, 0.2, 0.04, 10, 800, sample_adsorbent).simulate(use_cache=False)
+    assert extended.t_final == 800
+    assert np.allclose(extended.outlet_CO2[-1], longer.outlet_CO2[-1], rtol=1e-4)
+    # the probes are recorded by the dimensional model
+    scaled.simulate(probes=[0.5])
+    assert fresh_caches.stats()["misses"] == 1
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import numpy as np
+from adsorpsim.sweep import parameter_grid, run_sweep
+
+
+@pytest.fixture
+def base():
+    return {
+        "length": 1.0, "diameter": 0.1, "flow_rate": 0.01, "num_segments": 10, "total_time": 300,
+        "q_max_CO2": 2.0, "K_CO2": 0.5, "k_ads_CO2": 1.0, "density": 1000,
+    }
+
+# Test the grid is the full factorial product of the axes
+def test_parameter_grid(base):
+    grid = parameter_grid(base, length=[0.5, 1.0, 2.0], humidity_percentage=[0, 50])
+    assert len(grid) == 6
+    assert grid[-1]["length"] == 2.0 and grid[-1]["humidity_percentage"] == 50
+    assert all(config["K_CO2"] == 0.5 for config in grid)
+
+# Test failures are captured and penalized instead of stopping the sweep, and progress is reported
+def test_run_sweep_serial_failure_capture(base):
+    configs = parameter_grid(base, num_segments=[10, 0])
+    calls = []
+    df = run_sweep(configs, max_workers=1, failure_value=1e6, progress=lambda done, total: calls.append((done, total)))
+    assert list(df["status"]) == ["ok", "failed"]
+    assert df.loc[0, "breakthrough_time"] > 0
+    assert df.loc[1, "breakthrough_time"] == 1e6
+    assert "ZeroDivisionError" in df.loc[1, "error"]
+    assert calls == [(1, 2), (2, 2)]
+
+# Test the process pool with chunking gives the same results as the serial loop, in the input order
+def test_run_sweep_pool_matches_serial(base):
+    configs = parameter_grid(base, length=[0.5, 1.0, 1.5], humidity_percentage=[0, 50])
+    serial = run_sweep(configs, max_workers=1)
+    pooled = run_sweep(configs, max_workers=2, chunk_size=4)
+    assert list(pooled["length"]) == list(serial["length"])
+    assert np.allclose(pooled["breakthrough_time"], serial["breakthrough_time"])
+    assert np.allclose(pooled["adsorbed_CO2"], serial["adsorbed_CO2"])
+
+# Test a simulation exceeding the time limit is reported as timed out
+def test_run_sweep_timeout(base):
+    config = dict(base, num_segments=300, total_time=100000, k_ads_CO2=50.0)
+    df = run_sweep([config], max_workers=1, timeout=0.01)
+    assert df.loc[0, "status"] == "timeout"
+    assert np.isnan(df.loc[0, "adsorbed_CO2"])
+
+# Test a serial sweep with a time limit run from another thread, which cannot enforce it, still simulates
+def test_run_sweep_timeout_in_thread(base):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        df = executor.submit(run_sweep, [base], max_workers=1, timeout=60).result()
+    assert df.loc[0, "status"] == "ok"
+    assert df.loc[0, "breakthrough_time"] > 0
+
+# Test the early-stopping sweep reports the breakthrough at the requested fraction of the inlet concentration
+def test_run_sweep_early_stop(base):
+    config = dict(base, total_time=3000)
+    df = run_sweep([config], percentage=50, max_workers=1, early_stop=True)
+    full = run_sweep([config], percentage=50, max_workers=1)
+    assert df.loc[0, "status"] == "ok"
+    assert df.loc[0, "breakthrough_time"] == pytest.approx(full.loc[0, "breakthrough_time"], rel=0.01)
+    # a breakthrough beyond the simulated time is not reported as the end of the simulation
+    short = run_sweep([dict(config, total_time=50)], percentage=50, max_workers=1, early_stop=True)
+    assert short.loc[0, "status"] == "not_reached" and np.isnan(short.loc[0, "breakthrough_time"])